@@ -0,0 +1,83 @@
+import numpy as np
+
+tables = {}         # process-wide curve tables, curve-defining parameters -> {attribute name: value}
+
+def freeze(value):
+    """
+    Make a curve table value read-only, so that it can be shared by every object built with the same parameters
+
+    value : np.ndarray, list or any other object (interpolating functions, floats)
+
+    output : read-only np.ndarray view, tuple or the same object
+    """
+    if isinstance(value,np.ndarray):
+        value = value.view()
+        value.flags.writeable = False
+        return(value)
+    if isinstance(value,list):
+        return(tuple(value))
+    return(value)
+
+def curve_table(key,builder):
+    """
+    Process-wide memo cache of the polarization and performance curves of electrolyzer and fuel cell modules
+
+    Curves only depend on a few parameters defining the module (model, size, number of cells, operating temperature
+    and pressure). They are built the first time a module is created and then shared by all the objects built with
+    the same parameters, es. all the RECs of a sweep in which only PV size changes.
+
+    key : tuple hashable curve-defining parameters, es. ('electrolyzer','Alkaline',Npower,nc,CellArea,T,P)
+    builder : callable returning a dict {attribute name: value} of the curve tables and interpolating functions
+
+    output : dict {attribute name: value} shared curve tables, numpy arrays and lists are read-only
+    """
+    table = tables.get(key)
+    if table is None:
+        table = {name: freeze(value) for name,value in builder().items()}
+        tables[key] = table
+    return(table)
+
+def clear():
+    """
+    Empty the cache, es. after changing a curve-defining constant
+    """
+    tables.clear()
+
+
+###########################################################################################################################################################
+
+if __name__ == "__main__":
+
+    """
+    Functional test and benchmark: electrolyzer and fuel cell objects built again with unchanged stacks
+    """
+
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding techs module path
+    from core import constants as c
+    c.timestep          = 60
+    c.timestep_number   = 8760
+    c.P2E               = c.timestep*60
+    from techs import electrolyzer, fuel_cell
+
+    ele_parameters  = {'Npower': 1000, 'number of modules': 10, 'strategy': 'hydrogen-first', 'only_renewables': True, 'minimum_load': 0,
+                       'power distribution': 'parallel', 'min power module': 0.1, 'ageing': False, 'state': 'on', 'operational_period': '01-01,31-12',
+                       'efficiency': False}
+    fc_parameters   = {'Npower': 100, 'number of modules': 2, 'min power module': 0, 'ageing': False, 'state': 'on', 'operational_period': '01-01,31-12',
+                       'electric efficiency': False, 'thermal efficiency': False}
+
+    for name,build in [('PEM General electrolyzer',lambda: electrolyzer({**ele_parameters,'stack model': 'PEM General'},c.timestep_number)),
+                       ('Alkaline electrolyzer',lambda: electrolyzer({**ele_parameters,'stack model': 'Alkaline'},c.timestep_number)),
+                       ('PEM General fuel cell',lambda: fuel_cell({**fc_parameters,'stack model': 'PEM General'},c.timestep_number)),
+                       ('SOFC fuel cell',lambda: fuel_cell({**fc_parameters,'stack model': 'SOFC'},c.timestep_number))]:
+        clear()
+        start   = time.perf_counter()
+        first   = build()
+        built   = time.perf_counter()-start
+        start   = time.perf_counter()
+        second  = build()
+        cached  = time.perf_counter()-start
+        print(f"\n{name}: {built*1e3:.1f} ms first construction, {cached*1e3:.1f} ms with cached curves")
+        print('shared curves:',first.Voltage is second.Voltage, 'read-only:',not second.Voltage.flags.writeable)
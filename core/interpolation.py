@@ -0,0 +1,291 @@
+import numpy as np
+from bisect import bisect_left, bisect_right
+
+class linear_interp:
+
+    def __init__(self,x,y,bounds_error=None,fill_value=np.nan):
+        """
+        Create a linear interpolation table, drop-in replacement of scipy.interpolate.interp1d(x,y) for the linear curves
+        evaluated at every step (polarization, efficiency and part-load curves)
+
+        Knots are sorted and segment slopes are computed once. Scalar inputs are looked up with a binary search on
+        python lists and a few float operations, avoiding the interp1d call overhead and its 0-d array outputs.
+        Results are the same as interp1d: np.interp inside the range, fill_value or linear extrapolation outside.
+
+        x : array-like knots, not necessarily sorted
+        y : array-like values at knots
+        bounds_error : bool True raises ValueError outside the range of x. Default True unless fill_value is 'extrapolate'
+        fill_value : float value outside the range of x or 'extrapolate' for linear extrapolation from the end segments
+
+        output : linear interpolation object returning np.float64 for scalar inputs and np.ndarray for array inputs
+        """
+        x       = np.asarray(x,dtype=float)
+        y       = np.asarray(y,dtype=float)
+        order   = np.argsort(x,kind='mergesort')          # same knots ordering of interp1d
+        self.x  = x[order]
+        self.y  = y[order]
+        self.n  = len(self.x)
+
+        self.extrapolate = isinstance(fill_value,str) and fill_value == 'extrapolate'
+        if bounds_error is None:
+            bounds_error = not self.extrapolate
+        if bounds_error and self.extrapolate:
+            raise ValueError("Cannot extrapolate and raise at the same time.\n\
+            Options to fix the problem: \n\
+                (a) - set bounds_error=False to extrapolate \n\
+                (b) - set a numeric fill_value to raise outside the range of x")
+        self.bounds_error   = bounds_error
+        self.fill_value     = np.nan if self.extrapolate else float(fill_value)
+        self.x_min          = float(self.x[0])
+        self.x_max          = float(self.x[-1])
+
+        with np.errstate(divide='ignore',invalid='ignore'):
+            self.slopes = (self.y[1:]-self.y[:-1])/(self.x[1:]-self.x[:-1])    # segment slopes
+
+        # python lists for scalar lookups
+        self.xs     = self.x.tolist()
+        self.ys     = self.y.tolist()
+        self.ss     = self.slopes.tolist()
+
+    def value(self,x):
+        """
+        Scalar evaluation
+
+        x : float
+
+        output : float interpolated value
+        """
+        if x != x:                                                  # nan
+            return(x)
+        if x < self.x_min or x > self.x_max:
+            if self.bounds_error:
+                side = 'below' if x < self.x_min else 'above'
+                limit = 'minimum' if x < self.x_min else 'maximum'
+                raise ValueError(f"A value ({x}) in x_new is {side} the interpolation range's {limit} value ({self.x_min if x < self.x_min else self.x_max}).")
+            if not self.extrapolate:
+                return(self.fill_value)
+
+        if self.extrapolate:                                        # segment search as interp1d: knot i-1 < x <= knot i, end segments outside
+            i = min(max(bisect_left(self.xs,x),1),self.n-1)
+            return(self.ss[i-1]*(x-self.xs[i-1])+self.ys[i-1])
+
+        # segment search as np.interp: knot j <= x < knot j+1
+        j = bisect_right(self.xs,x)-1
+        if j == self.n-1 or self.xs[j] == x:
+            return(self.ys[j])
+        y = self.ss[j]*(x-self.xs[j])+self.ys[j]
+        if y != y:                                                  # non-finite slope, trying from the other end of the segment
+            y = self.ss[j]*(x-self.xs[j+1])+self.ys[j+1]
+            if y != y and self.ys[j] == self.ys[j+1]:
+                y = self.ys[j]
+        return(y)
+
+    def __call__(self,x_new):
+        """
+        x_new : float or array-like
+
+        output : np.float64 or np.ndarray interpolated values
+        """
+        if isinstance(x_new,(float,int,np.number)) or np.ndim(x_new) == 0:
+            return(np.float64(self.value(float(x_new))))
+
+        x_new = np.asarray(x_new,dtype=float)
+        below = x_new < self.x_min
+        above = x_new > self.x_max
+        if self.bounds_error and below.any():
+            raise ValueError(f"A value ({x_new[np.argmax(below)]}) in x_new is below the interpolation range's minimum value ({self.x_min}).")
+        if self.bounds_error and above.any():
+            raise ValueError(f"A value ({x_new[np.argmax(above)]}) in x_new is above the interpolation range's maximum value ({self.x_max}).")
+
+        if self.extrapolate:
+            i = np.clip(np.searchsorted(self.x,x_new),1,self.n-1)
+            return(self.slopes[i-1]*(x_new-self.x[i-1])+self.y[i-1])
+
+        y_new = np.interp(x_new,self.x,self.y)
+        y_new[below | above] = self.fill_value
+        return(y_new)
+
+
+class grid_interp:
+
+    def __init__(self,grid,values):
+        """
+        Create a bilinear interpolation table on a regular 2-D grid, drop-in replacement of
+        scipy.interpolate.RegularGridInterpolator(grid,values,method='linear') for the performance maps evaluated at every step
+
+        Values can have trailing dimensions (es. several maps stacked along the last axis), evaluated with a single lookup.
+        Scalar points are looked up with a binary search on python lists, avoiding the RegularGridInterpolator call overhead.
+        Points outside the grid raise ValueError as RegularGridInterpolator with bounds_error=True.
+
+        grid : tuple of two array-like strictly ascending knots (x0, x1)
+        values : array-like (len(x0), len(x1), ...) values at knots
+
+        output : bilinear interpolation object returning np.float64 (or np.ndarray for trailing dimensions) for a scalar point (x0,x1)
+        """
+        self.grid   = tuple(np.ascontiguousarray(x,dtype=float) for x in grid)
+        self.values = np.ascontiguousarray(values,dtype=float)
+        if len(self.grid) != 2 or self.values.shape[:2] != tuple(len(x) for x in self.grid) or any(np.any(np.diff(x) <= 0) for x in self.grid):
+            raise ValueError("Invalid grid or values for the bilinear interpolation table.\n\
+            Options to fix the problem: \n\
+                (a) - pass two strictly ascending arrays of knots \n\
+                (b) - pass values with shape (len(x0), len(x1), ...)")
+
+        # python lists for scalar lookups
+        self.xs         = [x.tolist() for x in self.grid]
+        self.scalar     = self.values.ndim == 2
+
+        # direction of the values along x1 for the inverse lookup: 1 non-decreasing, -1 non-increasing, 0 not monotonic
+        self.direction  = 0
+        if self.scalar:
+            steps = np.diff(self.values,axis=1)
+            if np.all(steps >= 0) and np.any(steps > 0):
+                self.direction = 1
+            elif np.all(steps <= 0) and np.any(steps < 0):
+                self.direction = -1
+        self.shape      = self.values.shape[2:]                                                                 # trailing dimensions
+        self.vs         = self.values.tolist() if self.scalar else self.values.reshape(self.values.shape[:2]+(-1,)).tolist()
+
+    def index(self,d,x):
+        """
+        Grid cell and normalized distance along dimension d, as RegularGridInterpolator
+
+        d : int dimension
+        x : float
+
+        output : int cell index, float normalized distance inside the cell [-]
+        """
+        xs = self.xs[d]
+        if x < xs[0] or x > xs[-1]:
+            raise ValueError(f"One of the requested xi is out of bounds in dimension {d}")
+        i = min(max(bisect_left(xs,x)-1,0),len(xs)-2)
+        return(i,(x-xs[i])/(xs[i+1]-xs[i]))
+
+    def value(self,x0,x1):
+        """
+        Scalar evaluation
+
+        x0 : float
+        x1 : float
+
+        output : float (or np.ndarray for trailing dimensions) interpolated value
+        """
+        if x0 != x0 or x1 != x1:                                    # nan
+            return(np.nan if self.scalar else np.full(self.shape,np.nan))
+        i,w0    = grid_interp.index(self,0,x0)
+        j,w1    = grid_interp.index(self,1,x1)
+        v       = self.vs
+        if self.scalar:
+            return(v[i][j]*(1-w0)*(1-w1)+v[i][j+1]*(1-w0)*w1+v[i+1][j]*w0*(1-w1)+v[i+1][j+1]*w0*w1)
+        return(np.array([a*(1-w0)*(1-w1)+b*(1-w0)*w1+c*w0*(1-w1)+d*w0*w1 for a,b,c,d in zip(v[i][j],v[i][j+1],v[i+1][j],v[i+1][j+1])]).reshape(self.shape))
+
+    def inverse(self,x0,y):
+        """
+        Exact inverse along x1 of a table monotonic along x1: at fixed x0 the bilinear table is piecewise linear in x1
+        with knot values blended from the two neighbouring rows, so x1 is found with a binary search on the knot values
+        and a linear inversion inside the segment, without iterations. Values outside the range at x0 return the x1 limits
+
+        x0 : float first coordinate, es. ambient temperature
+        y : float target value
+
+        output : float x1 such that the table value at (x0,x1) is y, es. load
+        """
+        if self.direction == 0:
+            raise ValueError("The interpolation table is not monotonic along x1 and cannot be inverted.\n\
+            Options to fix the problem: \n\
+                (a) - check the table values: each row must be non-decreasing or non-increasing along x1")
+        i,w0    = grid_interp.index(self,0,x0)
+        d       = self.direction
+        knots   = [d*((1-w0)*a+w0*b) for a,b in zip(self.vs[i],self.vs[i+1])]     # knot values at x0, non-decreasing
+        xs      = self.xs[1]
+        y       = d*y
+        if y <= knots[0]:
+            return(xs[0])
+        if y >= knots[-1]:
+            return(xs[-1])
+        k = bisect_right(knots,y)-1                                                 # knots[k] <= y < knots[k+1]
+        return(xs[k]+(y-knots[k])/(knots[k+1]-knots[k])*(xs[k+1]-xs[k]))
+
+    def __call__(self,xi):
+        """
+        xi : tuple (x0,x1) of floats or array-like
+
+        output : np.float64 or np.ndarray interpolated values
+        """
+        x0,x1 = xi
+        if isinstance(x0,(float,int,np.number)) and isinstance(x1,(float,int,np.number)) or np.ndim(x0) == 0 and np.ndim(x1) == 0:
+            y = grid_interp.value(self,float(x0),float(x1))
+            return(np.float64(y) if self.scalar else y)
+
+        x0,x1 = np.broadcast_arrays(np.asarray(x0,dtype=float),np.asarray(x1,dtype=float))
+        for d,x in enumerate((x0,x1)):
+            if np.any(x < self.grid[d][0]) or np.any(x > self.grid[d][-1]):
+                raise ValueError(f"One of the requested xi is out of bounds in dimension {d}")
+        i   = np.clip(np.searchsorted(self.grid[0],x0)-1,0,len(self.grid[0])-2)
+        j   = np.clip(np.searchsorted(self.grid[1],x1)-1,0,len(self.grid[1])-2)
+        w0  = (x0-self.grid[0][i])/(self.grid[0][i+1]-self.grid[0][i])
+        w1  = (x1-self.grid[1][j])/(self.grid[1][j+1]-self.grid[1][j])
+        w0  = w0.reshape(w0.shape+(1,)*(self.values.ndim-2))
+        w1  = w1.reshape(w1.shape+(1,)*(self.values.ndim-2))
+        v   = self.values
+        return(v[i,j]*(1-w0)*(1-w1)+v[i,j+1]*(1-w0)*w1+v[i+1,j]*w0*(1-w1)+v[i+1,j+1]*w0*w1)
+
+
+###########################################################################################################################################################
+
+if __name__ == "__main__":
+
+    """
+    Functional test and benchmark against scipy interp1d
+    """
+
+    import time
+    from scipy.interpolate import interp1d
+
+    rng     = np.random.default_rng(0)
+    x       = np.linspace(0,1000,3000)                     # [kW] es. electrolyzer module power input
+    y       = 0.02*np.sqrt(x)+1e-4*x                        # [kg/s] es. hydrogen production
+    x_new   = rng.uniform(-100,1100,10000)
+
+    for kwargs in [{'bounds_error': False, 'fill_value': 'extrapolate'},{'bounds_error': False}]:
+        old = interp1d(x,y,**kwargs)
+        new = linear_interp(x,y,**kwargs)
+
+        scalar_old  = np.array([old(v) for v in x_new])
+        scalar_new  = np.array([new(v) for v in x_new])
+        print(kwargs)
+        print('scalar results equal:',np.array_equal(scalar_old,scalar_new,equal_nan=True))
+        print('array results equal: ',np.array_equal(old(x_new),new(x_new),equal_nan=True))
+        print('knots results equal: ',np.array_equal(np.array([old(v) for v in x]),np.array([new(v) for v in x])))
+
+        for name,f in [('interp1d',old),('linear_interp',new)]:
+            start = time.perf_counter()
+            for v in x_new:
+                f(v)
+            scalar = (time.perf_counter()-start)/len(x_new)*1e6
+            start = time.perf_counter()
+            for _ in range(100):
+                f(x_new)
+            array = (time.perf_counter()-start)/100*1e3
+            print(f"{name:>14}: {scalar:.2f} µs per scalar call, {array:.3f} ms per {len(x_new)} values array call")
+
+    f = linear_interp([0,1,2],[0,10,20])
+    try:
+        f(3)
+    except ValueError as e:
+        print(e)                                            # default bounds_error as interp1d
+
+    # bilinear table against RegularGridInterpolator: CHP performance map grid (Tamb [°C], load [-]), two stacked maps
+    from scipy.interpolate import RegularGridInterpolator
+
+    grid    = (np.array([-10,0,10,15,20,30,40.]),np.array([0,0.25,1/3,0.5,2/3,5/6,1]))
+    values  = rng.uniform(100,5000,(7,7,2))
+    points  = np.column_stack((rng.uniform(-10,40,10000),rng.uniform(0,1,10000)))
+    old     = RegularGridInterpolator(grid,values,method='linear')
+    new     = grid_interp(grid,values)
+    print('bilinear max relative difference:',np.max(np.abs(np.array([new(tuple(p)) for p in points])/old(points)-1)),
+          np.max(np.abs(new((points[:,0],points[:,1]))/old(points)-1)))
+    for name,f in [('RegularGridInterpolator',old),('grid_interp',new)]:
+        start = time.perf_counter()
+        for p in points[:2000]:
+            f((p[0],p[1]))
+        print(f"{name:>24}: {(time.perf_counter()-start)/2000*1e6:.2f} µs per point")
@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 from techs import (heatpump, boiler_el, boiler_ng, boiler_h2, PV, wind, battery, H_tank, HPH_tank, O2_tank, fuel_cell, electrolyzer, inverter, chp_gt, Chp, Absorber, mhhc_compressor, Compressor, SMR)
 from core import constants as c
+from core.storage import storage_network
 
 class location:
     
@@ -30,6 +31,7 @@ class location:
             'H tank':                   dictionary parameters needed to create H_tank object (see H_tank.py)
             'O2 tank':                  dictionary parameters needed to create O2_tank object (see O2_tank.py)
             'HPH tank':                 dictionary parameters needed to create High Pressure H_tank object (see H_tank.py)
+            '... tank':                 dictionary parameters needed to create further hydrogen tanks (es. 'MPH tank'), 'pressure' [bar] and 'carrier' ('hydrogen' or 'HP hydrogen') included (see H_tank.py)
             'heatpump':                 dictionary parameters needed to create heat pump object (see heatpump.py)
             'boiler_ng':                dictionary parameters needed to create fuel cell object (see boiler.py)
             'boiler_el':                dictionary parameters needed to create fuel cell object (see boiler.py)
@@ -126,7 +128,7 @@ class location:
                         self.power_balance[carrier][carrier+' demand'] = - pd.read_csv(path+'/loads/'+system[f"{carrier} demand"]['series'])['kg/s'].to_numpy() 
                 
                 # checking input files, different units for different energy carriers
-                elif carrier == 'process steam':    # [kg/s]
+                elif carrier in ['process steam','oxygen']:    # [kg/s]
                     self.power_balance[carrier][carrier+' demand']   = - pd.read_csv(path+'/loads/'+system[f"{carrier} demand"]['series'])['kg/s'].to_numpy() 
                 elif carrier == 'gas':              # [Sm3/s]
                     self.power_balance[carrier][carrier+' demand']   = - pd.read_csv(path+'/loads/'+system[f"{carrier} demand"]['series'])['Sm3/s'].to_numpy() 
@@ -248,18 +250,6 @@ class location:
             self.power_balance['hydrogen']['mhhc compressor']  = np.zeros(c.timestep_number)     # array hydrogen compressor hydrogen compressed
             self.power_balance['gas']['mhhc compressor']       = np.zeros(c.timestep_number)     # array hydrogen compressor heating water balanced used
         
-        if 'H tank' and 'HPH tank' in self.system: 
-            # H_tank
-            self.technologies['H tank'] = H_tank(self.system['H tank'],c.timestep_number) # H tank object created and to 'technologies' dictionary
-            self.power_balance['hydrogen']['H tank']        = np.zeros(c.timestep_number)   # array H tank hydrogen balance
-            
-            # HPH tank
-            self.technologies['HPH tank'] = HPH_tank(self.system['HPH tank'],c.timestep_number) # HPH tank object created and to 'technologies' dictionary
-            self.power_balance['HP hydrogen']['HPH tank'] = np.zeros(c.timestep_number)     # array HPH tank hydrogen balance
-            
-            self.tank_stream = {'H tank'    :'hydrogen',        # dictionary assigning different hydrogen streams to different storage technologies - necessary for loc_energy_simulation
-                                'HPH tank'  :'HP hydrogen'}
-        
         if 'O2 tank' in self.system: 
             self.technologies['O2 tank'] = O2_tank(self.system['O2 tank'],c.timestep_number) # LPH tank object created and to 'technologies' dictionary
             self.power_balance['oxygen']['O2 tank'] = np.zeros(c.timestep_number)         # array LPH tank hydrogen balance
@@ -278,18 +268,93 @@ class location:
             self.power_balance['HP hydrogen']['mechanical compressor']    = np.zeros(c.timestep_number) # array of compressed hydrogen flow sent toward HPH tank
             self.power_balance['cooling water']['mechanical compressor']  = np.zeros(c.timestep_number) # array of water flow to be fed to the refrigeration system 
  
-        if 'H tank' in self.system and not 'HPH tank' in self.system:
-            if 'hydrogen demand' in self.system or 'HP hydrogen demand' in self.system:
-                if self.system[self.hydrogen_demand+' demand']['strategy'] == 'supply-led' and self.system['H tank']['max capacity'] != False:
-                    raise ValueError(f"Adjust {self.name} location system in studycase.json. When the system is operated in supply-led mode, H tank size cannot be defined in advance.\n\
+        self.storage = storage_network(c.timestep_number)   # hydrogen tanks indexed by carrier and pressure level - necessary for loc_energy_simulation
+        for tech_name in self.system:
+            if tech_name.endswith(' tank') and tech_name != 'O2 tank':      # any number of hydrogen tanks, es. 'H tank', 'MPH tank', 'HPH tank'
+                carrier = self.system[tech_name].get('carrier','HP hydrogen' if tech_name == 'HPH tank' else 'hydrogen')
+                if carrier not in ['hydrogen','HP hydrogen']:
+                    raise ValueError(f"{tech_name} in {self.name} location stores '{carrier}', only hydrogen tanks can be added to the location storage.\n\
             Options to fix the problem: \n\
-            (a) - Insert false for 'max capacity' among H tank parameters in studycase.json\n\
+            (a) - Insert 'hydrogen' or 'HP hydrogen' for 'carrier' among {tech_name} parameters in studycase.json\n\
+            (b) - Remove {tech_name} from studycase.json")
+                tank = HPH_tank if carrier == 'HP hydrogen' else H_tank
+                self.technologies[tech_name] = tank(self.system[tech_name],c.timestep_number)  # tank object created and to 'technologies' dictionary
+                self.power_balance[carrier][tech_name] = np.zeros(c.timestep_number)          # array tank hydrogen balance
+                self.storage.add(tech_name,self.technologies[tech_name],carrier)
+        
+        # tanks storing the same carrier are dispatched together, by increasing pressure level, at the priority of the first one
+        self.tank_dispatch = {}
+        for tech_name,carrier in self.storage.stream.items():
+            if carrier not in self.tank_dispatch.values():
+                self.tank_dispatch[tech_name] = carrier
+        
+        # supply-led hydrogen demand without high pressure storage: the tank is sized at the end of the simulation
+        self.tank_sizing = self.storage.has('hydrogen') and not self.storage.has('HP hydrogen') and ('hydrogen demand' in self.system or 'HP hydrogen demand' in self.system) and \
+                           self.system[self.hydrogen_demand+' demand']['strategy'] == 'supply-led'
+        if self.tank_sizing:
+            tanks = self.storage.level('hydrogen')
+            if len(tanks) > 1 or self.system[tanks[0]]['max capacity'] != False:
+                raise ValueError(f"Adjust {self.name} location system in studycase.json. When the system is operated in supply-led mode, H tank size cannot be defined in advance.\n\
+            Options to fix the problem: \n\
+            (a) - Insert false for 'max capacity' among H tank parameters in studycase.json and keep a single hydrogen tank\n\
             (b) - Switch to 'demand-led' in 'hydrogen-demand'('strategy')\
             ")
-            self.technologies['H tank'] = H_tank(self.system['H tank'],c.timestep_number)   # H tank object created and to 'technologies' dictionary
-            self.power_balance['hydrogen']['H tank'] = np.zeros(c.timestep_number)         # array H tank hydrogen balance
+        
+        # hydrogen availability/producibility rules depend only on the system configuration: selected once here instead of at each step
+        if "hydrogen grid" in self.system and self.system["hydrogen grid"]["draw"]:     # hydrogen can be drawn from a hydrogen grid
+            self.h2_available_rule = 'grid'
+        elif self.storage.has('hydrogen'):                                              # hydrogen can be drawn from the tanks
+            self.h2_available_rule = 'storage'
+        else:
+            self.h2_available_rule = 'production'
             
-            self.tank_stream = {'H tank':'hydrogen'}     # dictionary assigning hydrogen stream to H tank storage technologies - necessary for loc_energy_simulation
+        if "hydrogen grid" in self.system and self.system["hydrogen grid"]["feed"]:     # hydrogen can be fed into an hydrogen grid
+            self.h2_producible_rule = 'grid'
+        elif 'hydrogen demand' not in self.system and self.storage.has('hydrogen'):     # hydrogen-energy-storage configuration, only renewable energy is stored in the form of hydrogen to be converted back into electricity via fuel cell 
+            self.h2_producible_rule = 'storage'
+        elif self.storage.has('hydrogen') and not self.storage.has('HP hydrogen') and self.system[self.hydrogen_demand+' demand']['strategy'] == 'demand-led':   # hydrogen can only be stored into low pressure tanks
+            self.h2_producible_rule = 'storage and demand'
+        elif self.storage.has('hydrogen') and not self.storage.has('HP hydrogen') and self.system[self.hydrogen_demand+' demand']['strategy'] == 'supply-led':   # storage capacity is infinite, tanks are dimensioned at the end of simulation
+            self.h2_producible_rule = 'unbounded'
+        elif self.storage.has('hydrogen') and self.storage.has('HP hydrogen'):          # low pressure tanks feed the compression stage
+            self.h2_producible_rule = 'buffer'
+        else:                                                                           # hydrogen is consumed by a technology with a higher priority than tank
+            self.h2_producible_rule = 'consumption'
+        
+        # electrolyzer working points computed at once for the whole simulation when its power input doesn't depend on the step loop (see electrolyzer.use_series)
+        self.electrolyzer_series = False
+        if 'electrolyzer' in self.system:
+            ele         = self.technologies['electrolyzer']
+            upstream    = list(self.system)[:list(self.system).index('electrolyzer')]    # technologies with higher priority
+            known_input = all(tech in ['PV','wind'] or tech.endswith(' demand') or (tech.endswith(' grid') and tech != 'electricity grid') for tech in upstream)
+            if not ele.ageing and ele.model in ['simple','PEM General','Alkaline']:
+                if ele.strategy == 'full-time':
+                    ele.use_series()
+                    self.electrolyzer_series = True
+                elif ele.strategy == 'hydrogen-first' and ele.only_renewables == True and known_input and not ('battery' in self.system and 'hydrogen demand' in self.system):
+                    power = np.zeros(c.timestep_number)     # [kW] electricity available for the electrolyzer: renewables production and demands with higher priority
+                    for tech in upstream:
+                        if tech in ['PV','wind']:
+                            power += self.technologies[tech].production
+                        elif tech in self.power_balance['electricity']:
+                            power += self.power_balance['electricity'][tech]
+                    ele.use_series(power)
+                    self.electrolyzer_series = True
+        
+        # 'simple' fuel cell working points computed at once for the whole simulation when the electricity it has to cover doesn't depend on the step loop (see fuel_cell.use_series)
+        self.fuel_cell_series = False
+        if 'fuel cell' in self.system and self.technologies['fuel cell'].model == 'simple':
+            upstream    = list(self.system)[:list(self.system).index('fuel cell')]      # technologies with higher priority
+            renewables_only_electrolyzer = 'electrolyzer' in self.system and self.technologies['electrolyzer'].strategy == 'hydrogen-first' and self.technologies['electrolyzer'].only_renewables == True   # it only absorbs surplus electricity, the fuel cell only covers deficits
+            if all(tech in ['PV','wind'] or tech.endswith(' demand') or (tech.endswith(' grid') and tech != 'electricity grid') or (tech == 'electrolyzer' and renewables_only_electrolyzer) for tech in upstream):
+                power = np.zeros(c.timestep_number)     # [kW] electricity balance seen by the fuel cell: renewables production and demands with higher priority
+                for tech in upstream:
+                    if tech in ['PV','wind']:
+                        power += self.technologies[tech].production
+                    elif tech in self.power_balance['electricity'] and tech != 'electrolyzer':
+                        power += self.power_balance['electricity'][tech]
+                self.technologies['fuel cell'].use_series(power)
+                self.fuel_cell_series = True
         
         self.power_balance['electricity']['collective self consumption']   = np.zeros(c.timestep_number) # array contribution to collective-self-consumption as producer (-) or as consumer (+)
         #self.power_balance['heating water']['collective self consumption'] = np.zeros(c.timestep_number) # array contribution to collective-self-consumption as producer (-) or as consumer (+)---heat----mio!!!
@@ -332,6 +397,137 @@ class location:
         
         else:
             pass
+
+    def series_logic(self,carrier,tech_name):
+        """
+        Same as production_logic and consumption_logic, applied to all the timesteps of the simulation at once.
+        Used for carriers solved after the step loop, calling it for each technology following location priorities.
+        """
+        balance = self.power_balance[carrier][tech_name]
+        
+        mask = balance < 0      # energy consumption
+        self.consumption[carrier][tech_name][tech_name][mask] = - balance[mask]
+        self.consumption[carrier][tech_name]['Aux'][mask] = - balance[mask]
+        required_energy = np.where(mask,-balance,0)
+        for tech in self.production[carrier]:
+            m = mask & (self.production[carrier][tech]['Aux'] > 0)                  # timesteps in which some tech with higher priority has available energy
+            share = np.minimum(required_energy,self.production[carrier][tech]['Aux'])[m]
+            self.production[carrier][tech][tech_name][m] = share
+            required_energy[m] -= share
+            self.consumption[carrier][tech_name]['Aux'][m] -= share
+            self.consumption[carrier][tech_name][tech][m] = share
+            self.production[carrier][tech]['Aux'][m] -= share
+        
+        mask = balance > 0      # energy production
+        self.production[carrier][tech_name][tech_name][mask] = balance[mask]
+        self.production[carrier][tech_name]['Aux'][mask] = balance[mask]
+        available_energy = np.where(mask,balance,0)
+        for tech in self.consumption[carrier]:
+            m = mask & (self.consumption[carrier][tech]['Aux'] > 0)                 # timesteps in which some tech with higher priority has required energy
+            share = np.minimum(available_energy,self.consumption[carrier][tech]['Aux'])[m]
+            self.consumption[carrier][tech][tech_name][m] = share
+            available_energy[m] -= share
+            self.consumption[carrier][tech]['Aux'][m] -= share
+            self.production[carrier][tech_name]['Aux'][m] -= share
+            self.production[carrier][tech_name][tech][m] = share
+            
+    def oxygen_dispatch(self):
+        """
+        Oxygen is a by-product of electrolysis and never drives the dispatch. O2 tank, oxygen demand and oxygen grid
+        are solved once the step loop is over, on the whole oxygen series produced by electrolyzers and following location priorities.
+    
+        output : updating of location oxygen balances
+        """
+        pb = np.zeros(c.timestep_number)   # [kg/s] oxygen balance
+        
+        for tech_name in self.system:
+            if tech_name == 'O2 tank':
+                if 'oxygen demand' in self.system and self.system['oxygen demand']['strategy'] != 'supply-led':
+                    self.power_balance['oxygen']['O2 tank'][:] = self.technologies['O2 tank'].use_series(pb)     # oxygen absorbed(-) or supplied(+) by O2 tank 
+                elif 'hydrogen demand' in self.system and self.system['hydrogen demand']['strategy'] == 'supply-led':
+                    self.technologies['O2 tank'].sizing(self.storage.capacity('hydrogen'))
+            elif tech_name == 'oxygen grid':
+                feed = (pb > 0) & self.system['oxygen grid']['feed']
+                draw = (pb < 0) & self.system['oxygen grid']['draw']
+                self.power_balance['oxygen']['oxygen grid'][:] = np.where(feed | draw,-pb,0)   # oxygen from grid(+) or into grid(-) 
+            elif tech_name not in self.power_balance['oxygen']:
+                continue
+            pb += self.power_balance['oxygen'][tech_name]     # oxygen balance update (electrolyzer series computed in the step loop, demand, tank and grid exchanges)
+            self.series_logic('oxygen',tech_name)
+        
+        ### Global check on oxygen balance
+        tol = 0.0001  # [-] tolerance on error
+        m   = max(np.max(self.power_balance['oxygen'][arr]) for arr in self.power_balance['oxygen'])
+        unbalanced = np.flatnonzero(np.abs(pb) > abs(m*tol))
+        if len(unbalanced) > 0:
+            step = unbalanced[0]
+            if pb[step] >0:     sign = 'positive'
+            else:               sign = 'negative'
+            raise ValueError(f'Warning: oxygen balance at the end of timestep {step} shows {sign} value of {round(pb[step],2)} \n\
+            It means there is an overproduction not fed to grid or demand is not satisfied.\n\
+            Options to fix the problem: \n\
+                (a) - Include oxygen grid[\'draw\']: true if negative or oxygen grid[\'feed\']: true if positive in studycase.json \n\
+                (b) - Vary components size or demand series in studycase.json')
+     
+    def get_state(self,step):
+        """
+        Location state at the beginning of step, to restart the simulation from there (see REC.get_state)
+        
+        step : int step at which the simulation will be restarted
+        
+        output : dict picklable location state
+            'power_balance', 'consumption', 'production': balances of the steps already simulated (non-zero arrays only)
+            'technologies': state of the technologies exposing get_state() (battery, tanks, heatpump inertial TES)
+        """
+        def prefix(balances):   # arrays still equal to zero are not saved: a new location object already has them
+            return({key: prefix(value) if isinstance(value,dict) else value[:step].copy() for key,value in balances.items() if isinstance(value,dict) or np.any(value[:step])})
+        
+        return({'step'          : step,
+                'power_balance' : prefix(self.power_balance),
+                'consumption'   : prefix(self.consumption),
+                'production'    : prefix(self.production),
+                'technologies'  : {tech_name: tech.get_state(step) for tech_name,tech in self.technologies.items() if hasattr(tech,'get_state')}})
+    
+    def set_state(self,state):
+        """
+        Restore a location state saved with get_state(). Only balances and technologies present in both systems are restored,
+        the other ones start from their initial state.
+        
+        state : dict location state
+        """
+        step = state['step']
+        def restore(balances,saved):
+            for key in saved:
+                if key in balances:
+                    if isinstance(balances[key],dict):
+                        restore(balances[key],saved[key])
+                    else:
+                        balances[key][:step] = saved[key]
+        
+        restore(self.power_balance,state['power_balance'])
+        restore(self.consumption,state['consumption'])
+        restore(self.production,state['production'])
+        for tech_name in state['technologies']:
+            if tech_name in self.technologies:
+                self.technologies[tech_name].set_state(state['technologies'][tech_name])
+    
+    def net_series(self,carrier,tech_name):
+        """
+        Net production (+) or demand (-) of carrier seen by tech_name, i.e. the balance of the technologies and demands with higher priority.
+        Used to size storage technologies with core.storage.capacity_sweep after a single simulation.
+        
+        carrier : str es. 'electricity', 'hydrogen'
+        tech_name : str storage technology to be sized (es. 'battery', 'H tank')
+        
+        output : array [kW] or [kg/s]
+        """
+        net = np.zeros(c.timestep_number)
+        for tech in self.system:
+            if tech == tech_name:
+                break
+            if tech in self.power_balance[carrier] and tech != f"{carrier} grid":
+                net += self.power_balance[carrier][tech]
+        return(net)
      
     def hydrogen_available_producible(self,step,pb):    # Tank storage system handling
         
@@ -339,30 +535,29 @@ class location:
         
         hydrogen_produced = max(0,pb['hydrogen'])*c.timestep*60
         
-        if "hydrogen grid" in self.system and self.system["hydrogen grid"]["draw"]:  #hydrogen can be drawn from a hydrogen grid
+        if self.h2_available_rule == 'grid':
             available_hyd = float('inf')
-        elif "H tank" in self.system:
-            tank_availability = self.technologies['H tank'].LOC[step] + self.technologies['H tank'].max_capacity - self.technologies['H tank'].used_capacity
-            available_hyd = tank_availability + hydrogen_produced
+        elif self.h2_available_rule == 'storage':
+            available_hyd = self.storage.available(step,'hydrogen') + hydrogen_produced
         else:
             available_hyd = hydrogen_produced
 
         ## Producible Hydrogen ##
         
-        if "hydrogen grid" in self.system and self.system["hydrogen grid"]["feed"]: # hydrogen can be fed into an hydrogen grid
+        if self.h2_producible_rule == 'grid':
             producible_hyd = float('inf')
-        elif 'hydrogen demand' not in self.system and 'H tank' in self.system: # hydrogen-energy-storage configuration, only renewable energy is stored in the form of hydrogen to be converted back into electricity via fuel cell 
-            producible_hyd  = self.technologies['H tank'].max_capacity-self.technologies['H tank'].LOC[step] # the tank can't be full
-            if producible_hyd < self.technologies['H tank'].max_capacity*0.00001: # to avoid unnecessary iteration
+        elif self.h2_producible_rule == 'storage':
+            producible_hyd  = self.storage.storable(step,'hydrogen') # the tanks can't be full
+            if producible_hyd < self.storage.capacity('hydrogen')*0.00001: # to avoid unnecessary iteration
                 producible_hyd = 0
-        elif 'H tank' in self.system and 'HPH tank' not in self.system and self.system[self.hydrogen_demand+' demand']['strategy'] == 'demand-led':   # hydrogen can only be stored into an H tank 
-            producible_hyd  = self.technologies['H tank'].max_capacity-self.technologies['H tank'].LOC[step] + (-pb['hydrogen'])*c.timestep*60 # the tank can't be full
-            if producible_hyd < self.technologies['H tank'].max_capacity*0.00001:                           # to avoid unnecessary iteration
+        elif self.h2_producible_rule == 'storage and demand':
+            producible_hyd  = self.storage.storable(step,'hydrogen') + (-pb['hydrogen'])*c.timestep*60 # the tanks can't be full
+            if producible_hyd < self.storage.capacity('hydrogen')*0.00001:                           # to avoid unnecessary iteration
                 producible_hyd = 0
-        elif 'H tank' in self.system and 'HPH tank' not in self.system and self.system[self.hydrogen_demand+' demand']['strategy'] == 'supply-led':   # hydrogen can only be stored into an H tank 
+        elif self.h2_producible_rule == 'unbounded':
             producible_hyd = float('inf')   # electrolyzer can produce continuously as the storage capacity is infinite. Tank is dimensioned at the end of simulation
-        elif 'H tank' in self.system and 'HPH tank' in self.system:
-            producible_hyd   = self.technologies['H tank'].max_capacity-self.technologies['H tank'].LOC[step] # the tank can't be full                        
+        elif self.h2_producible_rule == 'buffer':
+            producible_hyd   = self.storage.storable(step,'hydrogen') # the tanks can't be full                        
         else:
             producible_hyd = max(0,-pb['hydrogen']*c.timestep*60) # hydrogen is consumed by a technology with a higher priority than tank
             
@@ -380,7 +575,8 @@ class location:
         pb = {} # power balance [kW] [kg/s] [Sm^3/s]
         
         for carrier in self.power_balance:
-           pb[carrier] = 0 # initialise power balances 
+            if carrier != 'oxygen':     # oxygen is a by-product that never drives the dispatch: it is solved after the last step by oxygen_dispatch()
+                pb[carrier] = 0 # initialise power balances 
             
         for tech_name in self.system: # (which is ordered py priority)
             
@@ -437,6 +633,8 @@ class location:
                         self.consumption_logic('electricity', 'battery', step)
                         
             if tech_name == 'chp_gt':
+                if step == 0:
+                    self.technologies['chp_gt'].bounds_series(weather['temp_air'])   # operational boundaries depend only on weather: computed at once for the whole simulation
                 if available_hyd > 0:
                     use = self.technologies['chp_gt'].use(step,weather['temp_air'][step],pb['process steam'],available_hyd)     # saving chp_gt working parameters for the current timeframe
                     self.power_balance['process steam']['chp_gt'][step] = use[0]   # produced steam (+)
@@ -502,60 +700,42 @@ class location:
                     if pb['electricity'] > 0: # electrolyzer activated only when renewable energy is available
                         if producible_hyd > 0:
                         
+                            flows = self.technologies['electrolyzer'].series_step(step,producible_hyd) if self.electrolyzer_series else None     # working point computed for the whole simulation, None if storage binds
+                            if flows is None:
+                                flows = self.technologies['electrolyzer'].use(step,storable_hydrogen=producible_hyd,p=el_input,Text=weather['temp_air'][step])
                             self.power_balance['hydrogen']['electrolyzer'][step],   \
                             self.power_balance['electricity']['electrolyzer'][step],\
                             self.power_balance['oxygen']['electrolyzer'][step],     \
-                            self.power_balance['water']['electrolyzer'][step]        = self.technologies['electrolyzer'].use(step,storable_hydrogen=producible_hyd,p=el_input,Text=weather['temp_air'][step])      # [:2] # hydrogen supplied by electrolyzer(+) # electricity absorbed by the electorlyzer(-) 
+                            self.power_balance['water']['electrolyzer'][step]        = flows      # hydrogen supplied by electrolyzer(+) # electricity absorbed by the electorlyzer(-) 
                             
                             pb['hydrogen']      += self.power_balance['hydrogen']['electrolyzer'][step]
                             pb['electricity']   += self.power_balance['electricity']['electrolyzer'][step]
-                            pb['oxygen']        += self.power_balance['oxygen']['electrolyzer'][step]
                             pb['water']         += self.power_balance['water']['electrolyzer'][step]
                             
                 elif self.technologies['electrolyzer'].strategy == 'hydrogen-first' and self.technologies['electrolyzer'].only_renewables == False: # electrolyzer working both with energy from renewables and from grid, but giving precedence to electricity from renewables
 
-                    if producible_hyd > 0:
-                        self.power_balance['hydrogen']['electrolyzer'][step],   \
-                        self.power_balance['electricity']['electrolyzer'][step],\
-                        self.power_balance['oxygen']['electrolyzer'][step],     \
-                        self.power_balance['water']['electrolyzer'][step]        = self.technologies['electrolyzer'].use(step,storable_hydrogen=producible_hyd,p=el_input,Text=weather['temp_air'][step])      # hydrogen [kg/s] and oxygen [kg/s] produced by the electrolyzer (+) electricity [kW] and water absorbed [m^3/s] (-) 
-
-                    # evaluating need for grid interaction based on available hydrogen
-                    if (available_hyd/(c.timestep*60) + self.power_balance['hydrogen']['electrolyzer'][step]) < -pb['hydrogen']:    # if hydrogen produced from electrolyzer with only renewables and the tank is not sufficient to cover the hydrogen demand in this timestep --> need for grid interaction
-                        hyd_from_ele = (-pb['hydrogen']) - available_hyd/(c.timestep*60)                                            # [kg/s] the electrolyzer is required to produce the amount of hydrogen the tank can't cover (thus using also grid electricity) 
-                        self.power_balance['hydrogen']['electrolyzer'][step],   \
-                        self.power_balance['electricity']['electrolyzer'][step],\
-                        self.power_balance['oxygen']['electrolyzer'][step],     \
-                        self.power_balance['water']['electrolyzer'][step]        = self.technologies['electrolyzer'].use(step,hydrog=hyd_from_ele,Text=weather['temp_air'][step])      # hydrogen [kg/s] and oxygen [kg/s] produced by the electrolyzer (+) electricity [kW] and water absorbed [m^3/s] (-) 
-
-                        # Evaluating the need for grid interaction based on the minimum load of each module: If the electrolyzer operates below its minimum load, it won’t produce hydrogen, and the tank won’t meet the demand. Therefore, the electrolyzer must reach its minimum load, thus the tank won't be completely emptied.
-                        if self.power_balance['hydrogen']['electrolyzer'][step] == 0: # no hydrogen has been produced
-                            self.power_balance['hydrogen']['electrolyzer'][step],   \
-                            self.power_balance['electricity']['electrolyzer'][step],\
-                            self.power_balance['oxygen']['electrolyzer'][step],     \
-                            self.power_balance['water']['electrolyzer'][step]        = self.technologies['electrolyzer'].use(step,storable_hydrogen=producible_hyd,p=self.technologies['electrolyzer'].MinInputPower,Text=weather['temp_air'][step])      # hydrogen [kg/s] and oxygen [kg/s] produced by the electrolyzer (+) electricity [kW] and water absorbed [m^3/s] (-)                                                                                                                                                                                                                                                                                                                                                       
-                    # evaluating need for grid interaction based on imposed constant minimum operational load. Lower functoning boundary
-                    if self.system['electrolyzer']['minimum_load'] and abs(self.power_balance['electricity']['electrolyzer'][step]) < self.technologies['electrolyzer'].min_partial_load:
-                        self.power_balance['hydrogen']['electrolyzer'][step],   \
-                        self.power_balance['electricity']['electrolyzer'][step],\
-                        self.power_balance['oxygen']['electrolyzer'][step],     \
-                        self.power_balance['water']['electrolyzer'][step]        = self.technologies['electrolyzer'].use(step,storable_hydrogen=producible_hyd,p=self.technologies['electrolyzer'].min_partial_load,Text=weather['temp_air'][step])      # [:2] # hydrogen supplied by electrolyzer(+) # electricity absorbed by the electorlyzer(-) 
+                    hyd_from_ele = (-pb['hydrogen']) - available_hyd/(c.timestep*60)    # [kg/s] hydrogen the tank can't cover, to be produced by the electrolyzer also using grid electricity 
+                    self.power_balance['hydrogen']['electrolyzer'][step],   \
+                    self.power_balance['electricity']['electrolyzer'][step],\
+                    self.power_balance['oxygen']['electrolyzer'][step],     \
+                    self.power_balance['water']['electrolyzer'][step]        = self.technologies['electrolyzer'].dispatch(step,el_input,hyd_from_ele,producible_hyd,Text=weather['temp_air'][step],min_load=self.system['electrolyzer']['minimum_load'])      # hydrogen [kg/s] and oxygen [kg/s] produced by the electrolyzer (+) electricity [kW] and water absorbed [m^3/s] (-) 
 
                     pb['hydrogen']      += self.power_balance['hydrogen']['electrolyzer'][step]
                     pb['electricity']   += self.power_balance['electricity']['electrolyzer'][step]
-                    pb['oxygen']        += self.power_balance['oxygen']['electrolyzer'][step]
                     pb['water']         += self.power_balance['water']['electrolyzer'][step]
                 
                 elif self.technologies['electrolyzer'].strategy == 'full-time': # electrolyzer working continuously at each time step of the simulation
                                                                                                                                                                        
+                    flows = self.technologies['electrolyzer'].series_step(step,producible_hyd) if self.electrolyzer_series else None     # working point computed for the whole simulation, None if storage binds
+                    if flows is None:
+                        flows = self.technologies['electrolyzer'].use(step,storable_hydrogen=producible_hyd,Text=weather['temp_air'][step])
                     self.power_balance['hydrogen']['electrolyzer'][step],     \
                     self.power_balance['electricity']['electrolyzer'][step],  \
                     self.power_balance['oxygen']['electrolyzer'][step],       \
-                    self.power_balance['water']['electrolyzer'][step]         = self.technologies['electrolyzer'].use(step,storable_hydrogen=producible_hyd,Text=weather['temp_air'][step])      # [:2] # hydrogen supplied by electrolyzer(+) # electricity absorbed by the electorlyzer(-) 
+                    self.power_balance['water']['electrolyzer'][step]         = flows      # hydrogen supplied by electrolyzer(+) # electricity absorbed by the electorlyzer(-) 
                 
                     pb['hydrogen']      += self.power_balance['hydrogen']['electrolyzer'][step]
                     pb['electricity']   += self.power_balance['electricity']['electrolyzer'][step]
-                    pb['oxygen']        += self.power_balance['oxygen']['electrolyzer'][step]
                     pb['water']         += self.power_balance['water']['electrolyzer'][step]
                         
                 if 'mechanical compressor' in self.system:
@@ -564,7 +744,6 @@ class location:
                     self.consumption_logic('electricity', 'electrolyzer', step)
                     self.consumption_logic('water', 'electrolyzer', step)
                     self.production_logic('hydrogen', 'electrolyzer', step) 
-                    self.production_logic('oxygen', 'electrolyzer', step)                                                                      
    
                 if step == (c.timestep_number - 1) and ('hydrogen demand' in self.system or 'HP hydrogen demand' in self.system):
                     if self.system[self.hydrogen_demand+' demand']['strategy'] == 'supply-led':  # activates only at the final step of simulation
@@ -573,14 +752,14 @@ class location:
             if tech_name == 'mhhc compressor':   #!!! WIP to be modified by Andrea
                 if self.power_balance['hydrogen']['electrolyzer'][step] > 0:
                     storable_hydrogen = producible_hyd                
-                    if storable_hydrogen>self.technologies['H tank'].max_capacity*0.00001:
+                    if storable_hydrogen>self.storage.capacity('hydrogen')*0.00001:
                         self.power_balance['hydrogen']['mhhc compressor'][step], self.power_balance['gas']['mhhc compressor'][step] = self.technologies['mhhc compressor'].use(step,self.power_balance['hydrogen']['electrolyzer'][step],storable_hydrogen) # hydrogen compressed by the compressor (+) and heat requested to make it work expressed as heating water need (-) 
                         pb['gas'] += self.power_balance['gas']['mhhc compressor'][step]
                         #pb['hydrogen']=...self.power_balance['hydrogen']['mhhc compressor'][step]?? come ne tengo conto di quanto comprimo? in linea teorica ne dovrei sempre comprimere esattamente quanto me ne entra perchè il controllo sullo sotrable hydrogen lho gia fatto nell'elettrolizzatore'
             
                         self.consumption_logic('gas', 'mhhc compressor', step)                                                                              
             if tech_name == 'mechanical compressor':   
-                if 'HPH tank' not in self.system:
+                if not self.storage.has('HP hydrogen'):
                     if 'O2 tank' not in self.system:
                         if "electricity grid" in self.system and self.system["electricity grid"]["draw"] and self.technologies['mechanical compressor'].only_renewables == False:
                             if 'hydrogen demand' in self.system:
@@ -594,7 +773,6 @@ class location:
                             self.consumption_logic('electricity', 'electrolyzer', step)
                             self.consumption_logic('water', 'electrolyzer', step)
                             self.production_logic('hydrogen', 'electrolyzer', step) 
-                            self.production_logic('oxygen', 'electrolyzer', step)
                             
                             self.consumption_logic('electricity', 'mechanical compressor', step)                                                                                             
 
@@ -617,7 +795,6 @@ class location:
                                     self.consumption_logic('electricity', 'electrolyzer', step)
                                     self.consumption_logic('water', 'electrolyzer', step)
                                     self.production_logic('hydrogen', 'electrolyzer', step) 
-                                    self.production_logic('oxygen', 'electrolyzer', step)
                                     self.consumption_logic('electricity', 'mechanical compressor', step)                                                                                                     
                                 elif abs(a) >pb['electricity']:    # if available electricity in the system is not enough to power the compression system - enter the loop to reallocate the energy among the components
                                     a1  = 1     # % of available electricity fed to the electrolyzer
@@ -625,7 +802,6 @@ class location:
                                     en  =pb['electricity'] + abs(self.power_balance['electricity']['electrolyzer'][step]) # [kW] electric energy available at time h before entering the electorlyzer
                                     el  = self.power_balance['electricity']['electrolyzer'][step]
                                     hy  = self.power_balance['hydrogen']['electrolyzer'][step]
-                                    ox  = self.power_balance['oxygen']['electrolyzer'][step]
                                     wa  = self.power_balance['water']['electrolyzer'][step]
                                     
                                     # Iteration parameters
@@ -655,13 +831,11 @@ class location:
                                     
                                     pb['hydrogen']      += self.power_balance['hydrogen']['electrolyzer'][step]    - hy
                                     pb['electricity']   += self.power_balance['electricity']['electrolyzer'][step] - el
-                                    pb['oxygen']        += self.power_balance['oxygen']['electrolyzer'][step]      - ox
                                     pb['water']         += self.power_balance['water']['electrolyzer'][step]       + wa
     
                                     self.consumption_logic('electricity', 'electrolyzer', step)
                                     self.consumption_logic('water', 'electrolyzer', step)
                                     self.production_logic('hydrogen', 'electrolyzer', step) 
-                                    self.production_logic('oxygen', 'electrolyzer', step)                                                                                     
                                     # Compressor balances update and overwriting
                                     self.power_balance['hydrogen']['mechanical compressor'][step],    \
                                     self.power_balance['electricity']['mechanical compressor'][step], \
@@ -683,7 +857,6 @@ class location:
                             self.consumption_logic('electricity', 'electrolyzer', step)
                             self.consumption_logic('water', 'electrolyzer', step)
                             self.production_logic('hydrogen', 'electrolyzer', step) 
-                            self.production_logic('oxygen', 'electrolyzer', step)
                             self.consumption_logic('electricity', 'mechanical compressor', step)                                                                           
                     
                         elif "electricity grid" not in self.system or self.system["electricity grid"]["draw"] == False:   # if the system is configurated as fully off-grid, relying only on RES production
@@ -698,7 +871,6 @@ class location:
                                     self.consumption_logic('electricity', 'electrolyzer', step)
                                     self.consumption_logic('water', 'electrolyzer', step)
                                     self.production_logic('hydrogen', 'electrolyzer', step) 
-                                    self.production_logic('oxygen', 'electrolyzer', step)
                                     self.consumption_logic('electricity', 'mechanical compressor', step)                                                                 
                                     
                                 elif abs(a) >pb['electricity']:    # if available electricity in the system is not enough to power the compression system - enter the loop to reallocate the energy among the components
@@ -707,7 +879,6 @@ class location:
                                     en  =pb['electricity'] + abs(self.power_balance['electricity']['electrolyzer'][step]) # [kW] electric energy available at time h before entering the electorlyzer
                                     el  = self.power_balance['electricity']['electrolyzer'][step]
                                     hy  = self.power_balance['hydrogen']['electrolyzer'][step]
-                                    ox  = self.power_balance['oxygen']['electrolyzer'][step]
                                     wa  = self.power_balance['water']['electrolyzer'][step]
                                     
                                     # Iteration parameters
@@ -736,13 +907,11 @@ class location:
                                     
                                     pb['hydrogen']      += self.power_balance['hydrogen']['electrolyzer'][step]    - hy
                                     pb['electricity']   += self.power_balance['electricity']['electrolyzer'][step] - el
-                                    pb['oxygen']        += self.power_balance['oxygen']['electrolyzer'][step]      - ox
                                     pb['water']         += self.power_balance['water']['electrolyzer'][step]       + wa
     
                                     self.consumption_logic('electricity', 'electrolyzer', step)
                                     self.consumption_logic('water', 'electrolyzer', step)
                                     self.production_logic('hydrogen', 'electrolyzer', step) 
-                                    self.production_logic('oxygen', 'electrolyzer', step)                                                   
                                     # Compressor balances update and overwriting
                                     self.power_balance['hydrogen']['mechanical compressor'][step],    \
                                     self.power_balance['electricity']['mechanical compressor'][step], \
@@ -757,13 +926,13 @@ class location:
                         
                              
                 
-                if 'H tank' in self.system and 'HPH tank' in self.system:
+                if self.storage.has('hydrogen') and self.storage.has('HP hydrogen'):
                     # self.power_balance['hydrogen']['H tank'][step] = self.technologies['H tank'].use(h,pb['hydrogen'])
                     #pb['hydrogen'] += self.power_balance['hydrogen']['H tank'][step]
-                    available_hyd_lp = self.technologies['H tank'].LOC[step] + self.technologies['H tank'].max_capacity - self.technologies['H tank'].used_capacity
-                    storable_hydrogen_hp = self.technologies['HPH tank'].max_capacity-self.technologies['HPH tank'].LOC[step]
+                    available_hyd_lp = self.storage.available(step,'hydrogen')
+                    storable_hydrogen_hp = self.storage.storable(step,'HP hydrogen')
                     
-                    if self.technologies['HPH tank'].LOC[step] == self.technologies['HPH tank'].max_capacity:  # if High-Pressure-Tank is full 
+                    if storable_hydrogen_hp == 0:  # if High-Pressure-Tanks are full 
                         self.power_balance['HP hydrogen']['mechanical compressor'][step]      = 0     
                         self.power_balance['electricity']['mechanical compressor'][step]      = 0    
                         self.power_balance['cooling water']['mechanical compressor'][step]    = 0
@@ -775,7 +944,6 @@ class location:
                         self.consumption_logic('electricity', 'electrolyzer', step)
                         self.consumption_logic('water', 'electrolyzer', step)
                         self.production_logic('hydrogen', 'electrolyzer', step) 
-                        self.production_logic('oxygen', 'electrolyzer', step)                                                               
                     else:  # if there is enough room available in the High Pressure Tank, the compressor is activated
                         self.power_balance['HP hydrogen']['mechanical compressor'][step],     \
                         self.power_balance['electricity']['mechanical compressor'][step],     \
@@ -788,7 +956,6 @@ class location:
                         self.consumption_logic('electricity', 'electrolyzer', step)
                         self.consumption_logic('water', 'electrolyzer', step)
                         self.production_logic('hydrogen', 'electrolyzer', step) 
-                        self.production_logic('oxygen', 'electrolyzer', step)
                         
                         self.consumption_logic('hydrogen', 'mechanical compressor', step)
                         self.consumption_logic('electricity', 'mechanical compressor', step)
@@ -798,7 +965,9 @@ class location:
                 if pb['electricity'] < 0: #? this condition must be solved if you want to produce electricity to be fed into the gird
                     available_hyd = available_hyd - (-pb['hydrogen'])*c.timestep*60
                     if available_hyd > 0:
-                        use = self.technologies['fuel cell'].use(step,pb['electricity'],available_hyd)     # saving fuel cell working parameters for the current timeframe
+                        use = self.technologies['fuel cell'].series_step(step,pb['electricity'],available_hyd) if self.fuel_cell_series else None     # working point computed for the whole simulation, None if available hydrogen binds
+                        if use is None:
+                            use = self.technologies['fuel cell'].use(step,pb['electricity'],available_hyd)     # saving fuel cell working parameters for the current timeframe
                         self.power_balance['hydrogen']['fuel cell'][step] =    use[0] # hydrogen absorbed by fuel cell(-)
                         self.power_balance['electricity']['fuel cell'][step] = use[1] # electricity supplied(+) 
         
@@ -834,45 +1003,24 @@ class location:
             #     else:
             #         pass
         
-            if tech_name == 'H tank':
-                if 'HPH tank' not in self.system and ('hydrogen demand' in self.system or 'HP hydrogen demand' in self.system):
-                    if self.system[self.hydrogen_demand+' demand']['strategy'] == 'demand-led':
-                        self.power_balance['hydrogen']['H tank'][step] = self.technologies['H tank'].use(step,pb['hydrogen'])
-                        pb['hydrogen'] += self.power_balance['hydrogen']['H tank'][step]
-                    elif self.system[self.hydrogen_demand+' demand']['strategy'] == 'supply-led' and step == (c.timestep_number - 1):
+            if tech_name in self.tank_dispatch:        # charge/discharge of all the tanks storing the carrier, by increasing pressure level
+                carrier = self.tank_dispatch[tech_name]
+                tanks   = self.storage.level(carrier)
+                if carrier == 'hydrogen' and self.tank_sizing:
+                    if step == (c.timestep_number - 1):     # activates only at the final step of simulation
                         prod = self.power_balance['hydrogen']['electrolyzer']
-                        for step in range(c.timestep_number):
-                            self.power_balance['hydrogen']['H tank'][step] = self.technologies['H tank'].use(step,prod[step],constant_demand=self.constant_flow )                        
-                    # else:
-                        # pass
+                        for h in range(c.timestep_number):
+                            self.power_balance['hydrogen'][tanks[0]][h] = self.technologies[tanks[0]].use(h,prod[h],constant_demand=self.constant_flow)
+                        self.storage.update_capacity()  # H tank has been sized at the end of the simulation
                 else:
-                    self.power_balance['hydrogen']['H tank'][step] = self.technologies['H tank'].use(step,pb['hydrogen'])
-                    pb['hydrogen'] += self.power_balance['hydrogen']['H tank'][step]
-                if self.power_balance['hydrogen']['H tank'][step] >= 0:
-                    self.production_logic('hydrogen', 'H tank', step)
-                elif self.power_balance['hydrogen']['H tank'][step] <= 0:
-                    self.consumption_logic('hydrogen', 'H tank', step)                                                              
-            
-            if tech_name == 'HPH tank':
-                self.power_balance['HP hydrogen']['HPH tank'][step] = self.technologies['HPH tank'].use(step,pb['HP hydrogen'])
-                pb['HP hydrogen'] += self.power_balance['HP hydrogen']['HPH tank'][step]
-                
-                if self.power_balance['hydrogen']['HPH tank'][step] >= 0:
-                    self.production_logic('hydrogen', 'HPH tank', step)
-                elif self.power_balance['hydrogen']['HPH tank'][step] <= 0:
-                    self.consumption_logic('hydrogen', 'HPH tank', step)                                                          
-            if tech_name == 'O2 tank':
-                if 'oxygen demand' in self.system and self.system['oxygen demand']['strategy'] != 'supply-led':
-                    self.power_balance['oxygen']['O2 tank'][step] = self.technologies['O2 tank'].use(step,pb['oxygen'])
-                    pb['oxygen'] += self.power_balance['oxygen']['O2 tank'][step]
-                elif self.system['hydrogen demand']['strategy'] == 'supply-led' and step == (c.timestep_number - 1):
-                    self.technologies['O2 tank'].sizing(self.technologies['H tank'].max_capacity)
-                else:
-                    pass
-                if self.power_balance['oxygen']['O2 tank'][step] >= 0:
-                    self.production_logic('oxygen', 'O2 tank', step)
-                elif self.power_balance['oxygen']['O2 tank'][step] <= 0:
-                    self.consumption_logic('oxygen', 'O2 tank', step)                                                       
+                    for tank in tanks:
+                        self.power_balance[carrier][tank][step] = self.technologies[tank].use(step,pb[carrier])
+                        pb[carrier] += self.power_balance[carrier][tank][step]
+                for tank in tanks:
+                    if self.power_balance[carrier][tank][step] >= 0:
+                        self.production_logic(carrier, tank, step)
+                    elif self.power_balance[carrier][tank][step] <= 0:
+                        self.consumption_logic(carrier, tank, step)
             
             if tech_name == 'inverter':
                 self.power_balance['electricity']['inverter'][step] = self.technologies['inverter'].use(step,pb['electricity']) # electricity lost in conversion by the inverter
@@ -918,6 +1066,9 @@ class location:
                         (a) - Include {carrier} grid[\'draw\']: true if negative or {carrier} grid[\'feed\']: true if positive in studycase.json \n\
                         (b) - Vary components size or demand series in studycase.json')
 
+        if step == (c.timestep_number - 1) and self.power_balance['oxygen']:
+            self.oxygen_dispatch()
+
 #%%
         #### Cleaning of production and consumption dictionaries at the last timestep
         if step == (c.timestep_number - 1):
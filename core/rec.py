@@ -86,22 +86,22 @@ class REC:
         for location_name in structure: # location_name are the keys of 'structure' dictionary and will be used as keys of REC 'locations' dictionary too
             self.locations[location_name] = location.location(structure[location_name],location_name,path,check_pv,file_structure,file_general) # create location object and add it to REC 'locations' dictionary                     
 
-    def REC_power_simulation(self):
+    def REC_power_simulation(self,start=0,stop=None):
         """
         Simulate the REC every hour
         
+        start : int first step to be simulated. To restart from a state restored with .set_state(state) use start = state['step']
+        stop : int step at which the simulation is stopped, the whole simulation length if None. Useful to take a snapshot with .get_state(stop)
+        
         output :
             updating location power balances
             updating REC power balances
         """
-        ### initialise REC electricity balances
-        self.power_balance['electricity']['from electricity grid'] = np.zeros(c.timestep_number) # array of electricity withdrawn from the grid from the whole rec
-        self.power_balance['electricity']['into electricity grid'] = np.zeros(c.timestep_number) # array of electricity withdrawn from the grid
-        self.power_balance['electricity']['collective self consumption'] = np.zeros(c.timestep_number) # array of collective self consumed electricity from the whole rec
-        self.count = []
+        if start == 0:
+            self.initialise_balances()
         
         ### simulation core
-        for step in range(c.timestep_number): # step to simulate
+        for step in range(start,c.timestep_number if stop is None else stop): # step to simulate
             for location_name in self.locations: # each locations 
                 self.locations[location_name].loc_power_simulation(step,self.weather) # simulate a single location updating its power balances
                 
@@ -146,6 +146,52 @@ class REC:
                         self.power_balance['electricity']['from electricity grid'][step] += - self.locations[location_name].power_balance['electricity']['battery'][step] # update grid balance (rec)
                 
 
+    def initialise_balances(self):
+        """
+        initialise REC electricity balances
+        """
+        self.power_balance['electricity']['from electricity grid'] = np.zeros(c.timestep_number) # array of electricity withdrawn from the grid from the whole rec
+        self.power_balance['electricity']['into electricity grid'] = np.zeros(c.timestep_number) # array of electricity withdrawn from the grid
+        self.power_balance['electricity']['collective self consumption'] = np.zeros(c.timestep_number) # array of collective self consumed electricity from the whole rec
+        self.count = []
+    
+    def get_state(self,step):
+        """
+        Snapshot of the REC at the beginning of step
+        
+        The snapshot can be saved with pickle and restored with .set_state(state) in a newly created REC object with modified parameters
+        (es. a bigger H tank or battery), so that what-if scenarios are simulated from step onwards with .REC_power_simulation(start=step)
+        reusing the shared prefix instead of re-simulating it. Storage technologies (battery, H tank, HPH tank, O2 tank, heatpump inertial TES)
+        continue from their saved state, the other technologies restart from their initial state (es. electrolyzer and fuel cell ageing).
+        
+        step : int step at which the simulation will be restarted
+        
+        output : dict picklable REC state
+        """
+        return({'step'              : step,
+                'timestep_number'   : c.timestep_number,
+                'power_balance'     : {carrier: {key: value[:step].copy() for key,value in self.power_balance[carrier].items()} for carrier in self.power_balance},
+                'locations'         : {location_name: self.locations[location_name].get_state(step) for location_name in self.locations}})
+    
+    def set_state(self,state):
+        """
+        Restore a REC snapshot saved with .get_state(step), then continue with .REC_power_simulation(start=state['step'])
+        
+        state : dict REC state
+        """
+        if state['timestep_number'] != c.timestep_number:
+            raise ValueError(f"Warning! The REC state has been saved for a simulation of {state['timestep_number']} timesteps, while the current one has {c.timestep_number}.\n\
+            Options to fix the problem: \n\
+                (a) - Use the same 'simulation years' and 'timestep' in general.json")
+        
+        self.initialise_balances()
+        for carrier in state['power_balance']:
+            for key in state['power_balance'][carrier]:
+                self.power_balance[carrier][key][:state['step']] = state['power_balance'][carrier][key]
+        for location_name in state['locations']:
+            if location_name in self.locations:
+                self.locations[location_name].set_state(state['locations'][location_name])
+
     def save(self,simulation_name,f,sep=';',dec=','):
         """
         Save REC and each location power balances
@@ -186,8 +232,7 @@ class REC:
                 if self.locations[location_name].technologies[tech_name].ageing:
                     ageing[location_name][tech_name] = [self.locations[location_name].technologies[tech_name].replacements,self.locations[location_name].technologies[tech_name].ageing_history]
                 
-            tech_name = 'H tank'
-            if tech_name in self.locations[location_name].technologies:
+            for tech_name in self.locations[location_name].storage.names:     # hydrogen tanks
                 LOC[location_name][tech_name] = self.locations[location_name].technologies[tech_name].LOC
                 
             tech_name = 'heatpump'
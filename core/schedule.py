@@ -0,0 +1,155 @@
+import numpy as np
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding core module path
+from core import constants as c
+
+DAYS_YEAR       = 365                                                       # [day/year] reference year without 29-02, as the 1900 calendar used by the operational periods
+MONTH_DAYS      = np.array([31,28,31,30,31,30,31,31,30,31,30,31])           # [day] days in each month of the reference year
+MONTH_START     = np.concatenate(([0],np.cumsum(MONTH_DAYS)[:-1]))          # [day] day of the year of the first day of each month, 0 = 01-01
+
+def day_of_year(date):
+    """
+    Day of the reference year of a 'dd-mm' date
+
+    date : str 'dd-mm', es. '15-04'
+
+    output : int day of the year, 0 = 01-01 and 364 = 31-12
+    """
+    try:
+        day,month = (int(x) for x in date.strip().split('-'))
+        valid = 1 <= month <= 12 and 1 <= day <= MONTH_DAYS[month-1]
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"Warning: '{date}' is not a valid day of the operational period.\n\
+        Options to fix the problem: \n\
+            (a) - write the day as 'dd-mm', es. '15-04' \n\
+            (b) - use a day of a non-leap year (29-02 is not available)")
+    return(int(MONTH_START[month-1])+day-1)
+
+def parse_periods(periods):
+    """
+    Parse one or more operational periods
+
+    periods : str 'dd-mm,dd-mm' first and last day of the period (both included), es. '01-01,31-12'
+              or list of such strings for multiple seasonal windows, es. ['01-01,31-03','01-10,31-12']
+
+    output : list of tuples (first day, last day) days of the year, a window with first day > last day goes across the new year
+    """
+    if isinstance(periods,str):
+        periods = [periods]
+    windows = []
+    for period in periods:
+        days = period.split(',')
+        if len(days) != 2:
+            raise ValueError(f"Warning: '{period}' is not a valid operational period.\n\
+            Options to fix the problem: \n\
+                (a) - write the period as 'dd-mm,dd-mm' (first and last day), es. '01-01,31-12' \n\
+                (b) - pass a list of such strings for more than one window")
+        windows.append((day_of_year(days[0]),day_of_year(days[1])))
+    return(windows)
+
+def day_mask(windows):
+    """
+    Days of the reference year falling in the operational windows
+
+    windows : list of tuples (first day, last day) as returned by parse_periods
+
+    output : np.ndarray bool (365,) True for the days inside at least one window
+    """
+    day     = np.arange(DAYS_YEAR)
+    mask    = np.zeros(DAYS_YEAR,dtype=bool)
+    for first,last in windows:
+        if first <= last:
+            mask |= (day >= first) & (day <= last)
+        else:                                                               # window across the new year, es. '01-11,31-03'
+            mask |= (day >= first) | (day <= last)
+    return(mask)
+
+def operational_mask(periods,timestep,state='on',weekdays=None,hours=None,years=1,first_weekday=0):
+    """
+    On/off state of a technology at each simulation step, built from day-of-year windows with NumPy
+
+    The step state is the state of the day (and hour) in which the step starts. The reference year has 365 days and
+    starts on Monday, as 1900 (the year assumed parsing 'dd-mm' dates).
+
+    periods : str or list of str operational periods 'dd-mm,dd-mm', see parse_periods
+    timestep : int [min] simulation timestep
+    state : str 'on' the technology works inside the schedule, 'off' the technology is turned off inside the schedule and works outside
+    weekdays : None or iterable of int days of the week of the schedule, 0 = Monday ... 6 = Sunday. Default every day
+    hours : None or iterable of tuples (start hour, end hour) daily time windows of the schedule, start included and end excluded,
+            es. [(8,20)] or [(22,6)] across midnight. Default the whole day
+    years : int number of simulation years, the yearly mask is repeated
+    first_weekday : int day of the week of 01-01, 0 = Monday
+
+    output : np.ndarray int (years*steps per year,) 1 if the technology is on at the step, 0 otherwise
+    """
+    if state not in ['on','off']:
+        raise ValueError(f"Warning: '{state}' is not a valid operational state.\n\
+        Options to fix the problem: \n\
+            (a) - set 'state' to 'on' to turn the technology on in the operational period \n\
+            (b) - set 'state' to 'off' to turn the technology off in the operational period")
+
+    minute  = np.arange(c.MINUTES_YEAR//timestep)*timestep                  # [min] start of each step of the year
+    day     = minute//c.MINUTES_DAY                                         # [-] day of the year of each step
+    mask    = day_mask(parse_periods(periods))[day]
+
+    if weekdays is not None:
+        week = np.zeros(7,dtype=bool)
+        week[list(weekdays)] = True
+        mask &= week[(day+first_weekday)%7]
+
+    if hours is not None:
+        hour    = (minute%c.MINUTES_DAY)/c.MINUTES_HOUR                     # [h] time of the day of each step
+        daily   = np.zeros(len(minute),dtype=bool)
+        for start,end in hours:
+            if start <= end:
+                daily |= (hour >= start) & (hour < end)
+            else:                                                           # window across midnight
+                daily |= (hour >= start) | (hour < end)
+        mask &= daily
+
+    if state == 'off':
+        mask = ~mask
+    return(np.tile(mask.astype(int),int(years)))
+
+
+###########################################################################################################################################################
+
+if __name__ == "__main__":
+
+    """
+    Functional test and benchmark against the pandas resample of the operational period
+    Run from the core folder (python schedule.py) or from the main folder (python -m core.schedule)
+    """
+
+    import time
+    import pandas as pd
+
+    def pandas_mask(period,timestep,state,years):
+        initial_day, final_day = period.split(',')
+        initial_day = pd.to_datetime(initial_day, format = '%d-%m')
+        final_day = pd.to_datetime(final_day, format = '%d-%m')
+        year = initial_day.year
+        operational_state = []
+        for day in pd.date_range(start = pd.Timestamp(year=year,month=1,day=1), end = pd.Timestamp(year=year+1,month=1, day=1)):
+            inside = day >= initial_day and day <= final_day
+            operational_state.append((day, int(inside) if state == 'on' else int(not inside)))
+        operational_state = pd.DataFrame(operational_state, columns=['Day', 'State'])
+        operational_state.set_index('Day', inplace=True)
+        operational_state_freq = operational_state.resample(f'{timestep}min').ffill().iloc[:-1,:]
+        return(np.tile(np.array(operational_state_freq['State']),years))
+
+    for period,timestep,state in [('01-01,31-12',60,'on'),('15-04,15-10',60,'off'),('01-03,30-11',15,'on'),('28-02,01-03',45,'on')]:
+        start   = time.perf_counter()
+        old     = pandas_mask(period,timestep,state,2)
+        t_old   = time.perf_counter()-start
+        start   = time.perf_counter()
+        new     = operational_mask(period,timestep,state,years=2)
+        t_new   = time.perf_counter()-start
+        print(f"{period} {timestep} min '{state}': equal {np.array_equal(old,new)}, pandas {t_old*1e3:.1f} ms, numpy {t_new*1e6:.0f} µs")
+
+    # winter and summer windows, working days from 8 to 20
+    mask = operational_mask(['01-01,31-03','01-10,31-12'],60,weekdays=range(5),hours=[(8,20)])
+    print(f"working hours in the heating season: {mask.sum()} h")
@@ -0,0 +1,283 @@
+import numpy as np
+
+class storage_network:
+
+    def __init__(self,timestep_number):
+        """
+        Create a storage network object collecting the storage tanks of a location
+
+        Tanks are indexed by stored carrier and pressure level, so that a location can host several
+        LP/MP/HP banks. Their Level Of Charge arrays are rows of a single (tanks x timesteps) matrix
+        and each tank keeps a view on its own row: availability and storable amounts are then computed
+        for all the tanks of a carrier with array operations instead of per-tank branching.
+
+        timestep_number : int number of timesteps of the simulation
+
+        output : storage network object able to:
+            register tanks and their carrier/pressure level .add(name,tank,carrier)
+            compute the stored amount that can be supplied .available(step,carrier)
+            compute the amount that can still be stored .storable(step,carrier)
+        """
+
+        self.timestep_number    = timestep_number
+        self.names              = []                                # [-] tank names, in the order they have been added
+        self.tanks              = []                                # [-] tank objects
+        self.carriers           = []                                # [-] carrier stored in each tank
+        self.stream             = {}                                # [-] dictionary assigning each tank to its stored carrier (former location.tank_stream)
+        self.pressure           = np.zeros(0)                       # [bar] storage pressure of each tank
+        self.max_capacity       = np.zeros(0)                       # [kg] max capacity of each tank (0 if it is sized at the end of the simulation)
+        self.LOC                = np.zeros((0,timestep_number+1))   # [kg] Level Of Charge matrix, one row for each tank
+        self.mask               = {}                                # [-] boolean mask selecting the tanks of each carrier
+
+    def add(self,name,tank,carrier):
+        """
+        Register a tank in the network
+
+        name : str tank name as defined in studycase.json (es. 'H tank', 'HPH tank')
+        tank : tank object exposing .LOC .max_capacity .used_capacity .pressure
+        carrier : str carrier stored in the tank (es. 'hydrogen', 'HP hydrogen')
+        """
+
+        self.names.append(name)
+        self.tanks.append(tank)
+        self.carriers.append(carrier)
+        self.stream[name]   = carrier
+        self.pressure       = np.append(self.pressure,tank.pressure)
+        self.max_capacity   = np.append(self.max_capacity,float(tank.max_capacity))     # max capacity False (sizing at the end of the simulation) is stored as 0
+
+        self.LOC = np.vstack([self.LOC,tank.LOC])       # copying the tank LOC in the network matrix
+        for i,t in enumerate(self.tanks):               # each tank keeps working on its own row of the network matrix
+            t.LOC = self.LOC[i]
+
+        carriers = np.array(self.carriers)
+        self.mask = {car: carriers == car for car in self.stream.values()}
+
+    def has(self,carrier):
+        """
+        carrier : str
+
+        output : bool True if at least one tank storing carrier is present
+        """
+        return(carrier in self.mask)
+
+    def select(self,carrier,min_pressure=0):
+        """
+        carrier : str
+        min_pressure : float [bar] only tanks stored at a pressure higher or equal than min_pressure are selected
+
+        output : boolean mask of the selected tanks
+        """
+        if carrier not in self.mask:
+            return(np.zeros(len(self.names),dtype=bool))
+        return(self.mask[carrier] & (self.pressure >= min_pressure))
+
+    def level(self,carrier):
+        """
+        carrier : str
+
+        output : list of tank names storing carrier ordered by increasing pressure level
+        """
+        idx = np.flatnonzero(self.select(carrier))
+        idx = idx[np.argsort(self.pressure[idx],kind='stable')]
+        return([self.names[i] for i in idx])
+
+    def used_capacity(self):
+        """
+        output : array [kg] used capacity of each tank (maximum level reached up to the current step, see H_tank.use)
+        """
+        return(np.fromiter((t.used_capacity for t in self.tanks),dtype=float,count=len(self.tanks)))
+
+    def available(self,step,carrier,min_pressure=0):
+        """
+        Amount of carrier that can be supplied by the tanks at the considered step
+
+        step : int step to be simulated
+        carrier : str
+        min_pressure : float [bar] only tanks at a pressure higher or equal than min_pressure can supply
+
+        output : float [kg] LOC + max_capacity - used_capacity summed over the selected tanks
+        """
+        sel = self.select(carrier,min_pressure)
+        return(float(np.sum(self.LOC[sel,step] + self.max_capacity[sel] - self.used_capacity()[sel])))
+
+    def storable(self,step,carrier,min_pressure=0):
+        """
+        Amount of carrier that can still be stored in the tanks at the considered step
+
+        step : int step to be simulated
+        carrier : str
+        min_pressure : float [bar] only tanks at a pressure higher or equal than min_pressure are considered
+
+        output : float [kg] max_capacity - LOC summed over the selected tanks
+        """
+        sel = self.select(carrier,min_pressure)
+        return(float(np.sum(self.max_capacity[sel] - self.LOC[sel,step])))
+
+    def capacity(self,carrier,min_pressure=0):
+        """
+        carrier : str
+        min_pressure : float [bar]
+
+        output : float [kg] total max capacity of the selected tanks
+        """
+        return(float(np.sum(self.max_capacity[self.select(carrier,min_pressure)])))
+
+    def update_capacity(self):
+        """
+        Update the max capacity array after a tank has been resized (es. supply-led sizing at the end of the simulation)
+        """
+        self.max_capacity = np.array([float(t.max_capacity) for t in self.tanks])
+
+
+def capacity_sweep(net,capacities,P2E,demand=None,etaC=1,etaD=1,max_charge=np.inf,max_discharge=np.inf,DoD=0,self_discharge=0,unit='kWh'):
+    """
+    Simulate a storage technology for K candidate capacities at once, in a single pass over the net series
+
+    The same rule-based dispatch of battery.use and H_tank.use (charge with surplus, discharge to cover deficit,
+    level of charge allowed to be back-calculated until the whole capacity has been used) is applied to a vector of
+    K levels of charge, so that sizing does not need a REC_power_simulation for each candidate size.
+
+    net : array net production (+) or demand (-) at the storage priority in each timestep [kW] or [kg/s] (see location.net_series)
+    capacities : array K candidate capacities [kJ] or [kg]
+    P2E : float conversion factor from power to energy in a timestep (c.P2E)
+    demand : array total demand in each timestep, used for self-sufficiency [kW] or [kg/s]. If None the deficit of net is used
+    etaC, etaD : float charging and discharging efficiencies
+    max_charge : float max charging power [kW] or [kg/s]
+    max_discharge : float or array of K values max discharging power [kW] or [kg/s]. battery.use limits discharge per capacity
+                    (max_capacity*MpowerD, see battery.update_bounds): it is reproduced with max_discharge=capacities*MpowerD
+    DoD : float depth of discharge, minimum level of charge as a fraction of capacity
+    self_discharge : float fraction of the level of charge lost in each timestep
+    unit : str unit of the grid totals, 'kWh' for power series [kW] (battery) or 'kg' for mass flow series [kg/s] (tanks)
+
+    output : dictionary of arrays, one value for each candidate capacity
+        'capacity' : [kJ] or [kg]
+        'self-sufficiency' : [-] share of demand not covered by the grid
+        'from grid' : [kWh] or [kg] total amount withdrawn from the grid
+        'into grid' : [kWh] or [kg] total amount fed into the grid
+        'grid' : (K x timesteps) grid exchange, from the grid (+) or into the grid (-) [kW] or [kg/s]
+        'cycles' : [-] equivalent full cycles (discharged amount / capacity)
+    """
+    if unit not in ['kWh','kg']:
+        raise ValueError(f"capacity_sweep unit '{unit}' not available.\n\
+            Options to fix the problem: \n\
+            (a) - Use 'kWh' for power series [kW] or 'kg' for mass flow series [kg/s]")
+    net         = np.asarray(net,dtype=float)
+    capacity    = np.asarray(capacities,dtype=float)
+    min_LOC     = capacity*DoD                  # [kJ] or [kg]
+    LOC         = np.zeros(len(capacity))       # [kJ] or [kg] current level of charge of each candidate
+    used        = np.zeros(len(capacity))       # [kJ] or [kg] used capacity of each candidate (see H_tank.use)
+    discharged  = np.zeros(len(capacity))       # [kJ] or [kg] cumulative discharged amount
+    supplied    = np.zeros((len(capacity),len(net)))    # storage supply (+) or absorption (-) [kW] or [kg/s]
+    decay       = 1-self_discharge
+
+    for step,p in enumerate(net):
+        LOC *= decay
+        if p >= 0:                                                              # charge
+            p       = min(p,max_charge)
+            full    = p*etaC*P2E >= capacity-LOC                                # candidates that can be fully charged
+            supplied[:,step] = np.where(full,-(capacity-LOC)/etaC/P2E,-p)
+            LOC     = np.where(full,capacity,LOC+p*etaC*P2E)
+            used    = np.maximum(used,LOC)
+        else:                                                                   # discharge
+            request = -p/etaD                                                   # [kW] or [kg/s] how much power is really required
+            active  = LOC + (capacity-used) > min_LOC                           # candidates that are not below minimum level of charge
+            full    = used == capacity                                          # the whole capacity has been used, level of charge can't go below min_LOC anymore
+            room    = np.where(full,LOC-min_LOC,LOC-min_LOC+capacity-used)      # [kJ] or [kg]
+            out     = np.where(active,np.minimum(np.minimum(request,room/P2E),max_discharge),0)
+            LOC    -= out*P2E
+            shift   = np.where(full,0,np.maximum(min_LOC-LOC,0))                # level of charge back-calculation
+            used   += shift
+            LOC    += shift
+            discharged += out*P2E
+            supplied[:,step] = out*etaD
+
+    grid = -(net + supplied)                            # from the grid (+) or into the grid (-)
+    if demand is None:
+        demand = np.maximum(-net,0)
+    total_demand = np.sum(demand)
+    from_grid = np.sum(np.maximum(grid,0),axis=1)
+    E2unit = P2E/3600 if unit == 'kWh' else P2E         # from [kW] to [kWh] in a timestep or from [kg/s] to [kg]
+
+    return({'capacity'          : capacity,
+            'self-sufficiency'  : 1-from_grid/total_demand if total_demand > 0 else np.ones(len(capacity)),
+            'from grid'         : from_grid*E2unit,
+            'into grid'         : -np.sum(np.minimum(grid,0),axis=1)*E2unit,
+            'grid'              : grid,
+            'cycles'            : np.divide(discharged,capacity,out=np.zeros(len(capacity)),where=capacity>0)})
+
+
+###########################################################################################################################################################
+
+if __name__ == "__main__":
+
+    """
+    Functional test
+    """
+
+    class tank:
+        def __init__(self,max_capacity,pressure,timestep_number):
+            self.max_capacity   = max_capacity
+            self.pressure       = pressure
+            self.used_capacity  = 0
+            self.LOC            = np.zeros(timestep_number+1)
+
+    timestep_number = 24
+    network = storage_network(timestep_number)
+    network.add('H tank',tank(100,30,timestep_number),'hydrogen')
+    network.add('MPH tank',tank(50,200,timestep_number),'hydrogen')
+    network.add('HPH tank',tank(20,350,timestep_number),'HP hydrogen')
+
+    network.tanks[0].LOC[0] = 40
+    network.tanks[0].used_capacity = 40
+
+    print(network.level('hydrogen'))                        # ['H tank', 'MPH tank']
+    print(network.available(0,'hydrogen'))                  # 40 + 100 - 40 + 0 + 50 - 0 = 150
+    print(network.storable(0,'hydrogen'))                   # 60 + 50 = 110
+    print(network.storable(0,'hydrogen',min_pressure=100))  # 50
+    print(network.LOC[0,0] == network.tanks[0].LOC[0])      # True
+
+    # capacity sweep compared with one battery simulation for each candidate capacity
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding techs module path
+    from core import constants as c
+    c.timestep          = 60
+    c.timestep_number   = 8760
+    c.P2E               = c.timestep*60
+    from techs import battery, H_tank
+
+    rng         = np.random.default_rng(0)
+    net         = 30*np.sin(np.arange(c.timestep_number)*2*np.pi/24) + rng.normal(0,10,c.timestep_number)   # [kW]
+    capacities  = np.linspace(10,300,30)                                                                     # [kWh]
+    parameters  = {'charging efficiency': 0.9, 'discharging efficiency': 0.9, 'max charging power': 50, 'max discharging power': 2e-4,
+                   'depth of discharge': 0.2, 'self discharge rate': 0, 'ageing': False, 'life cycles': 10000, 'end life capacity': 80, 'collective': 0}
+
+    start = time.time()
+    sweep = capacity_sweep(net,capacities*c.kWh2kJ,c.P2E,etaC=0.9,etaD=0.9,max_charge=parameters['max charging power'],
+                           max_discharge=capacities*c.kWh2kJ*parameters['max discharging power'],DoD=0.2)   # [kW] discharge limited per capacity as in battery.use
+    print(f"capacity sweep: {time.time()-start:.2f} s")
+
+    start = time.time()
+    grid = np.zeros((len(capacities),c.timestep_number))
+    for i,capacity in enumerate(capacities):
+        bat = battery({**parameters,'nominal capacity': capacity})
+        for step in range(c.timestep_number):
+            grid[i,step] = -(net[step] + bat.use(step,net[step]))
+    print(f"one battery simulation for each capacity: {time.time()-start:.2f} s")
+    print(np.allclose(grid,sweep['grid']))                  # True
+    print(np.round(sweep['self-sufficiency'],3))
+
+    # hydrogen: capacity sweep compared with one H tank simulation for each candidate capacity, grid totals in [kg]
+    hyd         = 0.002*np.sin(np.arange(c.timestep_number)*2*np.pi/24) + rng.normal(0,0.001,c.timestep_number)    # [kg/s]
+    capacities  = np.linspace(5,50,10)                                                                              # [kg]
+    sweep = capacity_sweep(hyd,capacities,c.P2E,unit='kg')
+
+    grid = np.zeros((len(capacities),c.timestep_number))
+    for i,capacity in enumerate(capacities):
+        tank = H_tank({'max capacity': capacity, 'pressure': 30},c.timestep_number)
+        for step in range(c.timestep_number):
+            grid[i,step] = -(hyd[step] + tank.use(step,hyd[step]))
+    print(np.allclose(grid,sweep['grid']))                                                  # True
+    print(np.allclose(sweep['from grid'],np.sum(np.maximum(grid,0),axis=1)*c.P2E))         # True, [kg]
+    print(np.allclose(sweep['into grid'],-np.sum(np.minimum(grid,0),axis=1)*c.P2E))        # True, [kg]
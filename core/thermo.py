@@ -0,0 +1,185 @@
+import numpy as np
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding core module path
+from functools import lru_cache
+from CoolProp.CoolProp import PropsSI as coolprop_PropsSI
+from scipy.interpolate import RectBivariateSpline
+from core.curves import curve_table
+
+use_tables = False      # True evaluates (T,P), (P,S) and (P,H) states of hydrogen, water and air inside the operating envelope on bicubic tables instead of CoolProp
+
+FLUIDS = {'hydrogen': 'Hydrogen', 'h2': 'Hydrogen', 'water': 'Water', 'h2o': 'Water', 'air': 'Air'}   # CoolProp aliases of the tabulated fluids
+
+ENVELOPE = {'Hydrogen': {'T': (200,1000), 'P': (0.5e5,1000e5)},    # [K] [Pa] compression stages and storage tanks
+            'Water':    {'T': (275,370),  'P': (1e5,100e5)},        # [K] [Pa] liquid water: cooling water and condensate
+            'Air':      {'T': (200,1000), 'P': (0.5e5,100e5)}}      # [K] [Pa]
+
+POINTS = (120,80)       # [-] table knots along temperature (linear) and pressure (logarithmic)
+
+@lru_cache(maxsize=2**16)
+def props(output,*args):
+    """
+    Memoized CoolProp PropsSI: states already evaluated in the process (es. compressor inlet conditions,
+    tank storage conditions, the same design point in a sweep) are not computed again
+
+    output : str output property, es. 'H', 'S', 'D', 'T', 'Z', 'MOLAR_MASS'
+    args : name1, prop1, name2, prop2, fluid or only fluid for trivial outputs, as CoolProp PropsSI
+
+    output : float property value [SI units]
+    """
+    return(coolprop_PropsSI(output,*args))
+
+def PropsSI(output,*args):
+    """
+    Thermodynamic property service, same signature and units of CoolProp PropsSI
+
+    Scalar states are memoized (see props). If use_tables is True, (T,P), (P,S) and (P,H) states of hydrogen, water
+    and air inside ENVELOPE are evaluated on the bicubic tables (see table_value), the other ones with CoolProp.
+    Array inputs are passed to CoolProp.
+
+    output : str output property, es. 'H', 'S', 'D', 'T', 'Z'
+    args : name1, prop1, name2, prop2, fluid or only fluid for trivial outputs (es. 'MOLAR_MASS')
+
+    output : float property value [SI units]
+    """
+    if any(isinstance(arg,(np.ndarray,list,tuple)) for arg in args):
+        return(coolprop_PropsSI(output,*args))
+    if use_tables and len(args) == 5:
+        value = table_value(output,*args)
+        if value is not None:
+            return(value)
+    return(props(output,*args))
+
+def tp_table(output,fluid):
+    """
+    Bicubic table of output over temperature and log-pressure, built once per process over the fluid ENVELOPE
+
+    output : str output property, es. 'H', 'S', 'D', 'Z'
+    fluid : str tabulated fluid, 'Hydrogen', 'Water' or 'Air'
+
+    output : scipy.interpolate.RectBivariateSpline of output as a function of T [K] and ln(P [Pa])
+    """
+    def builder():
+        T       = np.linspace(*ENVELOPE[fluid]['T'],POINTS[0])                  # [K]
+        lnP     = np.linspace(*np.log(ENVELOPE[fluid]['P']),POINTS[1])          # [ln(Pa)]
+        values  = np.array([[coolprop_PropsSI(output,'T',t,'P',np.exp(p),fluid) for p in lnP] for t in T])
+        return({'spline': RectBivariateSpline(T,lnP,values,kx=3,ky=3)})
+    return(curve_table(('thermo',fluid,output),builder)['spline'])
+
+def inverse_table(name,fluid):
+    """
+    Bicubic table of temperature over log-pressure and normalized entropy or enthalpy, built once per process
+    inverting the tabulated S(T,P) or H(T,P) on a fine temperature grid. At each pressure the normalized value
+    x = (value-value(T_min))/(value(T_max)-value(T_min)) spans [0,1] over the envelope temperature range
+
+    name : str 'S' or 'H'
+    fluid : str tabulated fluid, 'Hydrogen', 'Water' or 'Air'
+
+    output : scipy.interpolate.RectBivariateSpline of T [K] as a function of ln(P [Pa]) and x [-]
+    """
+    def builder():
+        spline  = tp_table(name,fluid)
+        T_fine  = np.linspace(*ENVELOPE[fluid]['T'],50*POINTS[0])          # [K]
+        lnP     = np.linspace(*np.log(ENVELOPE[fluid]['P']),POINTS[1])      # [ln(Pa)]
+        x_knots = np.linspace(0,1,POINTS[0])                                # [-]
+        values  = spline(T_fine,lnP)                                        # S and H increase with temperature at constant pressure
+        T       = np.array([np.interp(x_knots,(v-v[0])/(v[-1]-v[0]),T_fine) for v in values.T])
+        return({'spline': RectBivariateSpline(lnP,x_knots,T,kx=3,ky=3)})
+    return(curve_table(('thermo',fluid,'T',name),builder)['spline'])
+
+def temperature(fluid,P,name,value):
+    """
+    Temperature of the state (P,S) or (P,H) inside the envelope: first guess from the inverse table (see inverse_table)
+    refined with a Newton iteration on the tabulated S(T,P) or H(T,P)
+
+    fluid : str tabulated fluid
+    P : float [Pa] pressure
+    name : str 'S' or 'H'
+    value : float [J/kg/K] or [J/kg] entropy or enthalpy
+
+    output : float [K] temperature or None if the state is outside the envelope
+    """
+    spline      = tp_table(name,fluid)
+    lnP         = np.log(P)
+    low,high    = spline.ev(ENVELOPE[fluid]['T'],[lnP,lnP])         # value at the envelope temperature limits
+    if not low <= value <= high:
+        return(None)
+    T = inverse_table(name,fluid).ev(lnP,(value-low)/(high-low))    # [K]
+    T = T-(spline.ev(T,lnP)-value)/spline.ev(T,lnP,dx=1)            # [K] Newton iteration
+    return(float(T))
+
+def table_value(output,name1,prop1,name2,prop2,fluid):
+    """
+    Property of a (T,P), (P,S) or (P,H) state evaluated on the bicubic tables
+
+    output : str output property
+    name1, prop1, name2, prop2 : input properties and values as CoolProp PropsSI, in any order
+    fluid : str fluid name or alias
+
+    output : float property value [SI units] or None if fluid, inputs or state are not tabulated
+    """
+    fluid   = FLUIDS.get(fluid.lower(),fluid)
+    inputs  = {name1: prop1, name2: prop2}
+    if fluid not in ENVELOPE or 'P' not in inputs or output in inputs:
+        return(None)
+    P = inputs['P']
+    if not ENVELOPE[fluid]['P'][0] <= P <= ENVELOPE[fluid]['P'][1]:
+        return(None)
+    if 'T' in inputs:
+        T = inputs['T']
+        if not ENVELOPE[fluid]['T'][0] <= T <= ENVELOPE[fluid]['T'][1]:
+            return(None)
+    elif 'S' in inputs or 'H' in inputs:
+        name    = 'S' if 'S' in inputs else 'H'
+        T       = temperature(fluid,P,name,inputs[name])
+        if T is None:
+            return(None)
+    else:
+        return(None)
+    if output == 'T':
+        return(T)
+    return(float(tp_table(output,fluid).ev(T,np.log(P))))
+
+
+###########################################################################################################################################################
+
+if __name__ == "__main__":
+
+    """
+    Functional test and benchmark: memoized and tabulated properties against CoolProp
+    Run from the core folder (python thermo.py) or from the main folder (python -m core.thermo)
+    """
+
+    import time
+
+    states = [('H','T',298.15,'P',35e5,'Hydrogen'),('D','P',350e5,'T',288.15,'hydrogen'),('Z','T',420.,'P',200e5,'Hydrogen'),
+              ('H','T',300.,'P',5e5,'Air'),('H','P',10e5,'T',320.,'Water')]
+    s_in    = coolprop_PropsSI('S','T',298.15,'P',35e5,'Hydrogen')
+    h_out   = coolprop_PropsSI('H','T',520.,'P',140e5,'Hydrogen')
+    states += [('H','P',140e5,'S',s_in,'Hydrogen'),('T','P',140e5,'S',s_in,'Hydrogen'),('T','P',140e5,'H',h_out,'Hydrogen'),('D','P',140e5,'H',h_out,'Hydrogen')]
+
+    use_tables = True
+    start = time.perf_counter()
+    for state in states:
+        PropsSI(*state)                                     # building the tables
+    print(f"tables built in {time.perf_counter()-start:.1f} s")
+
+    for state in states:
+        exact   = coolprop_PropsSI(*state)
+        use_tables = False
+        start   = time.perf_counter()
+        for _ in range(1000):
+            PropsSI(*state)
+        memo    = (time.perf_counter()-start)/1000*1e6
+        use_tables = True
+        start   = time.perf_counter()
+        for _ in range(1000):
+            value = PropsSI(*state)
+        table   = (time.perf_counter()-start)/1000*1e6
+        start   = time.perf_counter()
+        for _ in range(20):
+            coolprop_PropsSI(*state)
+        direct  = (time.perf_counter()-start)/20*1e6
+        print(f"{state[0]:>2} ({state[1]},{state[3]}) {state[-1]:<9}: relative error {abs(value/exact-1):.1e}, CoolProp {direct:7.1f} µs, memoized {memo:5.2f} µs, table {table:6.1f} µs")
+    use_tables = False
@@ -0,0 +1,128 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from core.curves import curve_table
+
+CACHE_DIR   = '.cache'      # binary cache folder, created next to the workbook
+VERSION     = 2             # cache format version, part of the cache key
+
+def cache_key(path,sheets):
+    """
+    Key of a parsed sheet selection: hash of the workbook content, of the sheet selection and of the cache format
+
+    path : str workbook path
+    sheets : dict {name: dict pd.read_excel keyword arguments}
+
+    output : str hexadecimal key
+    """
+    with open(path,'rb') as f:
+        key = hashlib.sha256(f.read())
+    key.update(repr(sorted((name,sorted(kwargs.items())) for name,kwargs in sheets.items())).encode())
+    key.update(str(VERSION).encode())
+    return(key.hexdigest()[:32])
+
+def to_arrays(name,frame):
+    """
+    Flatten a parsed sheet into plain arrays that can be stored without pickling
+
+    name : str sheet selection name
+    frame : pd.DataFrame
+
+    output : dict {array name: np.ndarray}
+    """
+    arrays = {}
+    for part,labels in [('index',frame.index),('columns',frame.columns)]:
+        labels = np.asarray(labels)
+        arrays[f"{name}|{part}"] = labels.astype(str) if labels.dtype == object else labels
+    for i in range(frame.shape[1]):                                     # one array per column: column dtypes are kept
+        arrays[f"{name}|{i}"] = frame.iloc[:,i].to_numpy()
+    arrays[f"{name}|index name"]    = np.array([] if frame.index.name is None else [frame.index.name],dtype=str)
+    return(arrays)
+
+def to_frame(name,arrays):
+    """
+    Rebuild a parsed sheet from the arrays of to_arrays
+
+    name : str sheet selection name
+    arrays : dict or np.lib.npyio.NpzFile {array name: np.ndarray}
+
+    output : pd.DataFrame
+    """
+    index_name  = arrays[f"{name}|index name"]
+    columns     = np.array(arrays[f"{name}|columns"])
+    frame       = pd.DataFrame({i: np.array(arrays[f"{name}|{i}"]) for i in range(len(columns))},
+                               index=pd.Index(np.array(arrays[f"{name}|index"]),name=str(index_name[0]) if len(index_name) else None))
+    frame.columns = columns
+    return(frame)
+
+def read_sheets(path,sheets):
+    """
+    Parsed sheets of an Excel workbook, cached in a binary file next to the workbook
+
+    Parsing a workbook with pd.read_excel takes far longer than building the objects that use it (es. CHP performance maps).
+    The parsed sheets are stored as a .npz file in CACHE_DIR, keyed by the workbook content hash and the sheet selection:
+    later constructions, in the same process or in other processes of a sweep, load them in milliseconds.
+    Editing the workbook or the selection changes the key, so stale caches are never used. If the cache cannot be written
+    (es. read-only folder) sheets are parsed from the workbook.
+
+    path : str workbook path
+    sheets : dict {name: dict pd.read_excel keyword arguments}, es. {'electricity': {'sheet_name': 'W_el', 'header': 2, 'index_col': 'Tamb [°C]'}}
+
+    output : dict {name: pd.DataFrame} new DataFrames, they can be modified by the caller
+    """
+    key     = cache_key(path,sheets)
+    file    = os.path.join(os.path.dirname(path),CACHE_DIR,f"{os.path.splitext(os.path.basename(path))[0]}_{key}.npz")
+
+    def builder():
+        try:
+            with np.load(file,allow_pickle=False) as npz:
+                return({'arrays': {name: npz[name] for name in npz.files}})
+        except (OSError,ValueError,KeyError):                            # missing or unreadable cache
+            pass
+        arrays = {}
+        with pd.ExcelFile(path) as xls:
+            for name,kwargs in sheets.items():
+                arrays.update(to_arrays(name,pd.read_excel(xls,**kwargs)))
+        try:
+            os.makedirs(os.path.dirname(file),exist_ok=True)
+            temporary = f"{file}.{os.getpid()}.tmp"
+            with open(temporary,'wb') as f:
+                np.savez(f,**arrays)
+            os.replace(temporary,file)                                  # atomic: processes of a sweep never read a partial cache
+        except OSError:
+            pass
+        return({'arrays': arrays})
+
+    arrays = curve_table(('workbook',key),builder)['arrays']            # process-wide memo
+    return({name: to_frame(name,arrays) for name in sheets})
+
+
+###########################################################################################################################################################
+
+if __name__ == "__main__":
+
+    """
+    Functional test and benchmark: CHP-GT maps parsed from the workbook and loaded from the cache
+    """
+
+    import time
+    import shutil
+    from core import curves
+
+    path    = os.path.join('techs','chp_maps','CHPmaps_old.xlsx')
+    sheets  = {'W_el': {'sheet_name': 'W_el', 'header': 2, 'nrows': 7, 'usecols': 'A:G', 'index_col': 'Tamb [°C]'},
+               'm_fuel': {'sheet_name': 'm_fuel', 'header': 2, 'usecols': 'A:G', 'index_col': 'Tamb [°C]'},
+               'constr': {'sheet_name': 'System Boundaries', 'header': 15, 'usecols': 'C:F'}}
+    shutil.rmtree(os.path.join(os.path.dirname(path),CACHE_DIR),ignore_errors=True)
+
+    start   = time.perf_counter()
+    with pd.ExcelFile(path) as xls:
+        excel = {name: pd.read_excel(xls,**kwargs) for name,kwargs in sheets.items()}
+    print(f"pd.read_excel:      {(time.perf_counter()-start)*1e3:7.1f} ms")
+    for label in ['first construction','other process','same process']:
+        if label == 'other process':
+            curves.clear()
+        start   = time.perf_counter()
+        cached  = read_sheets(path,sheets)
+        print(f"{label:<20}{(time.perf_counter()-start)*1e3:7.1f} ms, equal {all(excel[name].equals(cached[name]) for name in sheets)}")
@@ -280,7 +280,7 @@ def LOC_plot(simulation_name):
             x = np.linspace(0,len(y)-1,len(y))        
             plt.plot(x,y,label=location_name)
             plt.grid()
-            plt.ylabel('LOC '+unit[tech])
+            plt.ylabel('LOC '+unit.get(tech,'[kg]'))     # further hydrogen tanks in [kg]
             if c.simulation_years == 1 and c.timestep == 60:
                 xticks = list(np.linspace(0, len(x) - 1, 13).astype(int))
                 xticklabels = ['          Jan','         Feb','          Mar','         Apr','         May','          Jun','         Jul','          Aug','           Sep','          Oct','          Nov','           Dec','']
@@ -3,8 +3,9 @@ import os
 import sys 
 sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding constants module path 
 from core import constants as c
+from techs.storage import storage
 
-class battery:    
+class battery(storage):    
     
     def __init__(self,parameters):
         """
@@ -33,18 +34,17 @@ class battery:
         
         self.cost = False # will be updated with tec_cost()
 
-        self.nom_capacity = parameters['nominal capacity']*c.kWh2kJ # battery early life max capacity [kJ]
-        self.max_capacity = parameters['nominal capacity']*c.kWh2kJ # battery max capacity [kJ]
-
-        self.etaC = parameters['charging efficiency'] # float 
-        self.etaD = parameters['discharging efficiency'] # float  
-        
         self.MpowerC = parameters['max charging power'] # float [kW]
         self.MpowerD = parameters['max discharging power'] # float [kW]
         
-        self.DoD = parameters['depth of discharge']  # float 
-        
         self.self_discharge = parameters['self discharge rate'] / 100 # float [%]                                                                                        
+        
+        super().__init__(parameters['nominal capacity']*c.kWh2kJ,       # [kJ] battery early life max capacity .nom_capacity and max capacity .max_capacity
+                         c.timestep_number,                             # array battery level of Charge .LOC and used capacity .used_capacity (see storage.py)
+                         etaC            = parameters['charging efficiency'],
+                         etaD            = parameters['discharging efficiency'],
+                         self_discharge  = self.self_discharge,
+                         DoD             = parameters['depth of discharge'])
         self.ageing = parameters['ageing'] # bool true if aging has to be calculated
         self.LC = parameters['life cycles'] # int number of life cycles to reach the end of battery life
         self.EOL = parameters['end life capacity'] # end of life capacity                                                                 
@@ -53,9 +53,6 @@ class battery:
         self.completed_cycles = 0 # float initialise completed_cycles, this parameter is usefull to calculate replacements
         self.replacements = [] # list initialise: h at which replecaments occur
 
-        self.LOC = np.zeros(c.timestep_number+1) # array battery level of Charge 
-        self.used_capacity = 0 # battery used capacity <= max_capacity [kWh]
-      
         self.collective = parameters['collective'] # int 0: no collective rules. 1: priority to csc and then charge or discharge the battery.
        
         self.T = 52.5 # °C Operative temperature
@@ -84,7 +81,7 @@ class battery:
         """
         #Apply self_discharge 
 
-        self.LOC[step] = self.LOC[step]*(1-self.self_discharge)
+        self.LOC[step] *= self.decay
         if self.ageing and (step*c.timestep/60/24%self.ageing_day == 0) and step!=0: # if aeging == True and it's time to calculate it
             self.calculate_ageing(step)
             
@@ -93,13 +90,13 @@ class battery:
             if p > self.MpowerC:
                 p = self.MpowerC
                               
-            charge = p*self.etaC*c.P2E
+            charge = p*self.charge_factor
             if charge < (self.max_capacity-self.LOC[step]): # if battery can't be full charged [kWh]
                 self.LOC[step+1] = self.LOC[step]+charge # charge [kWh]
             
             else: # if batter can be full charged
                 self.LOC[step+1] = self.max_capacity
-                p = ((self.max_capacity-self.LOC[step]) / self.etaC)/c.P2E
+                p = (self.max_capacity-self.LOC[step]) / self.charge_factor
             
             if self.LOC[step+1] > self.used_capacity: # update used capacity
                 self.used_capacity = self.LOC[step+1] 
@@ -111,19 +108,19 @@ class battery:
             
             p = p/self.etaD # how much power is really required
             
-            min_LOC = self.max_capacity*self.DoD
+            min_LOC = self.min_LOC
             
             if self.LOC[step] + (self.nom_capacity-self.used_capacity) > min_LOC:
                 
                 if(self.used_capacity==self.nom_capacity):  # the nom_capacity has been reached, so LOC[step+1] can't become negative 
                        
-                    discharge = min(-p,(self.LOC[step]-min_LOC)/c.P2E,self.max_capacity*self.MpowerD) # how much power can battery supply? [kW]         
-                    self.LOC[step+1] = self.LOC[step]-discharge*c.P2E # discharge battery
+                    discharge = min(-p,(self.LOC[step]-min_LOC)/self.P2E,self.max_discharge) # how much power can battery supply? [kW]         
+                    self.LOC[step+1] = self.LOC[step]-discharge*self.P2E # discharge battery
                     
                 else: # the max_capacity has not yet been reached, so LOC[step+1] may become negative and then the past LOC may be translated   
                                                       
-                    discharge = min(-p,(self.LOC[step]-min_LOC+self.max_capacity-self.used_capacity)/c.P2E,self.max_capacity*self.MpowerD) # how much power can battery supply
-                    self.LOC[step+1] = self.LOC[step]-discharge*c.P2E # discharge battery
+                    discharge = min(-p,(self.LOC[step]-min_LOC+self.max_capacity-self.used_capacity)/self.P2E,self.max_discharge) # how much power can battery supply
+                    self.LOC[step+1] = self.LOC[step]-discharge*self.P2E # discharge battery
                     if self.LOC[step+1] < min_LOC: # if the level of charge has become negative
                         self.used_capacity += (min_LOC - self.LOC[step+1]) # incrase the used capacity
                         self.LOC[:step+2] += (min_LOC - self.LOC[step+1])  # traslate the past LOC array
@@ -135,6 +132,13 @@ class battery:
                 self.LOC[step+1] = self.LOC[step]
                 return 0                                            
         
+    def update_bounds(self):
+        """
+        Level of charge and discharging power bounds, updated every time max capacity changes because of ageing
+        """
+        super().update_bounds()                                 # [kJ] minimum level of charge .min_LOC
+        self.max_discharge = self.max_capacity*self.MpowerD     # [kW] max discharging power
+        
     def calculate_ageing(self,step):      
         
         # degradation (equivalent number of cycles, life cycles, end of life capacity)
@@ -162,6 +166,7 @@ class battery:
         self.SOH_cyc[SOH_step] = self.SOH_cyc[SOH_step-1] - D_cyc*(1-self.EOL/100)
         
         self.max_capacity = self.nom_capacity * (self.SOH[SOH_step])
+        self.update_bounds()
         self.ageing_history[0].append(self.completed_cycles)
         self.ageing_history[1].append(self.max_capacity)
         self.ageing_history[2] = self.SOH
@@ -172,6 +177,7 @@ class battery:
             self.replacements.append(step)
             self.completed_cycles = 0
             self.max_capacity = self.nom_capacity
+            self.update_bounds()
             self.SOH[SOH_step] = 1                                  
         
     def rainflow(self,step,timestep):
@@ -245,6 +251,37 @@ class battery:
         
         return(n_cycles)
     
+    def get_state(self,step):
+        """
+        Battery state at the beginning of step, to restart the simulation from there
+        
+        step: int step at which the simulation will be restarted
+        
+        output : dict picklable battery state
+        """
+        return({**super().get_state(step),                                # [kJ] level of charge history and used capacity (see storage.py)
+                'SOH'               : self.max_capacity/self.nom_capacity, # [-] current state of health
+                'completed_cycles'  : self.completed_cycles,
+                'replacements'      : list(self.replacements),
+                'SOH story'         : [self.SOH.copy(),self.SOH_cal.copy(),self.SOH_cyc.copy()],
+                'ageing_history'    : [list(self.ageing_history[0]),list(self.ageing_history[1])]})
+    
+    def set_state(self,state):
+        """
+        Restore a battery state saved with get_state(). Battery parameters can differ from the ones of the saved simulation:
+        max capacity is rescaled on the current nominal capacity and the level of charge is limited to it.
+        
+        state: dict battery state
+        """
+        self.max_capacity       = self.nom_capacity*state['SOH']
+        self.update_bounds()
+        super().set_state(state)                                # level of charge limited to max capacity (see storage.py)
+        self.completed_cycles   = state['completed_cycles']
+        self.replacements       = list(state['replacements'])
+        self.SOH[:], self.SOH_cal[:], self.SOH_cyc[:] = state['SOH story']
+        self.ageing_history[0]  = list(state['ageing_history'][0])
+        self.ageing_history[1]  = [h*self.nom_capacity/state['ageing_history'][1][0] for h in state['ageing_history'][1]]     # max capacity history rescaled on the current nominal capacity
+    
     def tech_cost(self,tech_cost):
         """
         Parameters
@@ -12,14 +12,32 @@ sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # t
 
 ## Data handling
 import numpy as np
-import pandas as pd
-from scipy.interpolate import RegularGridInterpolator
 
 ## Data visualization
 import matplotlib.pyplot as plt
 
 ## Custom
 from core import constants as c
+from core.interpolation import grid_interp
+from core.workbook import read_sheets
+
+
+def map_interpolator(_map):
+        """
+        builds the bilinear interpolator of a performance map over contiguous float arrays
+        
+        inputs
+            _map :    pd dataframe performance map, index Tamb [°C] and columns load [-]
+      
+        output 
+            interp :  bilinear interpolation table (see core.interpolation.grid_interp) of the map as a function of (Tamb, load)
+                
+        """
+        if isinstance(_map,grid_interp):     # already built
+            return _map
+        return grid_interp((np.ascontiguousarray(_map.index,dtype=float),
+                            np.ascontiguousarray(_map.columns,dtype=float)),
+                            np.ascontiguousarray(_map.values,dtype=float))
 
 
 def bilinear_interp(_map,v1,v2):
@@ -27,7 +45,7 @@ def bilinear_interp(_map,v1,v2):
         bilinear interpolation function. It queries performance maps with required load and Tamb and returns system performance
         
         inputs
-            _map :    performance map
+            _map :    performance map, interpolator built by map_interpolator (pd dataframe maps are converted at each call)
             v1 :      float value representing chp load at the given timestep [-]
             v2 :      float air temperature for the considered timestep [°C]
       
@@ -46,12 +64,7 @@ def bilinear_interp(_map,v1,v2):
         # y2 = np.array(y2)    
         # y = np.interp(v2, x2, y2)
         
-        interp = RegularGridInterpolator((np.array(_map.index),
-                                          np.array(_map.columns)),
-                                          np.array(_map.values), 
-                                          method='linear')
-        
-        y = interp((v2,v1))
+        y = map_interpolator(_map)((v2,v1))
         return y
     
     
@@ -59,41 +72,18 @@ def inverse_bilinear_interp(_map, y, t_amb):
     '''
     Parameters
     ----------
-    _map  : pd dataframe of float values - performance map
+    _map  : performance map, interpolator built by map_interpolator or pd dataframe of float values
     y     : float value representing the system "Limit" value - according to the selected "Method"
     t_amb : float value of ambient temperature [°C]
 
     Returns
     -------
     l2    : float value representing working "Load" of the system correspondent to the defined "Limit"\
-            for the given tamb
+            for the given tamb. Exact inversion of the bilinear map, monotonic along load (see grid_interp.inverse):
+            limits outside the map range at t_amb return the minimum or maximum load of the map
 
     '''
-    i           = 0         # initializing iteration count
-    eps         = 100000000 # absolute error
-    epsilon     = 0.001     # imposed error treshold
-    cond_while  = True
-    
-    l1 = _map.columns[-1]   # l1 perturbation
-    l2 = _map.columns[0]    # l2 perturbation
-    
-    y1 = bilinear_interp(_map, l1, t_amb)       # right endpoint for the considered method
-    
-    while cond_while:
-        y2 = bilinear_interp(_map, l2, t_amb)   # first iteration: left endpoint for the considered method
-        eps = y - y2                            # absolute error calculation between y (limit) and computed left endpoint value
-        l = l2 + ((l1-l2)/(y1-y2))*(y-y2)       # 'inverse' calculation of load - linear approach
-        if l < _map.columns[0]:                 # avoid "out of range" interpolation
-            l = _map.columns[0]                 # l assigned the minimum load value of the given map           
-        elif l > _map.columns[-1]:              # avoid "out of range" interpolation
-            l = _map.columns[-1]                # l assigned the maximum load value of the given map
-        l1 = l2
-        y1 = y2
-        l2 = l    
-        if  i > 1000 or abs(eps) <= (epsilon*y):   # 1000 maxnumber of iterations allowed
-            cond_while = False
-        i += 1
-    return l2    
+    return map_interpolator(_map).inverse(t_amb, y)
 
 
 class Chp:
@@ -139,18 +129,29 @@ class Chp:
             os.chdir(r'./techs/chp_maps') # if code is being executed from main
             main = True
         
-        with pd.ExcelFile('CHPmaps.xlsx') as xls:
-            self.maps =  {
-                          "electricity"         : pd.read_excel(xls,sheet_name='W_el',header=2,nrows= 7,usecols='A:H',index_col='Tamb [°C]'),  # [kW] Net Electric Power Output 
-                          "process heat"        : pd.read_excel(xls,sheet_name='Q_th',header=2,nrows= 7,usecols='A:H',index_col='Tamb [°C]'),  # [kW] Thermal Power Output
-                          "fuel"                : pd.read_excel(xls,sheet_name='m_fuel',header=2,usecols='A:H',index_col='Tamb [°C]'),         # [kg/s] Fuel Mass Flow Rate Consumption 
-                          "process steam"       : pd.read_excel(xls,sheet_name='m_steam',header=2,usecols='A:H',index_col='Tamb [°C]'),        # [kg/s] Steam Mass Flow Rate Production
-                          "TIT"                 : pd.read_excel(xls,sheet_name='TIT',header=2,usecols='A:H',index_col='Tamb [°C]'),            # [K] Turbine Inlet Temperature 
-                          "Tstack"              : pd.read_excel(xls,sheet_name='Tstack',header=2,usecols='A:H',index_col='Tamb [°C]')          # [K] Exhaust Gases Temperatures at Stack 
-                          }
+        self.maps = read_sheets('CHPmaps.xlsx',{            # parsed maps cached in a binary file next to the workbook (see core.workbook)
+                          "electricity"         : dict(sheet_name='W_el',header=2,nrows= 7,usecols='A:H',index_col='Tamb [°C]'),  # [kW] Net Electric Power Output 
+                          "process heat"        : dict(sheet_name='Q_th',header=2,nrows= 7,usecols='A:H',index_col='Tamb [°C]'),  # [kW] Thermal Power Output
+                          "fuel"                : dict(sheet_name='m_fuel',header=2,usecols='A:H',index_col='Tamb [°C]'),         # [kg/s] Fuel Mass Flow Rate Consumption 
+                          "process steam"       : dict(sheet_name='m_steam',header=2,usecols='A:H',index_col='Tamb [°C]'),        # [kg/s] Steam Mass Flow Rate Production
+                          "TIT"                 : dict(sheet_name='TIT',header=2,usecols='A:H',index_col='Tamb [°C]'),            # [K] Turbine Inlet Temperature 
+                          "Tstack"              : dict(sheet_name='Tstack',header=2,usecols='A:H',index_col='Tamb [°C]')          # [K] Exhaust Gases Temperatures at Stack 
+                          })
         
         if main ==  True:                 # if code is being executed from main, change directory back to main
             os.chdir(r'../..')
+        
+        'Interpolators - built once over contiguous float arrays'
+        self.interp = {name: map_interpolator(_map) for name,_map in self.maps.items()}   # single map lookups (bounds and inverse maps)
+        
+        grid = self.interp['electricity'].grid
+        for name in self.interp:
+            if not all(np.array_equal(a,b) for a,b in zip(self.interp[name].grid,grid)):
+                raise ValueError(f"Warning: CHP performance map '{name}' is not defined on the same Tamb and load values of the 'electricity' map.\n\
+                Options to fix the problem: \n\
+                    (a) - define every map of CHPmaps.xlsx on the same Tamb and load values")
+        self.map_names  = list(self.maps)                                                              # order of the outputs of self.map_interp
+        self.map_interp = grid_interp(grid,np.stack([self.interp[name].values for name in self.map_names],axis=-1))   # all the maps evaluated in a single lookup
             
 
     def bound(self, method, lim, t_amb):
@@ -178,7 +179,7 @@ class Chp:
                 raise ValueError("Invalid Load bound values: out of range")                                 
             return lim
         else:            
-            return inverse_bilinear_interp(self.maps[method], lim, t_amb)
+            return inverse_bilinear_interp(self.interp[method], lim, t_amb)
         
     
     def use(self, step, t_amb, demand, demand2, available_fuel = None):    # None
@@ -238,7 +239,7 @@ class Chp:
             
             else:       # computing system performances accounting for fuel availability
         
-                minfuel = bilinear_interp(self.maps['fuel'],self.l_bound[step],t_amb)    # control needed when working with hydrogen \
+                minfuel = bilinear_interp(self.interp['fuel'],self.l_bound[step],t_amb)    # control needed when working with hydrogen \
                                                                                       # and no external source of fuel available (i.e. no grid connection)  
                 if available_fuel < minfuel*self.timestep*60:   # if available_fuel is lower than minimum fuel required at the minimum load, system is turned off
                     self.load[step]        = 0
@@ -253,19 +254,19 @@ class Chp:
                     return (self.steam[step], self.w_el[step], -self.m_fuel[step], self.q_th[step], self.hot_w[step])  # stop function execution and return values
                 
                 else:
-                    load  = inverse_bilinear_interp(self.maps[self.strategy], demand, t_amb)    # operating load corresponding to demand at considered timestep    
-                    mfuel = bilinear_interp(self.maps['fuel'], load, t_amb)                     # [kg/h] fuel consumption correspondig to defined operating load
+                    load  = inverse_bilinear_interp(self.interp[self.strategy], demand, t_amb)    # operating load corresponding to demand at considered timestep    
+                    mfuel = bilinear_interp(self.interp['fuel'], load, t_amb)                   # [kg/h] fuel consumption correspondig to defined operating load
                     
                     if mfuel*self.timestep*60 > available_fuel:   # if too much fuel is required compared to what is available
-                        load = inverse_bilinear_interp(self.maps['fuel'], available_fuel, t_amb)   # maximum load based on available fuel is computed and system is operated accordingly
+                        load = inverse_bilinear_interp(self.interp['fuel'], available_fuel/(self.timestep*60), t_amb)   # maximum load based on available fuel [kg/s] is computed and system is operated accordingly
                     else:
                         pass         
                 
         else:  
-            load = inverse_bilinear_interp(self.maps[self.strategy], demand, t_amb) 
+            load = inverse_bilinear_interp(self.interp[self.strategy], demand, t_amb) 
             
             
-        if load in pd.Interval(self.l_bound[step],self.u_bound[step],closed='both'):   # if load is within the producible range of chp technology
+        if self.l_bound[step] <= load <= self.u_bound[step]:   # if load is within the producible range of chp technology
             pass
         
         elif load > self.u_bound[step]:    # if load value is higher of the producible range of chp technology
@@ -275,13 +276,14 @@ class Chp:
             load = self.l_bound[step]
     
         self.load[step]                    = load 
+        output = dict(zip(self.map_names,self.map_interp((t_amb,load))))     # all the maps at the working point in a single lookup
         if self.fuel == 'hydrogen':
-            self.m_fuel[step]              = bilinear_interp(self.maps['fuel'],load,t_amb)    #[kg/s] hydrogen consumed
+            self.m_fuel[step]              = output['fuel']    #[kg/s] hydrogen consumed
         elif self.fuel == 'gas':
-            self.m_fuel[step]              = bilinear_interp(self.maps['fuel'],load,t_amb) / c.NGSDENSITY   #[Sm3/s] gas consumed
-        self.q_th[step]                    = bilinear_interp(self.maps['process heat'],load,t_amb)
-        self.w_el[step]                    = bilinear_interp(self.maps['electricity'],load,t_amb)
-        self.steam[step]                   = bilinear_interp(self.maps['process steam'],load,t_amb)       # [kg/s] steam produced by CHP system
+            self.m_fuel[step]              = output['fuel'] / c.NGSDENSITY   #[Sm3/s] gas consumed
+        self.q_th[step]                    = output['process heat']
+        self.w_el[step]                    = output['electricity']
+        self.steam[step]                   = output['process steam']       # [kg/s] steam produced by CHP system
         self.hot_w[step]                   = 0
         # self.parameters[self.strategy]  =                                                   # [kWh] hot water produced by CHP system - active for specific application
     
@@ -1,13 +1,13 @@
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 import numpy as np
-import pandas as pd
 import os
 import sys 
-from scipy.interpolate import interp1d
-from CoolProp.CoolProp import PropsSI
 sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding constants module path 
 from core import constants as c
+from core.thermo import PropsSI
+from core.interpolation import linear_interp, grid_interp
+from core.workbook import read_sheets
 
 class chp_gt:    
     
@@ -40,15 +40,15 @@ class chp_gt:
                              or remove chp_gt technology from the case study                     
                              """)
         
-        self.wel=np.zeros(simulation_hours)            # [W]    produced electricity
-        self.mH2CHP=np.zeros(simulation_hours)         # [kg/s] hydrogen mass flow rate required by GT + HRSG
+        self.wel=np.zeros(timestep_number)            # [W]    produced electricity
+        self.mH2CHP=np.zeros(timestep_number)         # [kg/s] hydrogen mass flow rate required by GT + HRSG
         # mH2SG = np.zeros(simulation_hours)        # [kg/s] hydrogen mass flow rate required by SG
         # mH2=np.zeros(simulation_hours)            # [kg/s] hydrogen mass flow rate required by the whole system GT + HRSG + SG
-        self.minprod=np.zeros(simulation_hours)        # [kg/s] minimum steam amount producible given weather conditions (tamb)
-        self.maxprod=np.zeros(simulation_hours)        # [kg/s] maximum steam amount producible given weather conditions (tamb)
+        self.minprod=np.zeros(timestep_number)        # [kg/s] minimum steam amount producible given weather conditions (tamb)
+        self.maxprod=np.zeros(timestep_number)        # [kg/s] maximum steam amount producible given weather conditions (tamb)
         # steam_SG=np.zeros(simulation_hours)       # steam required from steam generator units
-        self.steam_chp=np.zeros(simulation_hours)      # [kg/s] steam produced by CHP system, GT + HRSG components
-        self.steam_miss=np.zeros(simulation_hours)     # [kg/s] amount of steam the CHP system has been unable to provide due to its operational limits
+        self.steam_chp=np.zeros(timestep_number)      # [kg/s] steam produced by CHP system, GT + HRSG components
+        self.steam_miss=np.zeros(timestep_number)     # [kg/s] amount of steam the CHP system has been unable to provide due to its operational limits
         # pump = np.zeros(simulation_hours)         # [kW] pump power consumption
         
         # Required process steam properties
@@ -79,25 +79,40 @@ class chp_gt:
             os.chdir(r'./techs/chp_maps') # if code is being executed from main
             main = True
 
-        with pd.ExcelFile('CHPmaps_old.xlsx') as xls:
-        
-            self.Wel_map = pd.read_excel(xls,sheet_name='W_el',header=2,nrows= 7,usecols='A:G',index_col='Tamb [°C]')     # [kW]    Net Electric Power Output of the GT MAP
-            self.Eta_map = pd.read_excel(xls,sheet_name='Eta_tag',header=2,usecols='A:G',index_col='Tamb [°C]')           # [-]     GT Efficiency MAP
-            self.Beta_map = pd.read_excel(xls,sheet_name='Beta',header=2,usecols='A:G',index_col='Tamb [°C]')             # [-]     Compression Ratio MAP
-            self.mH2fuel_map = pd.read_excel(xls,sheet_name='m_fuel',header=2,usecols='A:G',index_col='Tamb [°C]')        # [kg/s]  Fuel mass flow rate MAP
-            self.Tmax_map = pd.read_excel(xls,sheet_name='Tmax',header=2,usecols='A:G',index_col='Tamb [°C]')             # [K]     Max Cycle Temperature MAP
-            self.mExhGas_map = pd.read_excel(xls,sheet_name='m_fumi',header=2,usecols='A:G',index_col='Tamb [°C]')        # [kg/s]  Exhaust Gases MAP
-            self.mCoolant_map = pd.read_excel(xls,sheet_name='m_coolant',header=2,usecols='A:G',index_col='Tamb [°C]')    # [kg/s]  GT coolant mass flow rate MAP
-            self.Texh_map = pd.read_excel(xls,sheet_name='T_exh',header=2,usecols='A:G',index_col='Tamb [°C]')            # [K]     Exh gases from GT Temperature MAP
-            self.Wth_inGT_map = pd.read_excel(xls,sheet_name='Wth_tag_in',header=2,usecols='A:G',index_col='Tamb [°C]')   # [W]     Wth enetering the GT MAP
-            self.Qeva_map = pd.read_excel(xls,sheet_name='Qeva',header=2,usecols='A:G',index_col='Tamb [°C]')             # [kW]    Exchanged Heat in Evaporator MAP
-            self.Qeco_map = pd.read_excel(xls,sheet_name='Qeco',header=2,usecols='A:G',index_col='Tamb [°C]')             # [W]     Exchanged Heat in Economizer MAP
-            self.Tstack_map = pd.read_excel(xls,sheet_name='Tstack',header=2,nrows=7,usecols='A:G',index_col='Tamb [°C]') # [K]     Exhaust Gases Temperature at Stack MAP
-            self.DTpp_map = pd.read_excel(xls,sheet_name='∆Tpp',header=2,usecols='A:G',index_col='Tamb [°C]')             # [K]     Delta T Pinch Point MAP
-            self.DTsub_map = pd.read_excel(xls,sheet_name='∆Tsub',header=3,usecols='A:G',index_col='Tamb [°C]')           # [K]     Delta T Pinch Point MAP
-           
-            self.constr = pd.read_excel(xls,sheet_name='System Boundaries',header=15,usecols='C:F')                       # System constraints imported as a DataFrame
-            self.constr = self.constr.drop(columns='Tstack')
+        sheets = read_sheets('CHPmaps_old.xlsx',{          # parsed maps cached in a binary file next to the workbook (see core.workbook)
+                    'Wel_map'       : dict(sheet_name='W_el',header=2,nrows= 7,usecols='A:G',index_col='Tamb [°C]'),
+                    'Eta_map'       : dict(sheet_name='Eta_tag',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'Beta_map'      : dict(sheet_name='Beta',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'mH2fuel_map'   : dict(sheet_name='m_fuel',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'Tmax_map'      : dict(sheet_name='Tmax',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'mExhGas_map'   : dict(sheet_name='m_fumi',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'mCoolant_map'  : dict(sheet_name='m_coolant',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'Texh_map'      : dict(sheet_name='T_exh',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'Wth_inGT_map'  : dict(sheet_name='Wth_tag_in',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'Qeva_map'      : dict(sheet_name='Qeva',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'Qeco_map'      : dict(sheet_name='Qeco',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'Tstack_map'    : dict(sheet_name='Tstack',header=2,nrows=7,usecols='A:G',index_col='Tamb [°C]'),
+                    'DTpp_map'      : dict(sheet_name='∆Tpp',header=2,usecols='A:G',index_col='Tamb [°C]'),
+                    'DTsub_map'     : dict(sheet_name='∆Tsub',header=3,usecols='A:G',index_col='Tamb [°C]'),
+                    'constr'        : dict(sheet_name='System Boundaries',header=15,usecols='C:F')})
+        
+        self.Wel_map = sheets['Wel_map']                # [kW]    Net Electric Power Output of the GT MAP
+        self.Eta_map = sheets['Eta_map']                # [-]     GT Efficiency MAP
+        self.Beta_map = sheets['Beta_map']              # [-]     Compression Ratio MAP
+        self.mH2fuel_map = sheets['mH2fuel_map']        # [kg/s]  Fuel mass flow rate MAP
+        self.Tmax_map = sheets['Tmax_map']              # [K]     Max Cycle Temperature MAP
+        self.mExhGas_map = sheets['mExhGas_map']        # [kg/s]  Exhaust Gases MAP
+        self.mCoolant_map = sheets['mCoolant_map']      # [kg/s]  GT coolant mass flow rate MAP
+        self.Texh_map = sheets['Texh_map']              # [K]     Exh gases from GT Temperature MAP
+        self.Wth_inGT_map = sheets['Wth_inGT_map']      # [W]     Wth enetering the GT MAP
+        self.Qeva_map = sheets['Qeva_map']              # [kW]    Exchanged Heat in Evaporator MAP
+        self.Qeco_map = sheets['Qeco_map']              # [W]     Exchanged Heat in Economizer MAP
+        self.Tstack_map = sheets['Tstack_map']          # [K]     Exhaust Gases Temperature at Stack MAP
+        self.DTpp_map = sheets['DTpp_map']              # [K]     Delta T Pinch Point MAP
+        self.DTsub_map = sheets['DTsub_map']            # [K]     Delta T Pinch Point MAP
+        
+        self.constr = sheets['constr']                  # System constraints imported as a DataFrame
+        self.constr = self.constr.drop(columns='Tstack')
         
         if main ==  True:                 # if code is being executed from main, change directory back to main
             os.chdir(r'../..')
@@ -126,12 +141,12 @@ class chp_gt:
             idx = np.isfinite(a)  & np.isfinite(self.t_amb)            # cleaning up NaN values given that polyfit function cannot handle NaN values
             self.indexes.append(idx)
             # polreg = np.poly1d(np.polyfit(a[idx],self.t_amb[idx],5))   # polynomial regression
-            polreg = interp1d(a[idx],self.t_amb[idx],bounds_error=None,fill_value='extrapolate')    # polynomial interpolation
+            polreg = linear_interp(a[idx],self.t_amb[idx],bounds_error=None,fill_value='extrapolate')    # polynomial interpolation
                                                                        # np.polyfit -> It is a fit polynomial p(x) = p[0] * x**deg + … + p[deg] 
                                                                        #               of degree deg to points (x, y). It fits data to a polynomial function
                                                                        #               https://appdividend.com/2022/01/28/numpy-polyfit-method-in-python/
             # polreg2 = np.poly1d(np.polyfit(self.t_amb[idx],a[idx],5))  # polynomial regression 2 - reversed relation/inverse function 
-            polreg2 = interp1d(self.t_amb[idx],a[idx],bounds_error=None,fill_value='extrapolate')   # polynomial interpolation 2 - reversed relation/inverse function 
+            polreg2 = linear_interp(self.t_amb[idx],a[idx],bounds_error=None,fill_value='extrapolate')   # polynomial interpolation 2 - reversed relation/inverse function 
             line = np.linspace(self.t_amb[idx][0],self.t_amb[idx][-1],100)  # regression interval
             a = a[idx]                                                 # Saving != NaN values in a new array - prolly redundant
             myline=np.linspace(a[0],a[-1],100)                         # creating the interval for the polynomial regression
@@ -139,6 +154,12 @@ class chp_gt:
             self.mylines.append(myline)                                # saving polynomial regression intervals
             self.a1.append(a)
             self.limits[label]=polreg,polreg2
+        
+        'Performance Maps - fused bilinear table of the maps evaluated at every step'
+        
+        self.map_interp = grid_interp((np.array(self.Wel_map.index,dtype=float),np.array(self.Wel_map.columns,dtype=float)),
+                                      np.stack((self.Wel_map.values,self.mH2fuel_map.values),axis=-1))   # [kW] electricity and [kg/s] fuel as a function of (Tamb, steam)
+        self.bounds_precomputed = False     # True when minprod and maxprod have been computed for the whole weather series (see bounds_series)
        
     def map_plot(self):
         
@@ -176,26 +197,49 @@ class chp_gt:
             bilinear interpolation function. It queries performance maps with required load and Tamb and returns system performance
             
             inputs
-                mappa:    performance map
+                mappa:    performance map, pd dataframe or grid_interp table (es. self.map_interp)
                 v1 :      float energy carrier request driving the demand [kWh] (electricity or heat)
                 v2 :      float air temperature for the considered timestep [°C]
           
             output 
-                y :  exact functioning point for the desired quantity
+                y :  exact functioning point for the desired quantity (one value per stacked map for self.map_interp)
                     
             """
-            x1 = np.array(mappa.columns).astype(float)  # dataset x1 (load)
-            x2 = np.array(mappa.index).astype(float)    # dataset x2 (t_amb)
-            y_ds = mappa.values.astype(float)           # dataset y (map values) 
-            y2 = [] 
-            for i in range(len(x2)):
-                x_tmp = x1
-                y_tmp = y_ds[i,:]
-                y2.append(np.interp(v1, x_tmp, y_tmp))
-            y2 = np.array(y2)    
-            y = np.interp(v2, x2, y2)
-            return y
+            if not isinstance(mappa,grid_interp):
+                mappa = grid_interp((np.array(mappa.index,dtype=float),np.array(mappa.columns,dtype=float)),mappa.values)
+            x2,x1 = mappa.grid                                  # datasets t_amb and load
+            v1 = min(max(v1,x1[0]),x1[-1])                      # map values are kept constant outside the map range
+            v2 = min(max(v2,x2[0]),x2[-1])
+            return mappa((v2,v1))
     
+    def bounds(self,t_air):
+        """
+        Operational boundaries of the CHP system: minimum and maximum steam producible for the given air temperature
+        
+        inputs
+            t_air:  float or np.ndarray air temperature [°C]
+        
+        output
+            minprod: float or np.ndarray [kg/s] min producibility for given conditions
+            maxprod: float or np.ndarray [kg/s] max producibility for given conditions
+        """
+        bound = np.sort([self.limits[label][1](t_air) for label in self.limits],axis=0)   # evaluating real limits of the system depending on ambient temerature
+        # bound[bound<1.5] = 1.5                          # lower operational boundary set in the operative constraints (PER ORA NON è UTILIZZATO)
+        return(bound[0],bound[1])                         # lower and upper operational boundaries values for the required carrier
+    
+    def bounds_series(self,temp_air):
+        """
+        Operational boundaries depend only on weather: computed at once for the whole simulation
+        
+        inputs
+            temp_air:  np.ndarray or pd.Series air temperature at each step [°C]
+        
+        output
+            self.minprod and self.maxprod updated for every step
+        """
+        temp_air = np.asarray(temp_air,dtype=float)[:len(self.minprod)]
+        self.minprod[:len(temp_air)],self.maxprod[:len(temp_air)] = self.bounds(temp_air)
+        self.bounds_precomputed = True
     
     def use(self,step,t_air,steamdemand,available_hyd):
         """
@@ -216,29 +260,19 @@ class chp_gt:
         #demand = abs(steamdemand)/3600                    # converting steam demand from kg/h to kg/s 
         demand = steamdemand                              # should be given in gk/s
         
-        bound = []                                        # operational boundaries of the CHP system for the given air temperature
-        for label in self.limits:
-            bound.append(self.limits[label][1](t_air))    # evaluating real limits of the system depending on ambient temerature
-        bound = np.sort(bound)
-        # bound[bound<1.5] = 1.5                          # lower operational boundary set in the operative constraints (PER ORA NON è UTILIZZATO)
-        bound = bound[0:2]                                # lower and upper operational boundaries values for the required carrier
-        self.minprod[h] = bound[0]                        # min producibility for given conditions
-        self.maxprod[h] = bound[1]                        # max producibility for given conditions
+        if not self.bounds_precomputed:                   # operational boundaries of the CHP system for the given air temperature
+            self.minprod[step],self.maxprod[step] = self.bounds(t_air)
        
-        if demand in pd.Interval(bound[0],bound[1],closed='both'):  # steam demand within the GT + HRSG range for given temperature
-            pass
-           
-        elif demand > self.maxprod[step]:
+        if demand > self.maxprod[step]:
             demand = self.maxprod[step]
          
-        elif demand < self.minprod[step]:                    # GT running to avoid shutdowns (given it would be turned off only for 62/8760 h/y  - 0.06 % of the time)
+        elif demand < self.minprod[step]:                 # GT running to avoid shutdowns (given it would be turned off only for 62/8760 h/y  - 0.06 % of the time)
             demand = self.minprod[step]
             
-        self.wel[h]= self.bilinear_interpolation(self.Wel_map,demand,t_air)  
+        self.wel[step],self.mH2CHP[step] = self.bilinear_interpolation(self.map_interp,demand,t_air)     # electricity and fuel in a single lookup
         self.steam_chp[step]= demand
         # steam_SG[h]= 0   
         self.steam_miss[step]= 0
-        self.mH2CHP[step]= self.bilinear_interpolation(self.mH2fuel_map,demand,t_air)
         # mH2SG[h] = 0
         # mH2[h] = mH2CHP[h]
         
@@ -1,5 +1,4 @@
 import CoolProp
-from CoolProp.CoolProp import PropsSI
 from CoolProp.Plots import PropertyPlot
 from scipy.interpolate import interp1d
 import warnings
@@ -11,6 +10,8 @@ import os
 import sys 
 sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temporarily adding constants module path 
 from core import constants as c
+from core.thermo import PropsSI
+from core.interpolation import linear_interp
 
 class Compressor:
     
@@ -32,6 +33,9 @@ class Compressor:
             'T_IC'                  : Temperature of intercooler [K]
             'n_stages'              : number of compression stages
             'only_renewables'       : operational strategy. Working with only renewable energy or not, boolean value
+            'P_in range'            : [min, max] inlet pressures covered by the performance map [bar], optional. Default only 'P_in'
+            'part-load efficiency'  : dict 'load': list flow rate over nominal flow rate [-], 'efficiency': list motor efficiency over its nominal value [-], optional.
+                                      Default constant motor efficiency
         
         timestep_number : int number of timesteps considered in the simulation [-]
         timestep        : int number of minutes considered as temporal resolution [min]
@@ -329,7 +333,6 @@ class Compressor:
                     self.comp_power_list.append(0.)
                     self.IC_power_list.append(0.)
                     self.P_target[i]    = self.P_in*self.comp_beta_targ**(i+1)
-                    self.delta_H        = np.zeros(self.n_stages)
                     P_in                = self.P_points[i*2]
                     h_in                = self.h_points[i*2]
                     s_in                = self.s_points[i*2]
@@ -362,7 +365,8 @@ class Compressor:
                     h_out_ic = PropsSI('H', 'P', P_out_ic*100000, 'T', self.T_IC, self.fluid)/1000
                     self.delta_H[i]             = h_out - h_out_ic
                     self.comp_lav_spec[i]       = h_out - h_in
-                    self.delta_H                = sum(self.delta_H)
+                
+                self.delta_H = sum(self.delta_H)                # [kJ/kg] heat removed by all the intercoolers
                 
                 # Alternative calculation for compressor power (without IC at last compressor) Ref:The TechnoEconomics of Hydrogen Compression TECHNICAL BRIEF
                 beta_stage  = self.beta_new[0]              # [-] diaphragm compressor
@@ -393,6 +397,9 @@ class Compressor:
                     self.IC_power_list  = self.Nflowrate*self.delta_H   # [kW] Total heat to be removed by the cooling system
                     
                 print(f"Multi stage refrigerated compressor model with a nominal power of {int(self.Npower)} kW to comprise a max flow rate of {round(self.Nflowrate,3)} kg/s")                
+            
+            Compressor.performance_map(self,parameters)     # part-load performance map evaluated by .use()
+            self.T_out = np.zeros(timestep_number)          # [K] outlet temperature
     ##########################################################################################################################################################
                     
                 # # Hydrogen Refueling Station (HRS) application - isoentalpic transformation, control from T to dispenser to check if temperature limits are met
@@ -405,6 +412,90 @@ class Compressor:
                 
     ################################################################################################################################################################
                     
+    def compression(self,P_in):
+        """
+        Specific work, cooling and outlet temperature of the compression process of the selected model starting from
+        a given inlet pressure. Outlet pressure, inlet temperature, intercooler temperature and pressure losses are the design ones.
+
+        P_in : float inlet pressure [bar]
+
+        output : float specific work of compression [kJ/kg]
+                 float heat to be removed by the cooling system [kJ/kg]
+                 float outlet temperature [K]
+        """
+        refrigeration   = self.model != 'normal_compressor'
+        beta_targ       = (self.P_out/P_in)**(1/self.n_stages)                                      # [-] stage compression ratio
+        h_in            = PropsSI('H', 'T', self.T_in, 'P', P_in*100000, self.fluid)/1000           # [kJ/kg]
+        s_in            = PropsSI('S', 'T', self.T_in, 'P', P_in*100000, self.fluid)/1000           # [kJ/kgK]
+        work            = 0                                                                         # [kJ/kg]
+        cooling         = 0                                                                         # [kJ/kg]
+
+        for i in range(self.n_stages):
+            P_out_ic    = P_in*beta_targ                                                            # [bar] stage target pressure
+            P_out       = P_out_ic/(1-self.delta_P)                                                 # [bar] compressor outlet pressure
+            beta        = P_out/P_in if self.model == 'multistage_compressor_with_refrigeration' else beta_targ
+            eta_is      = (beta**self.epsilon - 1)/(beta**(self.epsilon/self.eta_pol)-1)            # [-]
+            h_out_iso   = PropsSI('H', 'P', P_out*100000, 'S', s_in*1000, self.fluid)/1000          # [kJ/kg]
+            h_out       = (h_out_iso-h_in)/eta_is+h_in                                              # [kJ/kg]
+            work       += h_out-h_in
+
+            if refrigeration:
+                h_out_ic    = PropsSI('H', 'P', P_out_ic*100000, 'T', self.T_IC, self.fluid)/1000   # [kJ/kg]
+                cooling    += h_out-h_out_ic
+                h_in        = h_out_ic
+                s_in        = PropsSI('S', 'P', P_out_ic*100000, 'T', self.T_IC, self.fluid)/1000   # [kJ/kgK]
+                T_out       = self.T_IC
+            else:
+                T_out       = PropsSI('T', 'P', P_out*100000, 'H', h_out*1000, self.fluid)
+            P_in = P_out_ic
+
+        return(work,cooling,T_out)
+
+    def performance_map(self,parameters):
+        """
+        Part-load performance map built once at construction: power, cooling load and outlet temperature over
+        mass flow rate (0 - Nflowrate) and inlet pressure ('P_in range'), evaluated by .use() with linear interpolation
+
+        parameters : dict of compressor parameters, optional keys 'P_in range' and 'part-load efficiency' (see __init__)
+        """
+        P_range             = parameters.get('P_in range',False)
+        self.map_P_in       = np.linspace(*P_range,11) if P_range else np.array([self.P_in])    # [bar] inlet pressure knots
+        self.map_flowrate   = np.linspace(0,1,21)*self.Nflowrate                                # [kg/s] mass flow rate knots
+
+        part_load = parameters.get('part-load efficiency',False)
+        if part_load:
+            eta = self.eta_motor*linear_interp(part_load['load'],part_load['efficiency'],bounds_error=False,fill_value='extrapolate')(self.map_flowrate/self.Nflowrate)
+        else:
+            eta = np.full(len(self.map_flowrate),self.eta_motor)                                # [-] constant motor efficiency
+
+        self.power_map      = []    # power [kW] over mass flow rate at each inlet pressure knot
+        self.cooling_map    = []    # cooling load [kW] over mass flow rate at each inlet pressure knot
+        T_out               = []    # [K]
+        for P_in in self.map_P_in:
+            work,cooling,T = Compressor.compression(self,P_in)
+            self.power_map.append(linear_interp(self.map_flowrate,self.map_flowrate*work/eta,bounds_error=False,fill_value='extrapolate'))
+            self.cooling_map.append(linear_interp(self.map_flowrate,self.map_flowrate*cooling,bounds_error=False,fill_value='extrapolate'))
+            T_out.append(T)
+        self.T_out_map = linear_interp(self.map_P_in,T_out,bounds_error=False,fill_value=(T_out[0] if len(T_out) == 1 else 'extrapolate'))
+
+    def map_value(self,table,massflowrate,P_in):
+        """
+        Performance map lookup: linear interpolation over mass flow rate at the neighbouring inlet pressure knots
+        and linear blending between them. Inlet pressures outside 'P_in range' are clipped
+
+        table : list of linear_interp, self.power_map or self.cooling_map
+        massflowrate : float hydrogen flow rate [kg/s]
+        P_in : float inlet pressure [bar]
+
+        output : float map value [kW]
+        """
+        if len(self.map_P_in) == 1:
+            return(table[0].value(massflowrate))
+        P_in    = min(max(P_in,self.map_P_in[0]),self.map_P_in[-1])
+        k       = min(int(np.searchsorted(self.map_P_in,P_in,side='right'))-1,len(self.map_P_in)-2)
+        w       = (P_in-self.map_P_in[k])/(self.map_P_in[k+1]-self.map_P_in[k])
+        return((1-w)*table[k].value(massflowrate)+w*table[k+1].value(massflowrate))
+
     def thermodynamics_points(self):
             
         """
@@ -846,13 +937,14 @@ class Compressor:
 ############################################################################################################################################################################################################    
 
 
-    def use(self,step,available_hyd_lp=False,storable_hydrogen_hp=False,massflowrate=False):
+    def use(self,step,available_hyd_lp=False,storable_hydrogen_hp=False,massflowrate=False,P_in=False):
         """
         Compressor object absorbs electricity and works on fluid
         
         storable_hydrogen_hp    : float storable hydrogen H tank max_capacity - SOC[h-1] [kg] or maximum absorbable production if there is no tank
         available_hyd_lp        : float available hydrogen H tank SOC[h-1] [kg]
         massflowrate            : float hydrogen flow rate to be processed in the timestep [kg/s]
+        P_in                    : float inlet pressure [bar] for the performance map of the thermodynamic models. Default design 'P_in'
         step                    : int step to be simulated [-]
 
         output : 
@@ -892,8 +984,10 @@ class Compressor:
             
             else:
                 self.hyd[step]  = massflowrate
-                p_absorbed      = (massflowrate*self.comp_lav_spec[0])/self.eta_motor
+                P_in            = P_in or self.P_in                                             # [bar]
+                p_absorbed      = Compressor.map_value(self,self.power_map,massflowrate,P_in)   # [kW] part-load performance map
                 t_absorbed      = 0
+                self.T_out[step]= self.T_out_map.value(P_in)                                    # [K]
             
                                                           
                 
@@ -919,8 +1013,10 @@ class Compressor:
             
             else:   # working with a single storage pressure level. Streamlining of partial load functioning - Can be upgraded
                 self.hyd[step]  = massflowrate
-                p_absorbed      = (massflowrate*sum(self.comp_lav_spec))/self.eta_motor
-                t_absorbed      = massflowrate*self.delta_H
+                P_in            = P_in or self.P_in                                                 # [bar]
+                p_absorbed      = Compressor.map_value(self,self.power_map,massflowrate,P_in)       # [kW] part-load performance map
+                t_absorbed      = Compressor.map_value(self,self.cooling_map,massflowrate,P_in)     # [kW]
+                self.T_out[step]= self.T_out_map.value(P_in)                                        # [K]
                 
                 return(self.hyd[step],-p_absorbed,-t_absorbed)
                 
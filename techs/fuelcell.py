@@ -4,11 +4,13 @@ import numpy as np
 import math
 from numpy import log as ln
 from sklearn.linear_model import LinearRegression 
-import pandas as pd
 import os
 import sys 
 sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temporarily adding constants module path 
 from core import constants as c
+from core.interpolation import linear_interp
+from core.curves import curve_table
+from core.schedule import operational_mask
 import scipy.fft
 import scipy.optimize
 
@@ -26,7 +28,11 @@ class fuel_cell:
             'stack model': str 'simple','PEM General' and 'SOFC' are aviable
             'priority': int technology assigned priority
             'ageing': bool true if aging has to be calculated
-            'operational period': period of the year during which the fuel cell is turned on or off
+            'record history': bool true if the whole activation history stack['Activation[-]'] has to be recorded (ageing only).
+                              Ageing relies on running counters (operating steps, produced energy, thermal cycles), default False
+            'operational period': str 'dd-mm,dd-mm' period of the year during which the fuel cell is turned on or off, or list of such periods
+            'operational_weekdays': list of int, optional days of the week of the operational period, 0 = Monday ... 6 = Sunday. Default every day
+            'operational_hours': list of tuples, optional daily time windows (start hour, end hour) of the operational period, es. [(8,20)]. Default the whole day
             'electric efficiency': float efficiency of simple model [0-1]
             'thermal efficiency': float efficiency of simple model [0-1]                                
             
@@ -46,6 +52,7 @@ class fuel_cell:
                 (a) -  Global fuel cell capacity can be increased by adding more modules in fuel cell parameters in studycase.json")
         self.min_input_module           = parameters.get('min power module', 0) # if 'minimum load' is not specified as model input, the default value of 0 is selected by default
         self.ageing             = parameters.get('ageing', False)   # if 'ageing' is not specified as model input, the default value is set to False 
+        self.record_history     = parameters.get('record history', False)   # if True the activation array is recorded for the whole simulation
         if self.ageing != False:
             raise ValueError("Warning: ageing is not yet available for fuel cell, thus set it to false")                                                                     
         self.min_year   = c.MINUTES_YEAR                    # [min/year]    number of minutes in one year
@@ -169,186 +176,40 @@ class fuel_cell:
             # nc = 96 and FC_MaxCurrDens = 1.2 are the values derived from the above-mentioned datasheet 
             # Such values should be used when implementing a fuel cell of 13.6 kW
             
-            'POLARIZATION CURVE'
+            # Computing the fuel cell polarization curve V-i, shared by all the modules of the same size (see core/curves.py)
             
-            Ndatapoints= 1000                    # Number of points used to compute the polarization curve 
+            key = ('fuel cell',self.model,self.Npower,self.nc,self.FC_MaxCurrDens,self.FC_OperatingTemp,self.FC_FuelPress,self.FC_AirPress)
+            self.__dict__.update(curve_table(key,lambda: fuel_cell.pem_general_curves(self)))
             
-            # Saving different losses contruibutions to be considered in the polarization curve
-            
-            self.OCpotential = []                # [V] Open circuit voltage
-            self.ActLosses   = []                # [V] Activation losses
-            self.OhmLosses   = []                # [V] Ohmic losses
-            self.CellVolt = np.zeros(Ndatapoints)
-            self.CellCurrDensity = np.linspace(self.FC_MinCurrDens,self.FC_MaxCurrDens,Ndatapoints)   
-            
-            'Polarization (V-i) curve calculation'
-            
-            # V is obtained by summing 3 different contributions (concentration losses are considered to be negligible)
-
-            '1- Cell open curcuit voltage'
-            
-            pO2 = (self.FC_AirPress*0.21)/101325  # [atm] accounting for partial pressure of oxigen in air
-            pH2O = 1                              # [atm]
-            pH2 = self.FC_FuelPress/101325        # [atm]
-            
-            Ecell = 1.229 -0.85e-3*(self.FC_OperatingTemp-298.15) + 4.3085e-5*self.FC_OperatingTemp*ln(pH2*(pO2**0.5)/pH2O)  # [V] Open circuit voltage
-            self.OCpotential = [Ecell for i in range(Ndatapoints)]
-                            
-            for i in range(0,Ndatapoints):
-                                                        
-                '2- Activation losses'
-                Vact_cat = -self.Runiv*self.FC_OperatingTemp*np.log10(self.FC_CathodeCurrDens)/(self.CTC*4*self.FaradayConst)+self.Runiv*self.FC_OperatingTemp*np.log10(self.CellCurrDensity[i])/(self.CTC*4*self.FaradayConst) #[V]
-                Vact_an = -self.Runiv*self.FC_OperatingTemp*np.log10(self.FC_AnodeCurrDens)/(self.CTC*2*self.FaradayConst)+self.Runiv*self.FC_OperatingTemp*np.log10(self.CellCurrDensity[i])/(self.CTC*2.*self.FaradayConst)   #[V]
-          
-                Vact = Vact_cat +Vact_an               # [V] Activation losses
-                
-                self.ActLosses.append(Ecell-Vact)
-           
-                '3- Ohmic losses'
-                rho_m = (181.6*(1+0.03*(self.CellCurrDensity[i])+0.062*((self.FC_OperatingTemp/303)**2)*(self.CellCurrDensity[i])**2.5))/ \
-                    ((self.Lambda-0.634-3*(self.CellCurrDensity[i]))*self.eNepero**(4.18*(self.FC_OperatingTemp-303)/self.FC_OperatingTemp))      #[Ohm*cm] specific membrane recistence
-              
-                Rm = rho_m*self.MembThickness/10000    # [Ohm/cm2]  Cell resistance depending on temperature and moisture content (Lambda) 
-         
-                Vohm = self.CellCurrDensity[i]*Rm      # [V] Ohmic losses
-                
-                self.OhmLosses.append(Ecell-Vact-Vohm)
-                
-                'SINGLE CELL VOLTAGE'
-                
-                self.CellVolt[i] = (Ecell-Vact-Vohm)                                  # [V]    Cell Voltage
-            
-            self.Vmin_FC=self.CellVolt[-1]*self.nc                                    # [V]    Minimum value for working voltage
-            self.FC_CellArea=self.Npower*1000/(self.Vmin_FC*self.FC_MaxCurrDens)      # [cm^2] FC cell active area
-
-            'RESULTING MODULE VOLTAGE'
-         
-            self.Voltage = self.CellVolt*self.nc                                      # [V] Module Voltage
-
-            'Interpolation of  polarization curve: defining the fit-function for i-V curve'
-            
-            self.num = Ndatapoints                                                    # [-] number of intervals to be considered for the interpolation
-            self.x = np.linspace(self.CellCurrDensity[0],self.CellCurrDensity[-1],self.num) 
-            
-            # Interpolating functions
-            self.iV1 = interp1d(self.CellCurrDensity,self.Voltage,bounds_error=False,fill_value='extrapolate')    # Linear spline 1-D interpolation - MOdule Voltage
-            self.iV2 = interp1d(self.CellCurrDensity,self.CellVolt,bounds_error=False,fill_value='extrapolate')   # Linear spline 1-D interpolation - Cell Voltage
-            
-            # Creating the reverse curve IP - necessary to define the exact functioning point        
-            self.Current = self.CellCurrDensity*self.FC_CellArea    # [A] Defining the current value: same both for the single cell and the full stack!
-            
-            # Defining Fuel Cell Max Power Generation
-            'Fuel Cell Max Power Output'
-            
-            FC_power = []
-            for i in range(len(self.Current)):
-                pot=self.Current[i]*self.Voltage[i]/1000       # [kW] Power
-                FC_power.append(pot)
-            self.MinPower = min(FC_power)
-            
-            self.IP = interp1d(self.Current,FC_power,bounds_error=False,fill_value='extrapolate')          
-            self.P  = []
-            for i in range(len(self.Current)):
-                power = (self.iV1(self.CellCurrDensity[i])*self.Current[i])/1000     # [kW] Resolving the equation system via interpolation
-                self.P.append(power)                                                 # [kW] Output power values varying current
-                
-            self.PI=interp1d(self.P,self.Current,bounds_error=False,fill_value='extrapolate')  # Interpolating function returning Current if interrogated with Power 
-            self.Pi=interp1d(self.P,self.CellCurrDensity,bounds_error=False,fill_value='extrapolate')  # Interpolating function returning Current density if interrogated with Power 
-            self.PV=interp1d(self.P,self.Voltage,bounds_error=False,fill_value='extrapolate')  # Interpolating function returning Voltage if interrogated with Power 
-            self.Pv=interp1d(self.P,self.CellVolt,bounds_error=False,fill_value='extrapolate')  # Interpolating function returning Voltage if interrogated with Power 
-            
-            'Single module electricity production'
-            
-            # Creation of lists of values required for interpolation functions
-            hydrogen                = []
-            water                   = []
-            electricity_produced    = []
-            self.eta_module         = []
-            FC_Heat_produced        = []
-            
-            for i in range(len(FC_power)):
-               
-                p_required = FC_power[i]                                   # [kW] 
-                FC_CellCurrDensity = self.PI(p_required)/self.FC_CellArea  # [A/cm^2] current density value at which the fuel cell is working 
-                Current = FC_CellCurrDensity*self.FC_CellArea     # [A] FuelCell Stack operating current 
-                
-                FC_Vstack = self.iV1(FC_CellCurrDensity)          # [V] Stack operating voltage
-                V_cell = FC_Vstack/self.nc                        # [V] Single cell operating voltage
-        
-                'Computing FC efficiency and hydrogen energy demand'    
-                
-                pO2 = (self.FC_AirPress*0.21)/101325              # [atm]
-                pH2O = 1                                          # [atm]
-                pH2 = self.FC_FuelPress/101325                    # [atm]  
-                
-                Ecell = 1.229-0.85e-3*(self.FC_OperatingTemp-298.15) + 4.3085e-5*self.FC_OperatingTemp*ln(pH2*(pO2**0.5)/pH2O)   # [V] Open circuit voltage 
-                deltaG = self.deltaG0 - self.Runiv*self.FC_OperatingTemp*ln(pH2*math.sqrt(pO2)/pH2O)/(2*self.FaradayConst)       # [kJ/mol] Gibbs free energy at actual conditions
-              
-                eta_voltage = FC_Vstack/(Ecell*self.nc)           # [-] Voltage efficiency 
-                eta_th = - deltaG/self.HHVh2Mol                   # [-] Thermodynamic efficiency
-             
-                etaFC = eta_th*eta_voltage                        # [-] FC efficiency
-
-                'Hydrogen demand'
-             
-                FC_HydroCons = (Current*self.nc/95719.25)/1000/self.rhoStdh2    # [kg/s]*[Sm3/kg] = [Sm3/s] (Chavan 2017)
-                hyd = FC_HydroCons*self.rhoStdh2                                # [kg/s]
-                FC_deltaHydrogen = - hyd*self.HHVh2*1000                        # [kW]
-                
-                'Water production'
-                # water_produced = (hyd*self.h2oMolMass/self.H2MolMass)/self.rhoStdh2o            # [Sm3/s] stoichiometric amount
-                water_produced = (((p_required*1000/(V_cell*2*self.FaradayConst))*self.h2oMolMass)/self.rhoStdh2o)*self.nc # [Sm3/s] module produced water floe rate https://onlinelibrary.wiley.com/doi/pdf/10.1002/9781118878330.app2
-                
-                'Process heat, that can be recovered'
-              
-                heat_loss = 0.2 * (-FC_deltaHydrogen)      # Assuming 20% of energy losses                                                                            
-                FC_Heat = ((1.481*self.nc)/FC_Vstack-1)*p_required -  heat_loss              # [kW] 
-                    
-                hydrogen.append(hyd)                        # [kg/s]    consumed hydrogen
-                water.append(water_produced)                # [m^3/s]   produced water
-                electricity_produced.append(p_required)     # [kW]      output power
-                self.eta_module.append(etaFC)               # [-]       fc efficiency
-                FC_Heat_produced.append(FC_Heat)            # [kW]      co-product heat
-            
-            self.max_h2_module  = max(hydrogen)                         # [kg/s] maximum amount of exploitable hydrogen for the considered module
             self.max_h2_stack   = self.max_h2_module*self.n_modules     # [kg/s] maximum amount of exploitable hydrogen for the considered stack
-            self.maxVolt_module = max(self.Voltage)                     # [V] maximum voltage of the considered module
-            self.minVolt_module = min(self.Voltage)                     # [V] minimum voltage of the considered module
             
             electric_eff_module = self.eta_module[-1]  # Module electric efficiency
             h2p_eff = (1/(electric_eff_module*c.HHVH2*1000))*3600 # [kg/kWh] kg/h of hydrogen produced per kWh of input power
-            thermal_eff_module = (FC_Heat_produced[-1] / - FC_deltaHydrogen) # Module thermal efficiency
-            total_efficiency = electric_eff_module + thermal_eff_module
+            total_efficiency = electric_eff_module + self.thermal_eff_module
 
             print(f"\nThe fuel cell electric efficiency of each module is found to be equal to {electric_eff_module*100:.2f}%, which is equivalent to {round(h2p_eff, 3)} kg/kWh (using H2 HHV). "
-                  f"The fuel cell thermal efficiency of each module is found to be equal to {thermal_eff_module*100:.2f}% with heat output available for cogeneration at {self.FC_OperatingTemp}K. "
+                  f"The fuel cell thermal efficiency of each module is found to be equal to {self.thermal_eff_module*100:.2f}% with heat output available for cogeneration at {self.FC_OperatingTemp}K. "
                   f"Thus, the total efficiency is equal to {total_efficiency*100:.2f}%. "
                   f"A fuel cell nominal power of {self.MaxPowerStack:.2f} kW needs to be fed with {self.max_h2_stack*3600:.2f} kg/h of hydrogen.")
-            self.etaFuelCell = interp1d(hydrogen,self.eta_module,bounds_error=False,fill_value='extrapolate')          # Linear spline 1-D interpolation -> H2 consumption - FC efficiency
-            self.h2P         = interp1d(hydrogen,electricity_produced,bounds_error=False,fill_value='extrapolate')  # Linear spline 1-D interpolation -> H2 consumption - produced electricity
-            self.FC_Heat     = interp1d(hydrogen,FC_Heat_produced,bounds_error=False,fill_value='extrapolate')      # Linear spline 1-D interpolation -> H2 consumption - produced heat
-            self.water       = interp1d(hydrogen,water,bounds_error=False,fill_value='extrapolate')                 # Linear spline 1-D interpolation -> H2 consumption - produced water
-            
-            self.iEta   = interp1d(self.CellCurrDensity,self.eta_module,bounds_error=False,fill_value='extrapolate')       # Linear spline 1-D interpolation -> Operating current density - efficiency
-            self.IEta   = interp1d(self.Current,self.eta_module,bounds_error=False,fill_value='extrapolate')       # Linear spline 1-D interpolation -> Operating current density - efficiency
-            self.ihyd   = interp1d(self.CellCurrDensity,hydrogen,bounds_error=False,fill_value='extrapolate')           # Linear spline 1-D interpolation -> Operating current density - H2 consumption
-            self.Ihyd   = interp1d(self.Current,hydrogen,bounds_error=False,fill_value='extrapolate')           # Linear spline 1-D interpolation -> Operating current density - H2 consumption
-            self.iHeat  = interp1d(self.CellCurrDensity,FC_Heat_produced,bounds_error=False,fill_value='extrapolate')   # Linear spline 1-D interpolation -> Operating current density - produced heat            
-            self.IHeat  = interp1d(self.Current,FC_Heat_produced,bounds_error=False,fill_value='extrapolate')   # Linear spline 1-D interpolation -> Operating current density - produced heat            
-            self.iwater = interp1d(self.CellCurrDensity,water,bounds_error=False,fill_value='extrapolate')              # Linear spline 1-D interpolation -> Operating current density - produced water            
-            self.Iwater = interp1d(self.Current,water,bounds_error=False,fill_value='extrapolate')              # Linear spline 1-D interpolation -> Operating current density - produced water            
         
             if self.ageing:             # if ageing effects are being considered
                 self.stack = {
-                                'Activation[-]': np.zeros(timestep_number),                    # Initialize an array to track module activation (1 for on, 0 for off) for each timestep
                                 'Pol_curve_history': [],                                       # Initialize an empty list to keep track of polarization curve shifts during utilization
                                 'Module_efficiency[-]': [],                                    # Initialize an empty list to keep track of module efficiency over time
                                 'Conversion_ratio_op[kWh/kg]': np.zeros(timestep_number),        # Initialize an array to keep track of performance evolution
                                 'Conversion_ratio_rated[kWh/kg]': np.zeros(timestep_number),        # Initialize an array to keep track of performance evolution
                                 'hydrogen_consumption[kg/s]': np.zeros(timestep_number),        # Initialize an array to keep track of hydrogen production
                                 'i_op[A]': np.zeros(timestep_number),                          # Initialize an array to keep track of operating current
-                                'v_op[V]': np.zeros(timestep_number)                           # Initialize an array to keep track of operating voltage
+                                'v_op[V]': np.zeros(timestep_number),                          # Initialize an array to keep track of operating voltage
+                                'operating_steps': 0,                                          # [-] number of timesteps the fuel cell has been operating
+                                'week_start_steps': 0,                                         # [-] operating steps at the beginning of the current week
+                                'energy[kWh]': 0,                                              # [kWh] electricity produced
+                                'thermal_cycles': 0,                                           # [-] number of start-ups (fuel cell off at the previous timestep)
+                                'last_active_step': -2,                                        # [-] last timestep the fuel cell has been operating
+                                'step_energy[kWh]': 0                                          # [kWh] electricity produced in the last operating timestep
                                 }
+                if self.record_history:
+                    self.stack['Activation[-]'] = np.zeros(timestep_number)    # Initialize an array to track module activation (1 for on, 0 for off) for each timestep
                 self.Γ              = (self.Npower)/(self.max_h2_module*3600) # [kWh/kg] ideal coversion ratio
                 # Defining the optimal operating range
                 self.v_0        = self.minVolt_module/self.nc    # [V] minimun voltge for the single cell
@@ -358,8 +219,13 @@ class fuel_cell:
                 admissile_loss  = 20                             # [%] admissible voltage values loss compared to rated performance
                 self.CellVoltage_limit = max(self.Voltage)*(admissile_loss) # [V] cell voltage value requiring replacement of the module at end of life
                 self.polarization_curve_ageing = self.Voltage.copy()  # [V] initialising pol_curve. Considering design performances at first step (before starting degradation computing)
-                self.hydP       = interp1d(hydrogen,self.P)
-                self.hydcons    = hydrogen
+                self.hydP       = linear_interp(self.hydcons,self.P)
+                self.deg_model  = curve_table(('fuel_cell','degradation rate'),fuel_cell.deg_rate_fit)   # load profile - degradation rate model, fitted once per process
+                self.V_max      = float(max(self.Voltage))       # [V] module voltage at minimum load of the design polarization curve
+                self.curve_offset           = 0                  # [V] module voltage loss due to ageing, uniform shift of the polarization curve
+                self.ageing_factor_rated    = 1                  # [-] ageing factor for functioning at rated power
+                self.φ          = 0                              # [-] load profile characteristic value of the last week
+                self.IV_ageing  = linear_interp(self.Current,self.polarization_curve_ageing) # I-V function accounting for ageing effect, updated every week
         
         ####################################   
         if self.model == 'SOFC':
@@ -401,203 +267,301 @@ class fuel_cell:
             # Varying the number of cells, module efficiency remains unchanged
             # nc = 77 and FC_MaxCurrDens = 1.54 are derived from the above-mentioned datasheet
             
-            'POLARIZATION CURVE'
-            
-            Ndatapoints = 1000                        # Number of points used to compute the polarization curve 
+            # Computing the fuel cell polarization curve V-i, shared by all the modules of the same size (see core/curves.py)
             
-            self.DeltaV_ohm = np.zeros(Ndatapoints)   # Ohmic losses
-            self.DeltaV_con = np.zeros(Ndatapoints)   # Concentration losses
-            self.Ecell = []                           # Open circuit voltage
-            self.CellVoltage = np.zeros(Ndatapoints)
-            self.CellCurrDensity = np.linspace(self.FC_MinCurrDens,self.FC_MaxCurrDens,Ndatapoints)  
+            key = ('fuel cell',self.model,self.Npower,self.nc,self.FC_MaxCurrDens,self.FC_OperatingTemp,self.FC_FuelPress,self.FC_AirPress)
+            self.__dict__.update(curve_table(key,lambda: fuel_cell.sofc_curves(self)))
             
-            pH2 = self.FC_FuelPress/101325                  # [atm]
-            pH2O = 1                                        # [atm]
-            pO2 = (self.FC_AirPress*0.21*101325)/101325     # [atm]
-            
-            # V is obtained by summing 4 different contributions 
-            'Polarization (V-i) curve calculation'
-        
-            '1 - Open circuit potential'                
-            
-            Ecell = 1.19 + ((self.Runiv*self.FC_OperatingTemp)/(2*self.FaradayConst))*ln(pH2*(pO2**0.5)/pH2O)  # [V] Open circuit voltage
-            self.Ecell  = [Ecell for i in range(Ndatapoints)]
-
-            for i in range(0,Ndatapoints):
-                                
-                '2 - Ohmic losses'
-                
-                self.DeltaV_ohm[i] = (self.CellCurrDensity[i]*self.ThicknessElectrolyte*self.FC_OperatingTemp)/\
-                                     (9000*self.eNepero**(-100000/(self.Runiv*self.FC_OperatingTemp)))                   # [V] (100000 activation energy in [kJ/mol], 9000 electrolyte constant)
-               
-                '3 - Concentration losses'   # Significant losses only for cathode, activation losses (minimal contribution for SOFC) are also present in the following formula
-                
-                self.DeltaV_con[i] = ((self.Runiv*self.FC_OperatingTemp)/(2*self.FaradayConst))*\
-                                     ln((self.CellCurrDensity[i]/(self.FC_ExchangeCurrDensCathode*self.FC_AirPress*(0.21-0.0008*10000*self.CellCurrDensity[i]*self.Runiv*self.FC_OperatingTemp/(4*self.FaradayConst*101325*0.00002)))))        # [V] 
-                
-                '4 - Cell voltage'
-                
-                self.CellVoltage[i] = self.Ecell[i]-self.DeltaV_ohm[i]-self.DeltaV_con[i]
-                
-            self.Vmin_FC_stack = self.CellVoltage[-1]*self.nc                                 # [V]    Minimum value for working voltage
-            self.FC_CellArea = self.Npower*1000/(self.Vmin_FC_stack*self.FC_MaxCurrDens)      # [cm^2] FC cell active area
-            self.FC_Pmax = self.Npower                                                        # [kW] Max output power
-            
-            '5- Stack voltage'
-            
-            self.Voltage = self.nc*self.CellVoltage
-
-            'Interpolation of  polarization curve: defining the fit-function for i-V curve'    
-          
-            self.num = Ndatapoints                                          # [-] number of intervals to be considered for the interpolation
-            self.x = np.linspace(self.CellCurrDensity[0],self.CellCurrDensity[-1],self.num)
-                    
-            # Defining different interpolation methods
-            self.iV1 = interp1d(self.CellCurrDensity,self.Voltage,bounds_error=False,fill_value='extrapolate')          # Linear spline 1-D interpolation
-            
-            # Creating the reverse curve IP - necessary to define the exact functioning point
-            self.Current = self.CellCurrDensity*self.FC_CellArea
-
-            'SOFC Max Power Production'
-            
-            FC_power = []
-            for i in range(len(self.Current)):
-                 pot = self.Current[i]*self.Voltage[i]/1000     # [kW] Power
-                 FC_power.append(pot)
-            self.MinPower = min(FC_power)
-            
-            self.IP=interp1d(self.Current,FC_power,kind='cubic',bounds_error=False,fill_value='extrapolate') 
-            self.P = np.zeros(Ndatapoints)
-            
-            for i in range (len(self.Current)):
-                  self.P[i] = (self.iV1(self.CellCurrDensity[i])*self.Current[i])/1000   # [kW] power output 
-            
-            self.PI=interp1d(self.P,self.Current,bounds_error=False,fill_value='extrapolate')   # Interpolating function returning Current if interrogated with Power 
-
-            'Single module electricity production'
-            # Creation of lists of values required for interpolation functions
-            hydrogen                = []
-            water                   = []
-            electricity_produced    = []
-            eta_FuelCell            = []
-            FC_Heat_produced        = []
-
-            for i in range(len(FC_power)):
-                
-                p_required = FC_power[i]                                    # [kW] power production               
-                FC_CellCurrDensity = self.PI(p_required)/self.FC_CellArea   # [A/cm^2] current density value at which the fuel cell is working 
-                Current = FC_CellCurrDensity*self.FC_CellArea               # [A] FuelCell Stack operating current
-                FC_Vstack= self.iV1(FC_CellCurrDensity)                     # [V] Stack operating voltage
-    
-                'Computing FC efficiency and hydrogen energy demand'    
-                
-                pO2 = (self.FC_AirPress*0.21*101325)/101325      # [atm]
-                pH2O = 1                                         # [atm]
-                pH2 = self.FC_FuelPress/101325                   # [atm]  
-                
-                Ecell = 1.19 + ((self.Runiv*self.FC_OperatingTemp)/(2*self.FaradayConst))*ln(pH2*(pO2**0.5)/pH2O)
-                DeltaV_OHM = (FC_CellCurrDensity*self.ThicknessElectrolyte*self.FC_OperatingTemp)/\
-                    (9000*self.eNepero**(-100000/(self.Runiv*self.FC_OperatingTemp)))
-                DeltaV_CON = ((self.Runiv*self.FC_OperatingTemp)/(2*self.FaradayConst))\
-                    *ln((FC_CellCurrDensity/(self.FC_ExchangeCurrDensCathode*self.FC_AirPress*(0.21-0.0008*10000*FC_CellCurrDensity*self.Runiv*self.FC_OperatingTemp/(4*self.FaradayConst*101325*0.00002)))))
-                TotalLoss = DeltaV_OHM + DeltaV_CON   # [V]
-                
-                deltaG = self.deltaG0 - self.Runiv*self.FC_OperatingTemp*ln(pH2*math.sqrt(pO2)/pH2O)/(2*self.FaradayConst)    # [kJ/mol] Gibbs free energy at actual conditions
-              
-                eta_voltage = FC_Vstack/(Ecell*self.nc)     # [-] Voltage efficiency 
-                eta_th = self.deltaG0/self.HHVh2Mol         # [-] Thermodynamic efficiency
-                etaFC = -eta_th*eta_voltage                 # [-] FC efficiency
-                
-                'Hydrogen demand'
-                FC_HydroCons = ((Current*self.nc)/(self.FaradayConst*1000))/(self.rhoStdh2)     # [kg/s]*[Sm3/kg] = [Sm3/s] 
-                hyd = FC_HydroCons*self.rhoStdh2                                                # [kg/s]
-                FC_deltaHydrogen = - hyd*self.HHVh2*1000                                        # [kW]
-                
-                'Air demand'     
-                FC_AirCons       = ((self.AirMolMass*1000*p_required/\
-                                     (self.FaradayConst*2*FC_Vstack/self.nc))*self.stoichiometriccoeff)         #[kg/s] air consumption
-                FC_O2Cons        = FC_AirCons*0.2319                                                            #[kg/s] oxygen consumption, taken from the air 
-                
-                'Air exit flow rate'
-                FC_AirExit = FC_AirCons-FC_O2Cons       #[kg/s] hourly outgoing air mass flow rate 
-                
-                'Heat Demand for air and hydrogen'                           
-                Q_air=((FC_AirCons*self.cpAir*(self.FC_OperatingTemp-self.AmbTemp)))    #[kW] Heat needed to rise the temperatura of inlet air during ramp-up   (Q=m*c_p*DT)
-                Q_h2=(hyd*self.cpH2*(self.FC_OperatingTemp-self.AmbTemp))                 #[kW] Heat needed to rise the temperature of inlet hydrogen during ramp-up (Q=m*c_p*DT) 
-         
-                'Water production'
-                water_produced = (hyd*self.h2oMolMass/self.H2MolMass)/self.rhoStdh2o            # [m^3/s] stoichiometric amount
-                # water_produced = ((p_required*1000/(V_cell*2*self.FaradayConst))*self.h2oMolMass)/self.rhoStdh2o # [Sm3/s] of produced water https://onlinelibrary.wiley.com/doi/pdf/10.1002/9781118878330.app2
-                #!!! '[...] if methane is internally reformed, then half the product water is used in the reformation process, thus halving the rate of production https://onlinelibrary.wiley.com/doi/pdf/10.1002/9781118878330.app2
-            
-                'Steam produced'
-                FC_H20Produced = hyd+FC_O2Cons                     #[kg/s] steam produced
-                
-                'Heat Produced by the electrochemical reaction'
-                z = Current/(2*self.FaradayConst)   # [mol/s]
-                DeltaS = -((self.H20MolStdEntropy-(self.O2MolStdEntropy/2)-self.H2MolStdEntropy)+\
-                           (self.Runiv/2)*ln((pH2**2)*pO2/(pH2O**2)))                                   # [J/mol*K]
-                FC_Heat_elec = ((((z*self.FC_OperatingTemp*DeltaS + Current*TotalLoss))*self.nc)/1000)  # [kW] 
-                
-                'Heat contained in anodic and cathodic flow'
-                FC_HeatH20 = FC_H20Produced*self.SteamSH                                    #[kW] heat in the steam flow exiting the anode
-                FC_HeatAir = FC_AirExit*self.cpAir*(self.FC_OperatingTemp-self.AmbTemp)     #[kW] heat in the air flow exiting the cathode
-                FC_Heat    = FC_HeatH20+FC_HeatAir                                          #[kW] net heat available for cogeneration
-
-                hydrogen.append(hyd)                       # [kg/s]  produced hydrogen
-                water.append(water_produced)               # [m^3/s] produced water
-                electricity_produced.append(p_required)    # [kW] output power
-                eta_FuelCell.append(etaFC)                 # [-]   fc efficiency
-                FC_Heat_produced.append(FC_Heat)           # [kW] co-product heat
-                
-            self.max_h2_module = max(hydrogen)                 # [kg/s] maximum amount of exploitable hydrogen for the considered module
+            self.FC_Pmax        = self.Npower                           # [kW] Max output power
             self.max_h2_stack   = self.max_h2_module*self.n_modules     # [kg/s] maximum amount of exploitable hydrogen for the considered stack
             
-            electric_eff_module = eta_FuelCell[-1] # Module electric efficiency
+            electric_eff_module = self.eta_module[-1] # Module electric efficiency
             h2p_eff = (1/(electric_eff_module*c.HHVH2*1000))*3600 # [kg/kWh] kg/h of hydrogen produced per kWh of input power
-            thermal_eff_module = (FC_Heat_produced[-1] / - FC_deltaHydrogen) # Module thermal efficiency
-            total_efficiency = electric_eff_module + thermal_eff_module
+            total_efficiency = electric_eff_module + self.thermal_eff_module
             print(f"\nThe fuel cell electric efficiency of each module is found to be equal to {electric_eff_module*100:.2f}%, which is equivalent to {round(h2p_eff, 3)} kg/kWh (using H2 HHV). "
-                  f"The fuel cell thermal efficiency of each module is found to be equal to {thermal_eff_module*100:.2f}% with heat output available for cogeneration at {self.FC_OperatingTemp}K. "
+                  f"The fuel cell thermal efficiency of each module is found to be equal to {self.thermal_eff_module*100:.2f}% with heat output available for cogeneration at {self.FC_OperatingTemp}K. "
                   f"Thus, the total efficiency is equal to {total_efficiency*100:.2f}%. "
                   f"A fuel cell nominal power of {self.MaxPowerStack:.2f} kW needs to be fed with {self.max_h2_stack*3600:.2f} kg/h of hydrogen.")
 
-            self.etaFuelCell = interp1d(hydrogen,eta_FuelCell,bounds_error=False,fill_value='extrapolate')          # Linear spline 1-D interpolation -> H2 consumption - FC efficiency
-            self.h2P         = interp1d(hydrogen,electricity_produced,bounds_error=False,fill_value='extrapolate')  # Linear spline 1-D interpolation -> H2 consumption - produced electricity
-            self.FC_Heat     = interp1d(hydrogen,FC_Heat_produced,bounds_error=False,fill_value='extrapolate')      # Linear spline 1-D interpolation -> H2 consumption - produced heat
-            self.water       = interp1d(hydrogen,water,bounds_error=False,fill_value='extrapolate')                 # Linear spline 1-D interpolation -> H2 consumption - produced water
-            
-            self.iEta   = interp1d(self.CellCurrDensity,eta_FuelCell,bounds_error=False,fill_value='extrapolate')       # Linear spline 1-D interpolation -> Operating current density - efficiency
-            self.ihyd   = interp1d(self.CellCurrDensity,hydrogen,bounds_error=False,fill_value='extrapolate')           # Linear spline 1-D interpolation -> Operating current density - H2 consumption
-            self.iHeat  = interp1d(self.CellCurrDensity,FC_Heat_produced,bounds_error=False,fill_value='extrapolate')   # Linear spline 1-D interpolation -> Operating current density - produced heat            
-            self.iwater = interp1d(self.CellCurrDensity,water,bounds_error=False,fill_value='extrapolate')              # Linear spline 1-D interpolation -> Operating current density - produced water            
-
         ####### Operational period
         self.state = parameters["state"]                           #on or off
         self.operational_period = parameters["operational_period"]
-        initial_day, final_day = self.operational_period.split(',')    #extract inital and final operational days
-        initial_day = pd.to_datetime(initial_day, format = '%d-%m')
-        final_day = pd.to_datetime(final_day, format = '%d-%m')
-        year = initial_day.year
-        operational_state = [] 
-        
-        for day in pd.date_range(start = pd.Timestamp(year=year,month=1,day=1), end = pd.Timestamp(year=year+1,month=1, day=1)):
-            if self.state == "on":                 
-                value = 0                                         #initialization
-                if day >= initial_day and day <= final_day:
-                    value = 1                                      #update if turned on 
-                operational_state.append((day, value))
-            elif self.state == "off":
-                 value = 1                                         #initialization
-                 if day >= initial_day and day <= final_day:
-                     value = 0                                    #update if turned off
-                 operational_state.append((day, value))
-        operational_state = pd.DataFrame(operational_state, columns=['Day', 'State'])
-        operational_state.set_index('Day', inplace=True)
-        frequency =  f'{self.timestep}min'
-        operational_state_freq = operational_state.resample(frequency).ffill().iloc[:-1,:]  #resample dataframe to simulation timestep
-        self.operational_state = np.tile(np.array(operational_state_freq['State']), int(self.timestep_number*self.timestep/c.MINUTES_YEAR)) #repeat for simulation years
+        self.operational_state  = operational_mask(self.operational_period,self.timestep,self.state,
+                                                   weekdays=parameters.get('operational_weekdays'),hours=parameters.get('operational_hours'),
+                                                   years=int(self.timestep_number*self.timestep/c.MINUTES_YEAR))    # [-] 1 on, 0 off at each step, repeated for simulation years
+     
+
+    def pem_general_voltage(self,CellCurrDensity,T):
+        """
+        Cell voltage contributions of the 'PEM General' model, evaluated on whole arrays
+    
+        CellCurrDensity : float or array cell current density [A/cm^2]
+        T : float or array operating temperature [K], broadcast against CellCurrDensity:
+            es. CellCurrDensity[:,None] and T[None,:] return (current x temperature) tables
+    
+        output : tuple of arrays, cell voltage = Ecell - Vact - Vohm
+            Ecell : open circuit voltage [V]
+            Vact : activation losses [V]
+            Vohm : ohmic losses [V]
+        """
+        j = np.asarray(CellCurrDensity)     # [A/cm^2]
+        
+        '1- Cell open curcuit voltage'
+        
+        pO2 = (self.FC_AirPress*0.21)/101325  # [atm] accounting for partial pressure of oxigen in air
+        pH2O = 1                              # [atm]
+        pH2 = self.FC_FuelPress/101325        # [atm]
+        
+        Ecell = 1.229 -0.85e-3*(T-298.15) + 4.3085e-5*T*ln(pH2*(pO2**0.5)/pH2O)  # [V] Open circuit voltage
+                                                    
+        '2- Activation losses'
+        Vact_cat = -self.Runiv*T*np.log10(self.FC_CathodeCurrDens)/(self.CTC*4*self.FaradayConst)+self.Runiv*T*np.log10(j)/(self.CTC*4*self.FaradayConst) #[V]
+        Vact_an = -self.Runiv*T*np.log10(self.FC_AnodeCurrDens)/(self.CTC*2*self.FaradayConst)+self.Runiv*T*np.log10(j)/(self.CTC*2.*self.FaradayConst)   #[V]
+  
+        Vact = Vact_cat +Vact_an               # [V] Activation losses
+   
+        '3- Ohmic losses'
+        rho_m = (181.6*(1+0.03*(j)+0.062*((T/303)**2)*(j)**2.5))/ \
+            ((self.Lambda-0.634-3*(j))*self.eNepero**(4.18*(T-303)/T))      #[Ohm*cm] specific membrane recistence
+      
+        Rm = rho_m*self.MembThickness/10000    # [Ohm/cm2]  Cell resistance depending on temperature and moisture content (Lambda) 
+ 
+        Vohm = j*Rm                            # [V] Ohmic losses
+        
+        return(Ecell,Vact,Vohm)
+
+    def pem_general_curves(self):
+        """
+        Polarization, efficiency and production curves of the 'PEM General' module.
+        They only depend on the module size and operating conditions: modules of the same size share them (see core/curves.py)
+    
+        output : dict {attribute name: value} curve tables and interpolating functions
+        """
+        'POLARIZATION CURVE'
+        
+        Ndatapoints     = 1000                  # Number of points used to compute the polarization curve 
+        CellCurrDensity = np.linspace(self.FC_MinCurrDens,self.FC_MaxCurrDens,Ndatapoints)   
+        
+        # V is obtained by summing 3 different contributions (concentration losses are considered to be negligible)
+        Ecell,Vact,Vohm = fuel_cell.pem_general_voltage(self,CellCurrDensity,self.FC_OperatingTemp)
+        CellVolt        = Ecell-Vact-Vohm                                    # [V]    Cell Voltage
+        
+        Vmin_FC     = CellVolt[-1]*self.nc                                   # [V]    Minimum value for working voltage
+        FC_CellArea = self.Npower*1000/(Vmin_FC*self.FC_MaxCurrDens)         # [cm^2] FC cell active area
+        Voltage     = CellVolt*self.nc                                       # [V] Module Voltage
+        iV1         = linear_interp(CellCurrDensity,Voltage,bounds_error=False,fill_value='extrapolate')    # Linear spline 1-D interpolation - MOdule Voltage
+        
+        # Creating the reverse curve IP - necessary to define the exact functioning point        
+        Current     = CellCurrDensity*FC_CellArea    # [A] Defining the current value: same both for the single cell and the full stack!
+        FC_power    = Current*Voltage/1000           # [kW] Power
+        P           = (iV1(CellCurrDensity)*Current)/1000    # [kW] Output power values varying current, resolving the equation system via interpolation
+        PI          = linear_interp(P,Current,bounds_error=False,fill_value='extrapolate')  # Interpolating function returning Current if interrogated with Power 
+        
+        'Single module electricity production'
+        
+        p_required          = FC_power                               # [kW] 
+        FC_CellCurrDensity  = PI(p_required)/FC_CellArea             # [A/cm^2] current density value at which the fuel cell is working 
+        Current_op          = FC_CellCurrDensity*FC_CellArea         # [A] FuelCell Stack operating current 
+        FC_Vstack           = iV1(FC_CellCurrDensity)                # [V] Stack operating voltage
+        V_cell              = FC_Vstack/self.nc                      # [V] Single cell operating voltage
+
+        'Computing FC efficiency and hydrogen energy demand'    
+        
+        pO2 = (self.FC_AirPress*0.21)/101325              # [atm]
+        pH2O = 1                                          # [atm]
+        pH2 = self.FC_FuelPress/101325                    # [atm]  
+        
+        deltaG = self.deltaG0 - self.Runiv*self.FC_OperatingTemp*ln(pH2*math.sqrt(pO2)/pH2O)/(2*self.FaradayConst)       # [kJ/mol] Gibbs free energy at actual conditions
+      
+        eta_voltage = FC_Vstack/(Ecell*self.nc)           # [-] Voltage efficiency 
+        eta_th      = - deltaG/self.HHVh2Mol              # [-] Thermodynamic efficiency
+        eta_module  = eta_th*eta_voltage                  # [-] FC efficiency
+
+        'Hydrogen demand'
      
+        FC_HydroCons     = (Current_op*self.nc/95719.25)/1000/self.rhoStdh2   # [kg/s]*[Sm3/kg] = [Sm3/s] (Chavan 2017)
+        hydrogen         = FC_HydroCons*self.rhoStdh2                         # [kg/s] consumed hydrogen
+        FC_deltaHydrogen = - hydrogen*self.HHVh2*1000                         # [kW]
+        
+        'Water production'
+        # water_produced = (hyd*self.h2oMolMass/self.H2MolMass)/self.rhoStdh2o            # [Sm3/s] stoichiometric amount
+        water = (((p_required*1000/(V_cell*2*self.FaradayConst))*self.h2oMolMass)/self.rhoStdh2o)*self.nc # [Sm3/s] module produced water floe rate https://onlinelibrary.wiley.com/doi/pdf/10.1002/9781118878330.app2
+        
+        'Process heat, that can be recovered'
+      
+        heat_loss        = 0.2 * (-FC_deltaHydrogen)      # Assuming 20% of energy losses                                                                            
+        FC_Heat_produced = ((1.481*self.nc)/FC_Vstack-1)*p_required -  heat_loss    # [kW] co-product heat
+        
+        return({'OCpotential'       : np.full(Ndatapoints,Ecell),       # [V] Open circuit voltage
+                'ActLosses'         : Ecell-Vact,                       # [V] Activation losses
+                'OhmLosses'         : CellVolt,                         # [V] Ohmic losses
+                'CellVolt'          : CellVolt,                         # [V]
+                'CellCurrDensity'   : CellCurrDensity,                  # [A/cm^2]
+                'Vmin_FC'           : Vmin_FC,                          # [V]
+                'FC_CellArea'       : FC_CellArea,                      # [cm^2]
+                'Voltage'           : Voltage,                          # [V]
+                'num'               : Ndatapoints,                      # [-] number of intervals to be considered for the interpolation
+                'x'                 : np.linspace(CellCurrDensity[0],CellCurrDensity[-1],Ndatapoints),    # [A/cm^2]
+                'iV1'               : iV1,
+                'iV2'               : linear_interp(CellCurrDensity,CellVolt,bounds_error=False,fill_value='extrapolate'),   # Linear spline 1-D interpolation - Cell Voltage
+                'Current'           : Current,                          # [A]
+                'MinPower'          : min(FC_power),                    # [kW]
+                'IP'                : linear_interp(Current,FC_power,bounds_error=False,fill_value='extrapolate'),
+                'P'                 : P,                                # [kW]
+                'PI'                : PI,
+                'Pi'                : linear_interp(P,CellCurrDensity,bounds_error=False,fill_value='extrapolate'),  # Interpolating function returning Current density if interrogated with Power 
+                'PV'                : linear_interp(P,Voltage,bounds_error=False,fill_value='extrapolate'),          # Interpolating function returning Voltage if interrogated with Power 
+                'Pv'                : linear_interp(P,CellVolt,bounds_error=False,fill_value='extrapolate'),         # Interpolating function returning Voltage if interrogated with Power 
+                'eta_module'        : eta_module,                       # [-]
+                'hydcons'           : hydrogen,                         # [kg/s]
+                'max_h2_module'     : max(hydrogen),                    # [kg/s] maximum amount of exploitable hydrogen for the considered module
+                'maxVolt_module'    : max(Voltage),                     # [V] maximum voltage of the considered module
+                'minVolt_module'    : min(Voltage),                     # [V] minimum voltage of the considered module
+                'thermal_eff_module': FC_Heat_produced[-1] / - FC_deltaHydrogen[-1],    # [-] Module thermal efficiency
+                'etaFuelCell'       : linear_interp(hydrogen,eta_module,bounds_error=False,fill_value='extrapolate'),          # Linear spline 1-D interpolation -> H2 consumption - FC efficiency
+                'h2P'               : linear_interp(hydrogen,p_required,bounds_error=False,fill_value='extrapolate'),          # Linear spline 1-D interpolation -> H2 consumption - produced electricity
+                'FC_Heat'           : linear_interp(hydrogen,FC_Heat_produced,bounds_error=False,fill_value='extrapolate'),    # Linear spline 1-D interpolation -> H2 consumption - produced heat
+                'water'             : linear_interp(hydrogen,water,bounds_error=False,fill_value='extrapolate'),               # Linear spline 1-D interpolation -> H2 consumption - produced water
+                'iEta'              : linear_interp(CellCurrDensity,eta_module,bounds_error=False,fill_value='extrapolate'),   # Linear spline 1-D interpolation -> Operating current density - efficiency
+                'IEta'              : linear_interp(Current,eta_module,bounds_error=False,fill_value='extrapolate'),           # Linear spline 1-D interpolation -> Operating current - efficiency
+                'ihyd'              : linear_interp(CellCurrDensity,hydrogen,bounds_error=False,fill_value='extrapolate'),     # Linear spline 1-D interpolation -> Operating current density - H2 consumption
+                'Ihyd'              : linear_interp(Current,hydrogen,bounds_error=False,fill_value='extrapolate'),             # Linear spline 1-D interpolation -> Operating current - H2 consumption
+                'iHeat'             : linear_interp(CellCurrDensity,FC_Heat_produced,bounds_error=False,fill_value='extrapolate'),     # Linear spline 1-D interpolation -> Operating current density - produced heat            
+                'IHeat'             : linear_interp(Current,FC_Heat_produced,bounds_error=False,fill_value='extrapolate'),     # Linear spline 1-D interpolation -> Operating current - produced heat            
+                'iwater'            : linear_interp(CellCurrDensity,water,bounds_error=False,fill_value='extrapolate'),        # Linear spline 1-D interpolation -> Operating current density - produced water            
+                'Iwater'            : linear_interp(Current,water,bounds_error=False,fill_value='extrapolate')})               # Linear spline 1-D interpolation -> Operating current - produced water            
+
+    def sofc_voltage(self,CellCurrDensity,T):
+        """
+        Cell voltage contributions of the 'SOFC' model, evaluated on whole arrays
+    
+        CellCurrDensity : float or array cell current density [A/cm^2]
+        T : float or array operating temperature [K], broadcast against CellCurrDensity:
+            es. CellCurrDensity[:,None] and T[None,:] return (current x temperature) tables
+    
+        output : tuple of arrays, cell voltage = Ecell - DeltaV_ohm - DeltaV_con
+            Ecell : open circuit voltage [V]
+            DeltaV_ohm : ohmic losses [V]
+            DeltaV_con : concentration losses [V]
+        """
+        j = np.asarray(CellCurrDensity)     # [A/cm^2]
+        
+        pH2 = self.FC_FuelPress/101325                  # [atm]
+        pH2O = 1                                        # [atm]
+        pO2 = (self.FC_AirPress*0.21*101325)/101325     # [atm]
+        
+        ExchangeCurrDensCathode = self.FC_ExchangeCurrDensChCat*self.eNepero**(((self.FC_ActivationCoeff*self.FC_ActivationEnergyCathode)\
+                                  /self.Runiv)*((1/self.FC_RefTemp)-(1/T)))                                   # [mA/cm^2]
+    
+        '1 - Open circuit potential'                
+        
+        Ecell = 1.19 + ((self.Runiv*T)/(2*self.FaradayConst))*ln(pH2*(pO2**0.5)/pH2O)  # [V] Open circuit voltage
+
+        '2 - Ohmic losses'
+        
+        DeltaV_ohm = (j*self.ThicknessElectrolyte*T)/\
+                     (9000*self.eNepero**(-100000/(self.Runiv*T)))                   # [V] (100000 activation energy in [kJ/mol], 9000 electrolyte constant)
+       
+        '3 - Concentration losses'   # Significant losses only for cathode, activation losses (minimal contribution for SOFC) are also present in the following formula
+        
+        DeltaV_con = ((self.Runiv*T)/(2*self.FaradayConst))*\
+                     ln((j/(ExchangeCurrDensCathode*self.FC_AirPress*(0.21-0.0008*10000*j*self.Runiv*T/(4*self.FaradayConst*101325*0.00002)))))        # [V] 
+        
+        return(Ecell,DeltaV_ohm,DeltaV_con)
+
+    def sofc_curves(self):
+        """
+        Polarization, efficiency and production curves of the 'SOFC' module.
+        They only depend on the module size and operating conditions: modules of the same size share them (see core/curves.py)
+    
+        output : dict {attribute name: value} curve tables and interpolating functions
+        """
+        'POLARIZATION CURVE'
+        
+        Ndatapoints     = 1000                  # Number of points used to compute the polarization curve 
+        CellCurrDensity = np.linspace(self.FC_MinCurrDens,self.FC_MaxCurrDens,Ndatapoints)  
+        
+        # V is obtained by summing 4 different contributions 
+        Ecell,DeltaV_ohm,DeltaV_con = fuel_cell.sofc_voltage(self,CellCurrDensity,self.FC_OperatingTemp)
+        CellVoltage     = Ecell-DeltaV_ohm-DeltaV_con                           # [V]    Cell voltage
+            
+        Vmin_FC_stack   = CellVoltage[-1]*self.nc                               # [V]    Minimum value for working voltage
+        FC_CellArea     = self.Npower*1000/(Vmin_FC_stack*self.FC_MaxCurrDens)  # [cm^2] FC cell active area
+        Voltage         = self.nc*CellVoltage                                   # [V]    Stack voltage
+        iV1             = linear_interp(CellCurrDensity,Voltage,bounds_error=False,fill_value='extrapolate')          # Linear spline 1-D interpolation
+        
+        # Creating the reverse curve IP - necessary to define the exact functioning point
+        Current         = CellCurrDensity*FC_CellArea
+        FC_power        = Current*Voltage/1000                                  # [kW] Power
+        P               = (iV1(CellCurrDensity)*Current)/1000                   # [kW] power output 
+        PI              = linear_interp(P,Current,bounds_error=False,fill_value='extrapolate')   # Interpolating function returning Current if interrogated with Power 
+
+        'Single module electricity production'
+        
+        p_required          = FC_power                              # [kW] power production               
+        FC_CellCurrDensity  = PI(p_required)/FC_CellArea            # [A/cm^2] current density value at which the fuel cell is working 
+        Current_op          = FC_CellCurrDensity*FC_CellArea        # [A] FuelCell Stack operating current
+        FC_Vstack           = iV1(FC_CellCurrDensity)               # [V] Stack operating voltage
+
+        'Computing FC efficiency and hydrogen energy demand'    
+        
+        eta_voltage = FC_Vstack/(Ecell*self.nc)     # [-] Voltage efficiency 
+        eta_th = self.deltaG0/self.HHVh2Mol         # [-] Thermodynamic efficiency
+        eta_module = -eta_th*eta_voltage            # [-] FC efficiency
+        
+        'Hydrogen demand'
+        FC_HydroCons = ((Current_op*self.nc)/(self.FaradayConst*1000))/(self.rhoStdh2)  # [kg/s]*[Sm3/kg] = [Sm3/s] 
+        hydrogen = FC_HydroCons*self.rhoStdh2                                           # [kg/s]
+        FC_deltaHydrogen = - hydrogen*self.HHVh2*1000                                   # [kW]
+        
+        'Air demand'     
+        FC_AirCons       = ((self.AirMolMass*1000*p_required/\
+                             (self.FaradayConst*2*FC_Vstack/self.nc))*self.stoichiometriccoeff)         #[kg/s] air consumption
+        FC_O2Cons        = FC_AirCons*0.2319                                                            #[kg/s] oxygen consumption, taken from the air 
+        
+        'Air exit flow rate'
+        FC_AirExit = FC_AirCons-FC_O2Cons       #[kg/s] hourly outgoing air mass flow rate 
+ 
+        'Water production'
+        water = (hydrogen*self.h2oMolMass/self.H2MolMass)/self.rhoStdh2o            # [m^3/s] stoichiometric amount
+        # water_produced = ((p_required*1000/(V_cell*2*self.FaradayConst))*self.h2oMolMass)/self.rhoStdh2o # [Sm3/s] of produced water https://onlinelibrary.wiley.com/doi/pdf/10.1002/9781118878330.app2
+        #!!! '[...] if methane is internally reformed, then half the product water is used in the reformation process, thus halving the rate of production https://onlinelibrary.wiley.com/doi/pdf/10.1002/9781118878330.app2
+    
+        'Steam produced'
+        FC_H20Produced = hydrogen+FC_O2Cons                 #[kg/s] steam produced
+        
+        'Heat contained in anodic and cathodic flow'
+        FC_HeatH20 = FC_H20Produced*self.SteamSH                                    #[kW] heat in the steam flow exiting the anode
+        FC_HeatAir = FC_AirExit*self.cpAir*(self.FC_OperatingTemp-self.AmbTemp)     #[kW] heat in the air flow exiting the cathode
+        FC_Heat_produced = FC_HeatH20+FC_HeatAir                                    #[kW] net heat available for cogeneration
+
+        return({'DeltaV_ohm'        : DeltaV_ohm,                       # [V] Ohmic losses
+                'DeltaV_con'        : DeltaV_con,                       # [V] Concentration losses
+                'Ecell'             : np.full(Ndatapoints,Ecell),       # [V] Open circuit voltage
+                'CellVoltage'       : CellVoltage,                      # [V]
+                'CellCurrDensity'   : CellCurrDensity,                  # [A/cm^2]
+                'Vmin_FC_stack'     : Vmin_FC_stack,                    # [V]
+                'FC_CellArea'       : FC_CellArea,                      # [cm^2]
+                'Voltage'           : Voltage,                          # [V]
+                'num'               : Ndatapoints,                      # [-] number of intervals to be considered for the interpolation
+                'x'                 : np.linspace(CellCurrDensity[0],CellCurrDensity[-1],Ndatapoints),    # [A/cm^2]
+                'iV1'               : iV1,
+                'Current'           : Current,                          # [A]
+                'MinPower'          : min(FC_power),                    # [kW]
+                'IP'                : interp1d(Current,FC_power,kind='cubic',bounds_error=False,fill_value='extrapolate'),
+                'P'                 : P,                                # [kW]
+                'PI'                : PI,
+                'eta_module'        : eta_module,                       # [-]
+                'max_h2_module'     : max(hydrogen),                    # [kg/s] maximum amount of exploitable hydrogen for the considered module
+                'thermal_eff_module': FC_Heat_produced[-1] / - FC_deltaHydrogen[-1],    # [-] Module thermal efficiency
+                'etaFuelCell'       : linear_interp(hydrogen,eta_module,bounds_error=False,fill_value='extrapolate'),          # Linear spline 1-D interpolation -> H2 consumption - FC efficiency
+                'h2P'               : linear_interp(hydrogen,p_required,bounds_error=False,fill_value='extrapolate'),          # Linear spline 1-D interpolation -> H2 consumption - produced electricity
+                'FC_Heat'           : linear_interp(hydrogen,FC_Heat_produced,bounds_error=False,fill_value='extrapolate'),    # Linear spline 1-D interpolation -> H2 consumption - produced heat
+                'water'             : linear_interp(hydrogen,water,bounds_error=False,fill_value='extrapolate'),               # Linear spline 1-D interpolation -> H2 consumption - produced water
+                'iEta'              : linear_interp(CellCurrDensity,eta_module,bounds_error=False,fill_value='extrapolate'),   # Linear spline 1-D interpolation -> Operating current density - efficiency
+                'ihyd'              : linear_interp(CellCurrDensity,hydrogen,bounds_error=False,fill_value='extrapolate'),     # Linear spline 1-D interpolation -> Operating current density - H2 consumption
+                'iHeat'             : linear_interp(CellCurrDensity,FC_Heat_produced,bounds_error=False,fill_value='extrapolate'),     # Linear spline 1-D interpolation -> Operating current density - produced heat            
+                'iwater'            : linear_interp(CellCurrDensity,water,bounds_error=False,fill_value='extrapolate')})       # Linear spline 1-D interpolation -> Operating current density - produced water            
 
 #%%                     
     def plot_polarizationpts(self):
@@ -916,8 +880,53 @@ class fuel_cell:
                 etaFC   = self.EFF[step]
                 water   = water_full + water_singlemodule       # [m^3/s] produced water
                 
-        return (hyd,power,FC_Heat,etaFC,water)  # return hydrogen absorbed [kg/s] electricity required [kW] and heat [kW] and water [Sm3] as a co-products 
-        
+        return (hyd,power,FC_Heat,etaFC,water)  # return hydrogen absorbed [kg/s] electricity required [kW] and heat [kW] and water [Sm3] as a co-products
+
+    def use_series(self,p):
+        """
+        Fuel cell operation for the whole simulation at once, when the electricity required is known in advance ('simple' model only).
+        Working points are the same linear map of .use() evaluated on the whole array, available hydrogen is considered unbounded:
+        steps in which the available hydrogen binds, found comparing the hydrogen consumption series with the available one,
+        are computed again with .use() (see series_step).
+
+        p : array electricity balance seen by the fuel cell at each timestep [kW], < 0 power required from the system
+
+        output : tuple of arrays hydrogen absorbed [kg/s] (-), electricity [kW] and heat [kW] supplied (+), efficiency [-] and water produced [Sm3/s]
+        """
+        if self.model != 'simple':
+            raise ValueError(f"Fuel cell operation can't be computed for the whole simulation at once with model {self.model}.\n\
+            Options to fix the problem: \n\
+                (a) - Use .use() at each step \n\
+                (b) - Select 'simple' 'stack model' in studycase.json")
+
+        p       = np.asarray(p,dtype=float)
+        on      = self.operational_state[:len(p)] == 1                  # [-] steps in which the fuel cell is turned on as for planned operation schedule
+        power   = np.minimum(np.where(on,-p,0),self.Npower)             # [kW] electricity supplied
+        FC_hyd  = power / self.h2p_el_eff_in                            # [kW] hydrogen power input
+        hyd     = power/(self.h2p_el_eff_in*c.HHVH2*1000)               # [kg/s] hydrogen needed for the given output power
+        FC_Heat = FC_hyd * self.h2p_th_eff_in                           # [kW] thermal power output
+        water   = (hyd*(self.h2oMolMass/self.H2MolMass))/self.rhoStdh2o # [Sm3/s] stoichiometric water production
+        etaFC   = np.full(len(p),self.h2p_el_eff_in)                    # [-]
+
+        self.series = {'p': p, 'flows': (-hyd,power,FC_Heat,etaFC,water), 'bound': hyd}
+        return(self.series['flows'])
+
+    def series_step(self,step,p,available_hyd):
+        """
+        Fuel cell operation at step from the series computed by .use_series(), if the required electricity is the one of the series
+        and the hydrogen consumed is available
+
+        step : int step to be simulated
+        p : float < 0 power required from the system [kW]
+        available_hyd : float available hydrogen in the system at the considered step [kg]
+
+        output : tuple hydrogen absorbed [kg/s], electricity [kW] and heat [kW] supplied, efficiency [-] and water produced [Sm3/s]
+                 or None if the available hydrogen binds or the required electricity differs: the step must be computed with .use()
+        """
+        if p == self.series['p'][step] and self.series['bound'][step] <= available_hyd/(self.timestep*60):
+            return(tuple(series[step] for series in self.series['flows']))
+        return(None)
+
                 
     def use1(self,step,p,available_hydrogen):
          
@@ -1055,73 +1064,10 @@ class fuel_cell:
             water (float): Amount of water produced in standard cubic meters per second, adjusted for ageing
         
         This function updates the fuel cell's polarization curve to reflect degradation and utilizes this curve 
-        to determine new operational parameters, including hydrogen production rate. It also performs degradation 
-        rate calculations using polynomial fitting on log-transformed data and updates internal tracking of 
-        module efficiency and polarization curve history.
+        to determine new operational parameters, including hydrogen production rate. Every week the degradation 
+        rate is evaluated with the load profile - degradation rate model fitted once per process (fuel_cell.deg_rate) 
+        and the internal tracking of module efficiency and polarization curve history is updated.
         """
-        def deg_rate(self,φ,plot=True):
-            """
-            Estimates the degradation rate of a FuelCell based on the load profile value (φ) using a polynomial fit on log-transformed data.
-            Optionally plots the data with the fitting curve and displays the goodness of fit (R²).
-
-            φ: Load profile characteristic value(s) for which degradation rate is calculated.
-            plot: If True, plots the fitting results.
-
-            Returns the estimated degradation rate using the exponential of the fitted polynomial.
-            """
-            
-            # experimental dataset linking characteristic load profile value and degradation rate
-            # ref. https://doi.org/10.1016/j.ijhydene.2017.02.146
-            dataset = { 
-                        'φ': np.array([1,1,1,1,1,3,4.3,5,7,7.5,9.2,9]),                 # [-] load profile characteristic value
-                        'φ°':np.array([4,1,2,11,6,50,50,75,200,300,260,400])            # [μV/h]  voltage decrease - degradation rate
-                        }
-            
-            # Aggregate the data by averaging the φ° values for each unique φ
-            unique_phi      = np.unique(dataset['φ'])
-            average_phi_dot = np.array([np.mean(dataset['φ°'][dataset['φ'] == val]) for val in unique_phi])
-            
-            # Log transformation of the output to ensure positivity
-            average_phi_dot_log = np.log(average_phi_dot)  # applying log function to dataset
-            
-            degree  = 3  # choosing the degree for the interpolating polynomial function
-            
-            coefficients = np.polyfit(unique_phi,average_phi_dot_log,degree)  # fitting log of data series
-            polynomial = np.poly1d(coefficients) # interpolating function creatio
-            
-            def exp_poly(x):
-                """
-                Applies the exponential function to the polynomial model's output to transform it back to the original scale.
-                x: Input value(s) for which to calculate the degradation rate.
-                Returns the exponential of the polynomial model's output, ensuring all values are non-negative.
-                """
-                return np.exp(polynomial(x))  # expanding result to return o the original scale
-            
-            φ_d     = exp_poly(φ)               # [μV/h] interpolated and transformed value
-            φ_dot   = φ_d*(1e-6)/60             # [V/min] measure units conversion 
-            
-            if plot == True and step == 0:
-                # test
-                phi_new = np.linspace(min(unique_phi), max(unique_phi), 1000)
-                phi_dot_pred = exp_poly(phi_new)
-                
-                # Calculate R²
-                residuals = average_phi_dot_log - polynomial(unique_phi)
-                ss_res = np.sum(residuals**2)
-                ss_tot = np.sum((average_phi_dot_log - np.mean(average_phi_dot_log))**2)
-                r_squared = 1 - (ss_res / ss_tot)
-                
-                # Plotting
-                plt.scatter(unique_phi, average_phi_dot, label='Averaged Data')
-                plt.plot(phi_new, phi_dot_pred, color='red', label='Approximating Polynomial (Exp Transformed)')
-                plt.xlabel('φ [-]')
-                plt.ylabel('φ° [μV/h]')
-                plt.title(f'Log-Transformed Polynomial Interpolation (R²={r_squared:.4f})')
-                plt.legend()
-                plt.show()
-
-            return φ_dot
-        
         'Parameters definition'
         # k1 and k2 are the constants to be used in the weight functions for voltage and current characteristic values.
         # It is recommended to use values of k1 >= 25 and k2 >= 5 for model accuracy.
@@ -1135,9 +1081,7 @@ class fuel_cell:
             iop_id      = 0
             v_op        = 0
             operation   = False
-        else:           # if the fuel cell has been activated at current step
-            self.stack['Activation[-]'][step] = 1
-            
+        else:           # if the fuel cell has been activated at current step (counters updated after the weekly ageing computation)
             'Ideal behaviour' 
             iop_id    = self.Pi(power)      # [A/cm^2] module operating ideal current density based on system power output
             Iop_id    = self.PI(power)      # [A] module operating ideal current based on system power output
@@ -1148,12 +1092,10 @@ class fuel_cell:
             H2Oop_id  = self.Iwater(Iop_id) # [Sm3/s] module operating water production based on system power output
             operation = True
         
-        ageing_factor_rated = max(self.polarization_curve_ageing)/max(self.Voltage) # [-] ageing factor for functioning at rated power
-        self.stack['Conversion_ratio_rated[kWh/kg]'][step]  = self.Γ*ageing_factor_rated
+        self.stack['Conversion_ratio_rated[kWh/kg]'][step]  = self.Γ*self.ageing_factor_rated
         # link between current and module voltage: polarization curve
         if operation == True:  # if fuel cell is working in current step
-            IV_new   = interp1d(self.Current,self.polarization_curve_ageing) # Linear spline 1-D interpolation - updating I-V function for ageing effect
-            V_op                = IV_new(Iop_id)       # [V] operational voltage accounting for ageing effect 
+            V_op                = self.IV_ageing(Iop_id)  # [V] operational voltage accounting for ageing effect 
             v_op                = V_op/self.nc      # [V] operational cell voltage accountig for ageing
             ageing_factor_op    = V_op/Vop_id     # [-] ageing factor expressed as the ratio between operational and ideal voltage for the considered current. Numerator decreases over time
             hyd_consumption     = H2op_id/ageing_factor_op                      # [kg/s] hydrogen consumption in operative conditions accounting for ageing effects
@@ -1162,7 +1104,7 @@ class fuel_cell:
             water               = H2Oop_id//ageing_factor_op            # [Sm^3/s] water production
             self.stack['Conversion_ratio_op[kWh/kg]'][step]     = self.Γ*ageing_factor_op                
             hyd_cons            = self.hydcons/ageing_factor_op
-            self.hydP           = interp1d(hyd_cons,self.P)     # updating interpolation function used in h2power function
+            self.hydP           = linear_interp(hyd_cons,self.P)     # updating interpolation function used in h2power function
         else:
             hyd_consumption     = 0
             power               = 0
@@ -1182,7 +1124,8 @@ class fuel_cell:
             load_V = self.stack['v_op[V]'][start_index:step]
         
             # operating time counter
-            operation_time  = sum(self.stack['Activation[-]'][start_index:step]) # number of timesteps the fuel cell has been operating
+            operation_time  = self.stack['operating_steps']-self.stack['week_start_steps'] # number of timesteps the fuel cell has been operating
+            self.stack['week_start_steps'] = self.stack['operating_steps']
             
             if operation_time != 0:
 
@@ -1314,16 +1257,22 @@ class fuel_cell:
                 ## characteristic value of load
                 self.φ = self.m_curr*self.m_vol
                 
-                V_deg       = deg_rate(self,self.φ)                 # [V/min]  voltage decrease in the considered period - degradation rate
+                V_deg       = fuel_cell.deg_rate(self,self.φ)       # [V/min]  voltage decrease in the considered period - degradation rate
                 V_operation = V_deg*(operation_time*self.timestep)  # [V] voltage loss for the single fc cell due to operational conditions in the considered period
                 
-                # updating polarization curve
+                # updating polarization curve: uniform shift, its maximum and the rated ageing factor are updated as scalars
                 self.polarization_curve_ageing -= V_operation*self.nc  # [V] self.Voltage represents the design polarization curve
+                self.curve_offset   += V_operation*self.nc             # [V] total module voltage loss
+                V_max_ageing        = self.V_max-self.curve_offset     # [V] max(self.polarization_curve_ageing)
+                self.ageing_factor_rated = V_max_ageing/self.V_max     # [-] ageing factor for functioning at rated power
+                self.IV_ageing      = linear_interp(self.Current,self.polarization_curve_ageing) # Linear spline 1-D interpolation - updating I-V function for ageing effect
     
                 # limit on degradation for single cell voltage reached
-                if max(self.polarization_curve_ageing-V_operation*self.nc)/self.nc > self.CellVoltage_limit:
+                if (V_max_ageing-V_operation*self.nc)/self.nc > self.CellVoltage_limit:
                     print('Electorlyzer module voltage exceeds safe limits due to ageing. Module must be replaced')
             
+        if operation == True:
+            fuel_cell.activate(self,step,power)
         self.stack['hydrogen_consumption[kg/s]'][step]           = hyd_consumption  # [kg/s]    hydrogen consumption in the timestep
         
         if step % self.timesteps_year == 0:
@@ -1332,6 +1281,96 @@ class fuel_cell:
             print(f'Year {int(step/self.timesteps_year)}')
         
         return hyd_consumption,power,P_th,eta,water
+
+    def deg_rate_fit():
+        """
+        Fits the load profile - degradation rate model on the experimental dataset: third degree polynomial on log-transformed data.
+        It does not depend on the fuel cell parameters, so it is built once per process through core.curves.curve_table
+
+        output : dict 'polynomial': np.poly1d fitted on log(φ°)
+                      'unique_phi': np.ndarray [-] load profile characteristic values of the dataset
+                      'average_phi_dot': np.ndarray [μV/h] degradation rates averaged for each unique φ
+                      'r_squared': float [-] goodness of fit on log-transformed data
+        """
+        # experimental dataset linking characteristic load profile value and degradation rate
+        # ref. https://doi.org/10.1016/j.ijhydene.2017.02.146
+        dataset = {
+                    'φ': np.array([1,1,1,1,1,3,4.3,5,7,7.5,9.2,9]),                 # [-] load profile characteristic value
+                    'φ°':np.array([4,1,2,11,6,50,50,75,200,300,260,400])            # [μV/h]  voltage decrease - degradation rate
+                    }
+
+        # Aggregate the data by averaging the φ° values for each unique φ
+        unique_phi      = np.unique(dataset['φ'])
+        average_phi_dot = np.array([np.mean(dataset['φ°'][dataset['φ'] == val]) for val in unique_phi])
+
+        # Log transformation of the output to ensure positivity
+        average_phi_dot_log = np.log(average_phi_dot)  # applying log function to dataset
+
+        degree  = 3  # choosing the degree for the interpolating polynomial function
+
+        coefficients = np.polyfit(unique_phi,average_phi_dot_log,degree)  # fitting log of data series
+        polynomial = np.poly1d(coefficients) # interpolating function creation
+
+        # Calculate R²
+        residuals = average_phi_dot_log - polynomial(unique_phi)
+        ss_res = np.sum(residuals**2)
+        ss_tot = np.sum((average_phi_dot_log - np.mean(average_phi_dot_log))**2)
+
+        return {'polynomial': polynomial,
+                'unique_phi': unique_phi,
+                'average_phi_dot': average_phi_dot,
+                'r_squared': float(1 - (ss_res / ss_tot))}
+
+    def deg_rate(self,φ,plot=False):
+        """
+        Estimates the degradation rate of a FuelCell based on the load profile value (φ) using the exponential of the
+        polynomial fitted once on log-transformed data (fuel_cell.deg_rate_fit).
+        Optionally plots the data with the fitting curve and displays the goodness of fit (R²).
+
+        φ : float or np.ndarray load profile characteristic value(s) for which degradation rate is calculated
+        plot : bool if True, plots the fitting results
+
+        output : float or np.ndarray [V/min] estimated degradation rate
+        """
+        polynomial  = self.deg_model['polynomial']
+        φ_d         = np.exp(polynomial(φ))     # [μV/h] interpolated value, expanding result to return to the original scale
+        φ_dot       = φ_d*(1e-6)/60             # [V/min] measure units conversion
+
+        if plot == True:
+            unique_phi   = self.deg_model['unique_phi']
+            phi_new      = np.linspace(min(unique_phi), max(unique_phi), 1000)
+            phi_dot_pred = np.exp(polynomial(phi_new))
+
+            # Plotting
+            plt.scatter(unique_phi, self.deg_model['average_phi_dot'], label='Averaged Data')
+            plt.plot(phi_new, phi_dot_pred, color='red', label='Approximating Polynomial (Exp Transformed)')
+            plt.xlabel('φ [-]')
+            plt.ylabel('φ° [μV/h]')
+            plt.title(f"Log-Transformed Polynomial Interpolation (R²={self.deg_model['r_squared']:.4f})")
+            plt.legend()
+            plt.show()
+
+        return φ_dot
+
+    def activate(self,step,power):
+        """
+        Update the running counters of the fuel cell operating at the considered step.
+        The fuel cell can be activated more than once in the same step: it is counted once and its produced energy is replaced.
+        
+        step : int step to be simulated
+        power : float electricity produced [kW]
+        """
+        if self.stack['last_active_step'] == step:          # already activated in this step
+            self.stack['energy[kWh]'] -= self.stack['step_energy[kWh]']
+        else:
+            self.stack['operating_steps'] += 1
+            if self.stack['last_active_step'] != step-1:    # fuel cell off at the previous step: new thermal cycle
+                self.stack['thermal_cycles'] += 1
+            self.stack['last_active_step'] = step
+        self.stack['step_energy[kWh]']  = power*self.timestep/60   # [kWh]
+        self.stack['energy[kWh]']      += self.stack['step_energy[kWh]']
+        if self.record_history:
+            self.stack['Activation[-]'][step] = 1
     
     def tech_cost(self,tech_cost):
         """
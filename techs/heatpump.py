@@ -1,6 +1,6 @@
 import numpy as np
 from core import constants as c
-from scipy.interpolate import interp1d
+from core.interpolation import linear_interp
 
 class heatpump:
     
@@ -65,7 +65,7 @@ class heatpump:
             #self.C_p3000 = [1.726798023	,-74.34272731	,74.46650928	,-2.079362567	,2.915533504,	-0.934003915,	-0.018207035,	0.036409513,	-0.024701877,	0.008844176]
             #self.C_q3000 = [10442.69118	,374.0860539,	-71.42510762,	4.970490623	,-2.285688038,	-0.161289545	,0.023442599	,-0.029741993	,-0.005992321,	-0.000337462]
 
-            self.tc_max=interp1d([-32,-25,-8,21,27],[35,47,65,65,60]) # t_amb and t_water_out working range
+            self.tc_max=linear_interp([-32,-25,-8,21,27],[35,47,65,65,60]) # t_amb and t_water_out working range
         
             self.pinch_air=10  # pinch air
             self.overH=5       # overheating air
@@ -79,7 +79,7 @@ class heatpump:
             self.f_regulation_Pele = np.poly1d(p)            
             X=np.linspace(0.1,1,1000)
             Y=self.f_regulation_Pele (X)
-            self.f_regulation_Pth  = interp1d(X * Y, Y)            
+            self.f_regulation_Pth  = linear_interp(X * Y, Y)            
             self.Pth_min_regulation= 0.15*self.f_regulation_Pele(0.15)
             
             # size factor
@@ -224,6 +224,34 @@ class heatpump:
                             
             return(-p_ele_hp, p_th_hp, p_th_i_TES)
                                         
+        def get_state(self,step):
+            """
+            Heat pump and inertial TES state at the beginning of step, to restart the simulation from there
+            
+            step: int step at which the simulation will be restarted
+            
+            output : dict picklable heat pump state
+            """
+            return({'step'                  : step,
+                    'mode'                  : self.mode,
+                    'i_TES_t'               : self.i_TES_t,                         # [C°] inertial TES temperature
+                    'i_TES_story'           : self.i_TES_story[:step].copy(),
+                    'satisfaction_story'    : self.satisfaction_story[:step].copy(), # the last 48 hours are needed to switch off the heat pump
+                    'cop_story'             : self.cop_story[:step].copy()})
+        
+        def set_state(self,state):
+            """
+            Restore a heat pump state saved with get_state()
+            
+            state: dict heat pump state
+            """
+            step = state['step']
+            self.mode                       = state['mode']
+            self.i_TES_t                    = state['i_TES_t']
+            self.i_TES_story[:step]         = state['i_TES_story']
+            self.satisfaction_story[:step]  = state['satisfaction_story']
+            self.cop_story[:step]           = state['cop_story']
+                                        
         def tech_cost(self,tech_cost):
             """
             Parameters
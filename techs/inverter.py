@@ -1,5 +1,8 @@
 import numpy as np
-from scipy.interpolate import interp1d
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding interpolation module path
+from core.interpolation import linear_interp
 
 class inverter:
 
@@ -30,7 +33,7 @@ class inverter:
         x=np.array([0,2.5,5,10,20,30,50,100])/100
         y_ref=np.array([0,70,82,89,92,94,96.5,92])/100
         y = y_ref * self.eta_max/max(y_ref) 
-        self.eta = interp1d(x, y)
+        self.eta = linear_interp(x, y)
         
         
     def use(self,h,e):
@@ -108,46 +108,24 @@ class mhhc_compressor:
         'Absorption'
 
         self.Npoints = 30
-
-        self.conc_abs = np.zeros(self.Npoints)
-
-        for i in range(0,self.Npoints):
-
-            if 0<=i<=9:                     # ALPHA PHASE
-                self.conc_abs[i]=self.A_alfaABS*((self.pressione_abs_data[i])**(self.Gamma_alfaABS/2))*e**((-self.Gamma_alfaABS*self.V_alfaABS*self.pressione_abs_data[i])/(c.R_UNIVERSAL*self.ABS_Temp))*e**((-self.Gamma_alfaABS*self.Enthalpy_alfa_ABS)/(c.R_UNIVERSAL*self.ABS_Temp))
-            elif 10<=i<=25:                 # BETA + ALPHA PHASE
-                self.conc_abs[i]=self.Conc_media+(1/(self.SlopeFactor))*(ln(self.pressione_abs_data[i])+(self.DeltaH_formazione_ABS/(c.R_UNIVERSAL*self.ABS_Temp))-(self.DeltaS_formazione_ABS/(c.R_UNIVERSAL)))
-            elif 26<=i<=30:                 # BETA PHASE
-                self.conc_abs[i]=self.A_beta_ABS*((self.pressione_abs_data[i])**(self.Gamma_betaABS/2))*e**((-self.Gamma_betaABS*self.V_betaABS*self.pressione_abs_data[i])/(c.R_UNIVERSAL*self.ABS_Temp))*e**((-self.Gamma_betaABS*self.Enthalpy_beta_ABS)/(c.R_UNIVERSAL*self.ABS_Temp))
+        P_abs = self.pressione_abs_data     # [bar] points 0-9 alpha phase, 10-25 beta + alpha phase, 26-29 beta phase
+        self.conc_abs = np.concatenate((self.A_alfaABS*((P_abs[:10])**(self.Gamma_alfaABS/2))*e**((-self.Gamma_alfaABS*self.V_alfaABS*P_abs[:10])/(c.R_UNIVERSAL*self.ABS_Temp))*e**((-self.Gamma_alfaABS*self.Enthalpy_alfa_ABS)/(c.R_UNIVERSAL*self.ABS_Temp)),
+                                        self.Conc_media+(1/(self.SlopeFactor))*(ln(P_abs[10:26])+(self.DeltaH_formazione_ABS/(c.R_UNIVERSAL*self.ABS_Temp))-(self.DeltaS_formazione_ABS/(c.R_UNIVERSAL))),
+                                        self.A_beta_ABS*((P_abs[26:])**(self.Gamma_betaABS/2))*e**((-self.Gamma_betaABS*self.V_betaABS*P_abs[26:])/(c.R_UNIVERSAL*self.ABS_Temp))*e**((-self.Gamma_betaABS*self.Enthalpy_beta_ABS)/(c.R_UNIVERSAL*self.ABS_Temp))))
 
         self.conc_abs=np.sort(self.conc_abs)
 
         'Curve smooth visualization'
 
-        self.conc_abs_smooth= np.zeros(self.Npoints)  # aggiunta del coefficiente correttivo coeff
-
-        for i in range(0,self.Npoints):
-            if 0<=i<=7:
-                self.conc_abs_smooth[i]=self.conc_abs[i]
-            elif 8<=i<=9:
-                self.conc_abs_smooth[8]=self.conc_abs[8]+coeff
-                self.conc_abs_smooth[9]=self.conc_abs[9]
-            elif i>=10:
-                self.conc_abs_smooth[i]=self.conc_abs[i]
+        self.conc_abs_smooth    = self.conc_abs.copy()
+        self.conc_abs_smooth[8] = self.conc_abs[8]+coeff    # aggiunta del coefficiente correttivo coeff
 
         'Desorption'
 
-        self.conc_des=np.zeros(self.Npoints)
-
-        for i in range(0, self.Npoints):
-
-            if 0<=i<=6:
-                self.conc_des[i]=self.A_alfa_DES*((self.pressione_des_data[i])**(self.Gamma_alfaDES/2))*e**((-self.Gamma_alfaDES*self.V_alfaDES*self.pressione_des_data[i])/(c.R_UNIVERSAL*self.DES_Temp))*e**((-self.Gamma_alfaDES*self.Enthalpy_alfa_DES)/(c.R_UNIVERSAL*self.DES_Temp))
-            elif 7<=i<=22:
-                self.conc_des[i]=self.Conc_media+(1/(self.SlopeFactor))*(ln(self.pressione_des_data[i])+(self.DeltaH_formazione_DES/(c.R_UNIVERSAL*self.DES_Temp))-(self.DeltaS_formazione_DES/(c.R_UNIVERSAL)))
-            elif 23<=i<=30:
-                self.conc_des[i]=self.A_beta_DES*((self.pressione_des_data[i])**(self.Gamma_betaDES/2))*e**((-self.Gamma_betaDES*self.V_betaDES*self.pressione_des_data[i])/(c.R_UNIVERSAL*self.DES_Temp))*e**((-self.Gamma_betaDES*self.Enthalpy_beta_DES)/(c.R_UNIVERSAL*self.DES_Temp))
-
+        P_des = self.pressione_des_data     # [bar] points 0-6 alpha phase, 7-22 beta + alpha phase, 23-29 beta phase
+        self.conc_des = np.concatenate((self.A_alfa_DES*((P_des[:7])**(self.Gamma_alfaDES/2))*e**((-self.Gamma_alfaDES*self.V_alfaDES*P_des[:7])/(c.R_UNIVERSAL*self.DES_Temp))*e**((-self.Gamma_alfaDES*self.Enthalpy_alfa_DES)/(c.R_UNIVERSAL*self.DES_Temp)),
+                                        self.Conc_media+(1/(self.SlopeFactor))*(ln(P_des[7:23])+(self.DeltaH_formazione_DES/(c.R_UNIVERSAL*self.DES_Temp))-(self.DeltaS_formazione_DES/(c.R_UNIVERSAL))),
+                                        self.A_beta_DES*((P_des[23:])**(self.Gamma_betaDES/2))*e**((-self.Gamma_betaDES*self.V_betaDES*P_des[23:])/(c.R_UNIVERSAL*self.DES_Temp))*e**((-self.Gamma_betaDES*self.Enthalpy_beta_DES)/(c.R_UNIVERSAL*self.DES_Temp))))
 
         self.conc_des=np.sort(self.conc_des)
 
@@ -162,6 +140,16 @@ class mhhc_compressor:
 
         self.interp_beta=interp1d(Beta, DeltaConc, kind='cubic', bounds_error=None, fill_value='extrapolate')
 
+        'Design point: heat, hydrogen and work per compressor are fixed by the compression ratio and evaluated once'
+
+        self.p_in   = 45                    # [bar] absorption pressure
+        self.p_out  = 120                   # [bar] desorption pressure
+        self.beta   = self.p_out/self.p_in  # [-] compression ratio
+        performance = mhhc_compressor.performance(self,self.beta)
+        self.Q_requested        = performance['Q_requested']        # [kW] heat requested by one compressor
+        self.H2_kg              = performance['H2_kg']              # [kg] hydrogen desorbed by one compressor in the hour
+        self.ETA                = performance['ETA_Polytropic']     # [-] compressor efficiency
+
         # plt.figure(dpi=1000)
         # plt.plot(self.conc_des, self.pressione_des_data, linewidth=3)
         # plt.plot(self.interp_des(self.pressione_des_data), self.pressione_des_data, linewidth=3, linestyle='--')
@@ -460,42 +448,64 @@ class mhhc_compressor:
         plt.show()
 
 
-    def use(self,step,hyd,storable_hydrogen):
+    def performance(self,beta):
+        """
+        MHHC performance as a function of the compression ratio: ΔConc from the β-ΔConc curve, heat, hydrogen and work per compressor
 
-        p_in=45
+        beta : float or np.ndarray compression ratio [-]
 
-        p_out=120
-                  
-        beta=p_out/p_in  #[-]   compression ratio
+        output : dict of float or np.ndarray
+            'DeltaConc': concentration swing between absorption and desorption [wt%]
+            'Q_requested': heat requested by one compressor [kW]
+            'H2_kg': hydrogen desorbed by one compressor in the hour [kg]
+            'Work_Polytropic': work supplied to hydrogen in the form of pressure by one compressor [kW]
+            'ETA_Polytropic': compressor efficiency [-]
+        """
+        DeltaConc       = self.interp_beta(beta)    # [wt%]
+        Q_requested     = ((((((self.H2AbsAlloyMass*(DeltaConc)/100)/self.H2MolMass)*self.DeltaH_formazione_DES/1000 + (self.DES_Temp-self.ABS_Temp)*self.CvMH*(self.MetalTankMass+self.H2AbsAlloyMass))/500)/3600)*1000) #[kW] heat requested
+        H2percycle_h    = ((self.H2AbsAlloyMass*(DeltaConc)/100)/(c.H2SDENSITY*self.CycleTime/3600))    #[Sm^3/h]   flow rate that can be desorbed in the time interval considered (one hour) NET VALUE
+        Work_Polytropic = (((((self.PolytropicCoeff/(self.PolytropicCoeff-1))*self.p_in*0.27593*((beta)**((self.PolytropicCoeff-1)/self.PolytropicCoeff)-1))/10)*(2*self.H2AbsAlloyMass*(DeltaConc)/100)/3600)*1000)  #[kW] work supplied to hydrogen in the form of pressure
+        return({'DeltaConc': DeltaConc,
+                'Q_requested': Q_requested,
+                'H2_kg': H2percycle_h*c.H2SDENSITY,
+                'Work_Polytropic': Work_Polytropic,
+                'ETA_Polytropic': Work_Polytropic/Q_requested})
 
-        Q_requested=((((((self.H2AbsAlloyMass*(self.interp_beta(beta))/100)/self.H2MolMass)*self.DeltaH_formazione_DES/1000 + (self.DES_Temp-self.ABS_Temp)*self.CvMH*(self.MetalTankMass+self.H2AbsAlloyMass))/500)/3600)*1000)#*self.n_compressor #[kW] heat requested
-        # print(Q_requested)
-        H2percycle_h = ((self.H2AbsAlloyMass*(self.interp_beta(beta))/100)/(c.H2SDENSITY*self.CycleTime/3600))#*self.n_compressor #- (Q_requested/(c.LHVH2*1000))*3600/c.H2SDENSITY  #[Sm^3/h]   flow rate that can be desorbed in the time interval considered (one hour) NET VALUE
-        
-        Work_Polytropic = (((((self.PolytropicCoeff/(self.PolytropicCoeff-1))*p_in*0.27593*((beta)**((self.PolytropicCoeff-1)/self.PolytropicCoeff)-1))/10)*(2*self.H2AbsAlloyMass*(self.interp_beta(beta))/100)/3600)*1000)#*self.n_compressor  #[kW] work supplied to hydrogen in the form of pressure
-        # print(Work_Polytropic)
-        ETA_Polytropic = Work_Polytropic/Q_requested #[-] compressor efficiency
-        # print(ETA_Polytropic)
-        self.ETA_Polytropic[step] = ETA_Polytropic
+    def use(self,step,hyd,storable_hydrogen):
+        """
+        MHHC compressors absorb heat to compress hydrogen
 
-        self.H2_kg = H2percycle_h*c.H2SDENSITY
-       
-        if hyd == 0:
-            n_compressor_used = 0
-        else:
-            n_compressor_used = hyd/self.H2_kg
-        if n_compressor_used > self.n_compressor:
+        step : int step to be simulated or slice/array of steps
+        hyd : float or np.ndarray hydrogen to be compressed, one value per step
+        storable_hydrogen : float storable hydrogen [kg]
+
+        output : float or np.ndarray hydrogen compressed
+                 float or np.ndarray heat requested expressed as heating water [Sm^3] (-)
+        """
+        self.ETA_Polytropic[step] = self.ETA
+
+        if np.ndim(hyd) == 0:                                               # single step
+            n_compressor_used = hyd/self.H2_kg                              # [-] 0 if there is no hydrogen to compress
+            if n_compressor_used > self.n_compressor:
+                print('Warning: The number of Methal Hydride Hydrogen Compressors is not sufficient \n')
+                self.n_compressors_used[step] = self.n_compressor
+                hyd_compressed = self.H2_kg*self.n_compressor
+                Q_requested = self.Q_requested*self.n_compressor
+            else:
+                self.n_compressors_used[step] = int(n_compressor_used)+1
+                hyd_compressed = hyd
+                Q_requested = self.Q_requested*n_compressor_used
+            return (hyd_compressed,-Q_requested / (c.LHV_H2*3600))
+
+        n_compressor_used   = np.asarray(hyd,dtype=float)/self.H2_kg      # [-] 0 if there is no hydrogen to compress
+        over                = n_compressor_used > self.n_compressor
+        if np.any(over):
             print('Warning: The number of Methal Hydride Hydrogen Compressors is not sufficient \n')
-            self.n_compressors_used[step] = self.n_compressor
-            hyd_compressed = self.H2_kg*self.n_compressor
-            Q_requested = Q_requested*self.n_compressor
-            Sm3_requested = Q_requested / (c.LHV_H2*3600)
-        else:
-            self.n_compressors_used[step] = int(n_compressor_used)+1
-            hyd_compressed = hyd
-            Q_requested = Q_requested*n_compressor_used
-            Sm3_requested = Q_requested / (c.LHV_H2*3600)
 
+        self.n_compressors_used[step] = np.where(over,self.n_compressor,n_compressor_used.astype(int)+1)
+        hyd_compressed  = np.where(over,self.H2_kg*self.n_compressor,hyd)
+        Q_requested     = self.Q_requested*np.where(over,self.n_compressor,n_compressor_used)
+        Sm3_requested   = Q_requested / (c.LHV_H2*3600)
         return (hyd_compressed,-Sm3_requested)
 
 ##########################################################################################
@@ -3,9 +3,10 @@ import os
 import sys 
 sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding constants module path 
 from core import constants as c
-from CoolProp.CoolProp import PropsSI
+from core.thermo import PropsSI
+from techs.storage import storage
 
-class O2_tank:    
+class O2_tank(storage):    
     
     def __init__(self,parameters,simulation_hours):
         
@@ -19,14 +20,14 @@ class O2_tank:
                       
         output : O2 tank object able to:
             supply or abrosrb oxygen .use(h,oxy)
+            supply or abrosrb oxygen over the whole simulation .use_series(oxy)
             record the level of charge .LOC
             calculate its own volume (pressure) .volume(pressure)
         """
-        self.pressure = parameters['pressure']          # H tank storage pressure
-        self.LOC = np.zeros(simulation_hours+1)         # array H tank level of Charge 
-        self.max_capacity = parameters['max capacity']  # H tank max capacity [kg]
-        self.used_capacity = 0                          # H tank used capacity <= max_capacity [kg]
-        temperature         = 273.15 + 15                           # [K] temperature at which hydrogen is stored
+        super().__init__(parameters['max capacity'],simulation_hours)  # [kg] level of charge, max and used capacity (see storage.py)
+        self.cost = False # will be updated with tec_cost()
+        self.pressure = parameters['pressure']          # O2 tank storage pressure
+        temperature         = 273.15 + 15                           # [K] temperature at which oxygen is stored
         self.density        = PropsSI('D', 'P', self.pressure*100000, 'T', temperature, 'oxygen')  # [kg/m^3] oxygen density for selected density and temperature
         if self.max_capacity:
             self.tank_volume = round(self.max_capacity/self.density,2)   # [m^3] tank volume
@@ -35,50 +36,40 @@ class O2_tank:
         """
         The O2 tank can supply or absorb oxygen
      
-        h: int hour to be simulated
-        oxy: oxygen requested (oxy<0) or provided (oxy>0) [kg]
+        h: int step to be simulated
+        oxy: oxygen requested (oxy<0) or provided (oxy>0) [kg/s]
+        constant_demand: constant oxygen demand when the tank is sized at the end of simulation [kg/s]
       
-        output : oxygen supplied or absorbed that hour [kg]
+        output : oxygen supplied or absorbed in the timestep [kg/s]
         """
         if self.max_capacity:
-            if oxy >= 0:                                         # charge H tank
-                
-                charge = min(oxy,self.max_capacity-self.LOC[h])  # how much oxygen can H tank absorb?
-                self.LOC[h+1] = self.LOC[h]+charge               # charge H tank
-                
-                if self.LOC[h+1] > self.used_capacity: # update used capacity
-                    self.used_capacity = self.LOC[h+1]      
-                
-                return(-charge) # return oxygen absorbed
-                
-            else: # discharge H tank (this logic allows to back-calculate the LOC[0], it's useful for long term storage systems)
-                
-                if (self.used_capacity==self.max_capacity):  # the max_capacity has been reached, so LOC[h+1] can't become negative 
-                       
-                    discharge = min(-oxy,self.LOC[h]) # how much oxygen can H tank supply?
-                    self.LOC[h+1] = self.LOC[h]-discharge # discharge H tank
-            
-                else: # the max_capacity has not yet been reached, so LOC[h+1] may become negative and then the past LOC may be shifted upwards  
-                                                      
-                    discharge = min(-oxy,self.LOC[h]+self.max_capacity-self.used_capacity) # how much oxygen can H tank supply?
-                    self.LOC[h+1] = self.LOC[h]-discharge                                  # discharge H tank
-                    if self.LOC[h+1] < 0:                                                  # if the level of charge has become negative
-                        self.used_capacity += - self.LOC[h+1]                              # incrase the used capacity
-                        self.LOC[:h+2] += - self.LOC[h+1]                                  # traslate the past LOC array
-                        
-                return(discharge) # return oxygen supplied
-            
-        else: 
-            charge = oxy - constant_demand        # how much oxygen can H tank absorb?
-            self.LOC[h+1] = self.LOC[h]+charge    # charge H tank
-            if h == (len(self.LOC)-2):            # at the end of simulation. LOC array has self.simulation_hours + 1 values
-                self.max_capacity   = max(self.LOC)+abs(min(self.LOC))  # [kg] max tank capacity
-                self.shift          = abs(min(self.LOC))                # oxygen amount in storage at time 0
-                self.LOC            = self.LOC + self.shift             # shifting the Level Of Charge curve to avoid negative minimum value (minimum is now at 0kg)
-                                                                        # It is now possible to define how much H2 must be present in storage at the beginning of simulation. 
-                self.tank_volume = round(self.max_capacity/self.density,2)   # [m^3] tank volume                                                        
-            
-            return(charge)
+            return(self.exchange(h,oxy*self.P2E)/self.P2E)                         # [kg/s] oxygen supplied (+) or absorbed (-), see storage.exchange
+        else:
+            return(self.accumulate(h,(oxy-constant_demand)*self.P2E)/self.P2E)     # [kg/s] oxygen absorbed, see storage.accumulate
+    
+    def use_series(self,oxy,constant_demand=False):
+        """
+        The O2 tank can supply or absorb oxygen. Whole simulation at once
+     
+        oxy: array oxygen requested (oxy<0) or provided (oxy>0) at each step [kg/s]
+        constant_demand: constant oxygen demand when the tank is sized at the end of simulation [kg/s]
+      
+        output : array oxygen supplied (+) or absorbed (-) at each step [kg/s]
+        """
+        oxy = np.asarray(oxy)*self.P2E              # [kg] conversion from kg/s to kg for the considered timestep
+        if not self.max_capacity:                   # tank sized at the end of simulation: no capacity bound, the Level Of Charge is the cumulative net charge 
+            charge = oxy - constant_demand*self.P2E
+            self.LOC[1:] = self.LOC[0] + np.cumsum(charge)
+            self.max_capacity   = max(self.LOC)+abs(min(self.LOC))  # [kg] max tank capacity
+            self.shift          = abs(min(self.LOC))                # oxygen amount in storage at time 0
+            self.LOC           += self.shift                        # shifting the Level Of Charge curve to avoid negative minimum value (minimum is now at 0kg)
+            self.tank_volume = round(self.max_capacity/self.density,2)   # [m^3] tank volume 
+            return(charge/self.P2E)
+        
+        flow = np.zeros(len(oxy))                   # the capacity bound makes each step depend on the previous one
+        for h in range(len(oxy)):
+            flow[h] = self.exchange(h,oxy[h])
+        return(flow/self.P2E)
     
     def sizing(self,htankmaxcapacity):
         """
@@ -90,6 +81,7 @@ class O2_tank:
         """
         constant = 9 # [-] units of oxygen produced per each unit of hydrogen
         self.max_capacity = htankmaxcapacity*constant
+        self.update_bounds()
         self.tank_volume = round(self.max_capacity/self.density,2)   # [m^3] tank volume
         
         return(self.max_capacity)
@@ -0,0 +1,133 @@
+import numpy as np
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.getcwd(),os.path.pardir)))   # temorarily adding constants module path
+from core import constants as c
+
+class storage:
+
+    def __init__(self,max_capacity,timestep_number,etaC=1,etaD=1,self_discharge=0,DoD=0):
+        """
+        Create a storage object. Common part of battery, H_tank, HPH_tank and O2_tank
+
+        Conversion factors, self-discharge decay and level of charge bounds are computed once here,
+        so that the storage update at each step only needs a few float operations.
+
+        max_capacity : float [kJ] or [kg] max capacity, False if the storage is sized at the end of simulation
+        timestep_number : int number of timesteps of the simulation
+        etaC : float charging efficiency
+        etaD : float discharging efficiency
+        self_discharge : float share of the level of charge lost in a timestep
+        DoD : float depth of discharge, minimum level of charge as a share of max capacity
+
+        output : storage object able to:
+            keep track of the level of charge .LOC
+            exchange a given amount with bounded capacity .exchange(step,amount)
+            accumulate a given amount and be sized at the end of simulation .accumulate(step,amount)
+            save and restore its state .get_state(step) .set_state(state)
+        """
+
+        self.timestep       = c.timestep                        # [min] selected timestep for simulation
+        self.P2E            = c.timestep*60                     # [s] conversion factor from kW to kJ or from kg/s to kg in a timestep
+        self.LOC            = np.zeros(timestep_number+1)       # [kJ] or [kg] array keeping track of the level of charge
+        self.max_capacity   = max_capacity                      # [kJ] or [kg] max capacity, it can be reduced by ageing
+        self.nom_capacity   = max_capacity                      # [kJ] or [kg] early life max capacity
+        self.used_capacity  = 0                                 # [kJ] or [kg] used capacity <= max_capacity (see exchange)
+        self.etaC           = etaC                              # [-] charging efficiency
+        self.etaD           = etaD                              # [-] discharging efficiency
+        self.DoD            = DoD                               # [-] depth of discharge
+        self.decay          = 1-self_discharge                  # [-] share of the level of charge left after one timestep
+        self.charge_factor  = etaC*self.P2E                     # [s] energy (mass) stored for each unit of power (flow rate) absorbed in a timestep
+        self.update_bounds()
+
+    def update_bounds(self):
+        """
+        Level of charge bounds depending on max capacity, to be updated every time max capacity changes (es. ageing, sizing)
+        """
+        self.min_LOC = self.max_capacity*self.DoD               # [kJ] or [kg] minimum level of charge
+
+    def exchange(self,step,amount):
+        """
+        The storage can supply or absorb an amount within its capacity
+
+        step: int step to be simulated
+        amount: float requested (amount<0) or provided (amount>0) in the timestep [kJ] or [kg]
+
+        output : float supplied (+) or absorbed (-) in the timestep [kJ] or [kg]
+        """
+        if amount >= 0:     # charge
+            charge = min(amount,self.max_capacity-self.LOC[step])  # how much can be absorbed? Minimum between the amount provided and available capacity -> maximum capacity - Level of Charge (always a positive value, promptly shifted above 0 every time it goes beyond)
+            self.LOC[step+1] = self.LOC[step]+charge
+
+            """
+            EXPLANATION self.used_capacity parameter
+            self.used_capacity -> parameter in which is stored the memory of the storage charging story.
+                                  It is not representative of the used capacity at the considered timestep.
+                                  It represents the maximum level reached inside the storage up to time step of the simulation.
+                                  Once self.used_capacity reaches the value of self.max.capacity it is no longer possible to allow
+                                  the LOC to move towards negative values depending on the demand.
+                                  From this point onwards, the value of self.used_capacity remains the same until the end of the simulation.
+            """
+
+            if self.LOC[step+1] > self.used_capacity:   # update used capacity
+                self.used_capacity = self.LOC[step+1]
+            return(-charge)
+
+        else:               # discharge (this logic allows to back-calculate LOC[0], it's useful for long term storage systems)
+            if self.used_capacity == self.max_capacity:     # the max_capacity has been reached, so LOC[step+1] can't become negative anymore
+                discharge           = min(-amount,self.LOC[step])
+                self.LOC[step+1]    = self.LOC[step]-discharge
+
+            else:   # the max_capacity has not yet been reached, so LOC[step+1] may become negative and then the past LOC can be shifted upwards to positive values.
+                discharge           = min(-amount,self.LOC[step]+self.max_capacity-self.used_capacity)
+                self.LOC[step+1]    = self.LOC[step]-discharge
+                if self.LOC[step+1] < 0:                        # if the level of charge has become negative
+                    self.used_capacity  += - self.LOC[step+1]   # incrase the used capacity
+                    self.LOC[:step+2]   += - self.LOC[step+1]   # shift the past LOC array
+            return(discharge)
+
+    def accumulate(self,step,charge):
+        """
+        Storage without a capacity bound, sized at the end of simulation ('supply-led' operation strategy).
+        Tanks only: the tank volume is calculated from density once the max capacity is known.
+
+        step: int step to be simulated
+        charge: float net amount absorbed (+) or supplied (-) in the timestep [kg]
+
+        output : float net amount absorbed (+) or supplied (-) in the timestep [kg]
+        """
+        self.LOC[step+1] = self.LOC[step]+charge
+        if step == (len(self.LOC)-2):                                       # at the end of simulation. LOC array has timestep_number+1 values
+            self.max_capacity   = max(self.LOC)+abs(min(self.LOC))          # [kg] max tank capacity
+            self.shift          = abs(min(self.LOC))                        # [kg] amount in storage at time 0
+            self.LOC           += self.shift                                # shifting the Level Of Charge curve to avoid negative minimum value (minimum is now at 0kg)
+                                                                            # It is now possible to define how much must be present in storage at the beginning of simulation.
+            self.tank_volume    = round(self.max_capacity/self.density,2)   # [m^3] tank volume
+            self.update_bounds()
+        return(charge)
+
+    def get_state(self,step):
+        """
+        Storage state at the beginning of step, to restart the simulation from there
+
+        step: int step at which the simulation will be restarted
+
+        output : dict picklable storage state
+        """
+        return({'step'          : step,
+                'LOC'           : self.LOC[:step+1].copy(),     # [kJ] or [kg] level of charge history, LOC[step] is the current level
+                'used_capacity' : self.used_capacity})          # [kJ] or [kg]
+
+    def set_state(self,state):
+        """
+        Restore a storage state saved with get_state(). Max capacity can differ from the one of the saved simulation:
+        the level of charge is limited to it.
+
+        state: dict storage state
+        """
+        step = state['step']
+        self.LOC[:step+1]   = state['LOC']
+        self.used_capacity  = state['used_capacity']
+        if self.max_capacity:
+            self.LOC[step]      = min(self.LOC[step],self.max_capacity)
+            self.used_capacity  = min(self.used_capacity,self.nom_capacity)